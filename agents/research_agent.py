@@ -1,6 +1,6 @@
 # agents/research_agent.py
-from crewai import Agent
-from config import get_llm
+from config import get_crew_llm, LLM_MODEL, OLLAMA_BASE_URL
+import functools
 
 class ResearchAgent:
     """Research Agent Class for Newsletter Style Analysis
@@ -13,15 +13,24 @@ class ResearchAgent:
     Methods:
         create(): Creates and returns a Style Analysis Agent instance configured with
                  specific role, goals, and capabilities for newsletter analysis.
+                 Instances are memoized per configuration.
     Example:
         agent = ResearchAgent.create()
     """
     @staticmethod
-    def create():
+    @functools.lru_cache(maxsize=None)
+    def create(model=LLM_MODEL, base_url=OLLAMA_BASE_URL, verbose=True, cache=None):
         """Create and return a Style Analysis Agent instance.
 
         This function initializes a specialized agent focused on analyzing writing styles and patterns
-        in newsletters, particularly financial content.
+        in newsletters, particularly financial content. The agent and its LLM are built once per
+        configuration and reused by later calls; ``ResearchAgent.create.cache_clear()`` drops them.
+
+        Args:
+            model (str): Ollama model for the agent.
+            base_url (str): Ollama endpoint.
+            verbose (bool): Log the agent's reasoning.
+            cache (PersistentLLMCache, optional): Response cache shared with other runs (see get_llm_cache).
 
         Returns:
             Agent: An Agent instance configured with:
@@ -31,6 +40,8 @@ class ResearchAgent:
                 - Delegation: Disabled
                 - Verbose mode: Enabled
         """
+        # crewai is slow to import and only needed once an agent is built
+        from crewai import Agent
         return Agent(
             role='Style Analysis Expert',
             goal='Analyze newsletters to understand writing style and patterns',
@@ -38,7 +49,7 @@ class ResearchAgent:
             Your specialty is analyzing financial newsletters to identify unique writing patterns,
             tone, structure, and stylistic elements. You have a deep understanding of both
             financial writing and stylistic analysis.""",
-            verbose=True,
+            verbose=verbose,
             allow_delegation=False,
-            llm=get_llm()
+            llm=get_crew_llm(model, base_url, cache=cache)
         )
\ No newline at end of file
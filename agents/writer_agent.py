@@ -1,6 +1,6 @@
 # agents/writer_agent.py
-from crewai import Agent
-from config import get_llm
+from config import get_crew_llm, LLM_MODEL, OLLAMA_BASE_URL
+import functools
 
 class WriterAgent:
     """WriterAgent class for creating specialized financial newsletter writing agents.
@@ -9,14 +9,25 @@ class WriterAgent:
     Attributes:
         None
     Methods:
-        create(): Creates and returns a Financial Newsletter Writer Agent instance.
-    @staticmethod
+        create(): Creates and returns a Financial Newsletter Writer Agent instance,
+                 memoized per configuration.
+    Example:
+        agent = WriterAgent.create()
     """
-    def create():
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def create(model=LLM_MODEL, base_url=OLLAMA_BASE_URL, verbose=True, cache=None):
         """Creates and returns a Financial Newsletter Writer Agent.
 
         This function instantiates an Agent object configured specifically for writing
-        financial newsletters with a consistent style and voice.
+        financial newsletters with a consistent style and voice. The agent and its LLM are
+        built once per configuration and reused by later calls.
+
+        Args:
+            model (str): Ollama model for the agent.
+            base_url (str): Ollama endpoint.
+            verbose (bool): Log the agent's reasoning.
+            cache (PersistentLLMCache, optional): Response cache shared with other runs (see get_llm_cache).
 
         Returns:
             Agent: An Agent object initialized with:
@@ -27,6 +38,8 @@ class WriterAgent:
                 - Delegation disabled
                 - Custom LLM configuration
         """
+        # crewai is slow to import and only needed once an agent is built
+        from crewai import Agent
         return Agent(
             role='Financial Newsletter Writer',
             goal='Write engaging financial newsletters matching the established style',
@@ -34,7 +47,7 @@ class WriterAgent:
             newsletters that maintain consistency with an established voice and style.
             You excel at breaking down complex financial concepts while maintaining
             the original author's tone and approach.""",
-            verbose=True,
+            verbose=verbose,
             allow_delegation=False,
-            llm=get_llm()
+            llm=get_crew_llm(model, base_url, cache=cache)
         )
\ No newline at end of file
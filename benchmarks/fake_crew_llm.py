@@ -0,0 +1,38 @@
+# benchmarks/fake_crew_llm.py
+from benchmarks.fake_llm import FakeLLM
+from utils.crew_llm import CachedCrewLLM
+from typing import Any, Dict, List, Optional
+
+
+class FakeCrewLLM(CachedCrewLLM):
+    """FakeLLM behind CrewAI's own LLM interface, for running the crew offline.
+
+    CrewAI agents call ``llm.call(messages)`` and rebuild any LLM that is not a
+    ``crewai.LLM`` into a LiteLLM-backed one, so the LangChain FakeLLM cannot be
+    handed to an Agent directly. This subclass keeps CrewAI's interface and
+    answers from a wrapped FakeLLM instead of LiteLLM, framed as the
+    ``Final Answer:`` the agent executor parses. Agent copies share the wrapped
+    FakeLLM, so its call counters cover the whole crew; calls answered by
+    ``cache`` do not reach it.
+
+    Attributes:
+        fake (FakeLLM): The model that produces the responses.
+    Example:
+        >>> agent = Agent(role='Writer', goal='...', backstory='...', llm=FakeCrewLLM())
+    """
+    def __init__(self, fake: Optional[FakeLLM] = None, **kwargs: Any):
+        super().__init__(model='fake/fake-benchmark', **kwargs)
+        self.fake = fake or FakeLLM()
+
+    def _complete(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        prompt = '\n\n'.join(message['content'] for message in messages)
+        return f"Thought: I now know the final answer\nFinal Answer: {self.fake.invoke(prompt)}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 8192
@@ -0,0 +1,90 @@
+# benchmarks/fake_llm.py
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import PrivateAttr
+from typing import Any, Dict, Iterator, List, Optional
+import threading
+import hashlib
+import time
+
+WORDS = (
+    'margin', 'earnings', 'growth', 'market', 'rates', 'inflation', 'portfolio', 'yield',
+    'investors', 'revenue', 'cash', 'flow', 'valuation', 'risk', 'the', 'and', 'of', 'a',
+    'to', 'in', 'is', 'that', 'for', 'with', 'on', 'as', 'this', 'we', 'it', 'but'
+)
+
+
+class FakeLLM(LLM):
+    """Offline stand-in for OllamaLLM with a configurable latency profile.
+
+    Each call waits ``first_token_latency`` seconds and then emits
+    ``response_tokens`` words at ``tokens_per_second``. The text is derived from a
+    hash of the prompt, so identical prompts get identical responses and the
+    LangChain cache behaves as it does with a deterministic model.
+
+    Attributes:
+        first_token_latency (float): Seconds before the first token (prompt processing).
+        tokens_per_second (float): Decode speed.
+        response_tokens (int): Words per response.
+    Example:
+        >>> llm = FakeLLM(first_token_latency=0.05, tokens_per_second=50)
+        >>> ai = NewsletterAI(llm=llm)
+    """
+    first_token_latency: float = 0.05
+    tokens_per_second: float = 200.0
+    response_tokens: int = 150
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _prompt_chars: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-benchmark'
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            'first_token_latency': self.first_token_latency,
+            'tokens_per_second': self.tokens_per_second,
+            'response_tokens': self.response_tokens,
+        }
+
+    @property
+    def calls(self) -> int:
+        """Calls that reached the model, i.e. were not answered by the cache."""
+        return self._calls
+
+    @property
+    def prompt_chars(self) -> int:
+        """Total characters of prompts that reached the model."""
+        return self._prompt_chars
+
+    def _tokens(self, prompt: str) -> List[str]:
+        seed = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+        tokens = [WORDS[(seed[i % len(seed)] + i * 7) % len(WORDS)] for i in range(self.response_tokens)]
+        return [token + (' ' if (i + 1) % 12 else '.\n') for i, token in enumerate(tokens)]
+
+    def _record(self, prompt: str):
+        with self._lock:
+            self._calls += 1
+            self._prompt_chars += len(prompt)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        self._record(prompt)
+        tokens = self._tokens(prompt)
+        time.sleep(self.first_token_latency + len(tokens) / self.tokens_per_second)
+        return ''.join(tokens)
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        self._record(prompt)
+        time.sleep(self.first_token_latency)
+        for token in self._tokens(prompt):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            time.sleep(1 / self.tokens_per_second)
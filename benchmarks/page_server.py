@@ -0,0 +1,270 @@
+# benchmarks/page_server.py
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta
+from functools import lru_cache
+from html import escape
+from typing import Collection, Dict, List, Optional, Tuple
+import threading
+import hashlib
+import random
+import time
+import re
+
+VOCABULARY = (
+    'markets', 'earnings', 'margins', 'inflation', 'the', 'fed', 'bonds', 'yields', 'growth',
+    'stocks', 'investors', 'cash', 'flow', 'valuations', 'revenue', 'guidance', 'quarter',
+    'portfolio', 'risk', 'dividends', 'buybacks', 'consumers', 'retail', 'chips', 'demand',
+    'supply', 'rates', 'credit', 'spreads', 'momentum', 'and', 'of', 'to', 'a', 'in', 'is',
+    'that', 'for', 'with', 'but', 'so', 'however', 'this', 'we', 'it', 'our', 'their'
+)
+
+# Lines every post carries, like Beehiiv's subscribe box, share bar and footer
+BOILERPLATE_HEAD = ('Subscribe to Lootbag', 'Share this post', 'Upgrade to paid')
+BOILERPLATE_TAIL = ('Thanks for reading! Subscribe for free to receive new posts.',
+                    'Share', 'Login', '© 2024 Lootbag. All rights reserved.')
+
+POST_PATH = re.compile(r'^/p/post-(\d+)$')
+EPOCH = datetime(2020, 1, 1)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(8, 24))]
+    return ' '.join(words).capitalize() + rng.choice('..?!')
+
+
+@lru_cache(maxsize=8192)
+def render_post(index: int, paragraphs: int = 8) -> str:
+    """Deterministic Beehiiv-like HTML for post ``index``."""
+    rng = random.Random(index)
+    body = '\n'.join(
+        f"<p>{escape(' '.join(_sentence(rng) for _ in range(rng.randint(2, 5))))}</p>"
+        for _ in range(paragraphs)
+    )
+    head = '\n'.join(f"<div class=\"cta\">{escape(line)}</div>" for line in BOILERPLATE_HEAD)
+    tail = '\n'.join(f"<div class=\"footer\">{escape(line)}</div>" for line in BOILERPLATE_TAIL)
+    published = (EPOCH + timedelta(days=index)).isoformat()
+    return f"""<!DOCTYPE html>
+<html><head><title>Post {index}</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/archive">Archive</a></nav>
+<h1>Synthetic post {index}</h1>
+<time datetime="{published}">{published[:10]}</time>
+<span class="post-author">Benchmark Author</span>
+<main>
+{head}
+<h1>Synthetic post {index}</h1>
+{body}
+{tail}
+</main>
+</body></html>"""
+
+
+class SyntheticArchive:
+    """Parameters of a generated publication archive.
+
+    Attributes:
+        posts (int): Number of posts, served at ``/p/post-<n>``.
+        paragraphs (int): Paragraphs per post.
+    """
+    def __init__(self, posts: int, paragraphs: int = 8):
+        self.posts = posts
+        self.paragraphs = paragraphs
+
+    def sitemap(self, base_url: str) -> str:
+        entries = ''.join(
+            f"<url><loc>{base_url}/p/post-{i}</loc><lastmod>{(EPOCH + timedelta(days=i)).date()}</lastmod></url>"
+            for i in range(self.posts)
+        )
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>')
+
+    def urls(self, base_url: str) -> List[str]:
+        return [f"{base_url}/p/post-{i}" for i in range(self.posts)]
+
+
+class Faults:
+    """Faults a PageServer injects into post requests, reproducible for a given seed.
+
+    Attributes:
+        error_rate (float): Share of requests answered with ``status``.
+        status (int): Status of injected errors.
+        retry_after (str, optional): ``Retry-After`` header sent with injected errors.
+        stall_rate (float): Share of requests held for ``stall_seconds`` before answering,
+            to trip client timeouts.
+        stall_seconds (float): How long a stalled request is held.
+        drop_rate (float): Share of connections closed without any response.
+        fail_first (int): Every post answers its first ``fail_first`` requests with ``status``.
+        gone (Collection[int]): Post indices answered with 404.
+        outage (Tuple[float, float], optional): Seconds after start between which every
+            request, the sitemap included, gets ``status``.
+        seed (int): Seed of the fault decisions.
+    Example:
+        >>> with PageServer(SyntheticArchive(200), faults=Faults(error_rate=0.2, drop_rate=0.05)) as server:
+        ...     scraper.process_multiple_urls(server.urls())
+        >>> server.injected
+    """
+    def __init__(self, error_rate: float = 0.0, status: int = 503, retry_after: Optional[str] = None,
+                 stall_rate: float = 0.0, stall_seconds: float = 2.0, drop_rate: float = 0.0,
+                 fail_first: int = 0, gone: Collection[int] = (), outage: Optional[Tuple[float, float]] = None,
+                 seed: int = 0):
+        self.error_rate = error_rate
+        self.status = status
+        self.retry_after = retry_after
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.drop_rate = drop_rate
+        self.fail_first = fail_first
+        self.gone = set(gone)
+        self.outage = outage
+        self._random = random.Random(seed)
+        self._seen: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def decide(self, index: Optional[int], elapsed: float) -> Optional[str]:
+        """Fault for a request of post ``index`` (None for the sitemap): 'error', 'stall', 'drop', 'gone' or None."""
+        if self.outage and self.outage[0] <= elapsed < self.outage[1]:
+            return 'error'
+        if index is None:
+            return None
+        if index in self.gone:
+            return 'gone'
+        with self._lock:
+            self._seen[index] = self._seen.get(index, 0) + 1
+            if self._seen[index] <= self.fail_first:
+                return 'error'
+            roll = self._random.random()
+        if roll < self.drop_rate:
+            return 'drop'
+        if roll < self.drop_rate + self.error_rate:
+            return 'error'
+        if roll < self.drop_rate + self.error_rate + self.stall_rate:
+            return 'stall'
+        return None
+
+
+class PageServer:
+    """Serves a SyntheticArchive from a local threaded HTTP server, fully offline.
+
+    Post pages carry an ETag and answer ``If-None-Match`` with 304, so the
+    scraper's conditional revalidation path is exercised too. With ``faults``,
+    requests fail the way real hosts do (error statuses, stalls, dropped
+    connections, outages); ``injected`` counts each kind.
+
+    Example:
+        >>> with PageServer(SyntheticArchive(posts=100)) as server:
+        ...     scraper.process_multiple_urls(server.urls())
+    """
+    def __init__(self, archive: SyntheticArchive, host: str = '127.0.0.1', port: int = 0,
+                 faults: Optional[Faults] = None):
+        self.archive = archive
+        self.faults = faults
+        self.requests = 0
+        self.not_modified = 0
+        self.injected: Dict[str, int] = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> List[str]:
+        return self.archive.urls(self.base_url)
+
+    def _count(self, not_modified: bool):
+        with self._lock:
+            self.requests += 1
+            self.not_modified += not_modified
+
+    def _fault(self, index: Optional[int]) -> Optional[str]:
+        if self.faults is None:
+            return None
+        fault = self.faults.decide(index, time.monotonic() - self._started)
+        if fault:
+            with self._lock:
+                self.requests += 1
+                self.injected[fault] = self.injected.get(fault, 0) + 1
+        return fault
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status: int, body: bytes = b'', content_type: str = 'text/html', etag: str = None,
+                      retry_after: str = None):
+                self.send_response(status)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                if retry_after:
+                    self.send_header('Retry-After', retry_after)
+                try:
+                    self.end_headers()
+                    if body:
+                        self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. timed out on a stalled request
+                    self.close_connection = True
+
+            def _inject(self, index: Optional[int]) -> bool:
+                """Apply a fault to this request; True when it has been answered (or dropped)."""
+                fault = server._fault(index)
+                if fault == 'drop':
+                    self.close_connection = True
+                    return True
+                if fault == 'error':
+                    self._send(server.faults.status, b'unavailable', retry_after=server.faults.retry_after)
+                    return True
+                if fault == 'gone':
+                    self._send(404, b'not found')
+                    return True
+                if fault == 'stall':
+                    time.sleep(server.faults.stall_seconds)
+                return False
+
+            def do_GET(self):
+                match = POST_PATH.match(self.path)
+                if self._inject(int(match.group(1)) if match else None):
+                    return
+                if self.path == '/sitemap.xml':
+                    server._count(False)
+                    return self._send(200, server.archive.sitemap(server.base_url).encode('utf-8'),
+                                      content_type='application/xml')
+                if not match or int(match.group(1)) >= server.archive.posts:
+                    server._count(False)
+                    return self._send(404, b'not found')
+                body = render_post(int(match.group(1)), server.archive.paragraphs).encode('utf-8')
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    server._count(True)
+                    return self._send(304, etag=etag)
+                server._count(False)
+                self._send(200, body, etag=etag)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'PageServer':
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'PageServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,263 @@
+# benchmarks/run_benchmarks.py
+"""Offline end-to-end benchmarks for the scrape -> clean -> analyze -> write pipeline.
+Each archive size runs in its own process against a local PageServer of synthetic
+Beehiiv-like posts, with NewsletterAI driven by a FakeLLM, so nothing touches the
+network or Ollama and peak RSS is measured per size.
+Stages:
+    scrape_cold, scrape_warm, scrape_revalidate: BeehiivScraper.process_multiple_urls
+        with an empty cache, a fresh cache and forced conditional revalidation
+    discover: Sitemap discovery diffed against the corpus store
+    clean, stylometry, index: ContentCleaner, compute_style_profile and VectorIndex
+    analyze_cold, analyze_cached: refresh_style_guide with an empty and a warm LLM cache
+    write: NewsletterAI.stream_newsletter
+Usage:
+    $ python -m benchmarks.run_benchmarks --sizes 10 100 1000 --output bench.json
+    Compare against the report of an earlier commit:
+    $ python -m benchmarks.run_benchmarks --sizes 100 --baseline bench_main.json"""
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.page_server import PageServer, SyntheticArchive
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import contextlib
+import subprocess
+import argparse
+import platform
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+import io
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('scrape_cold', 'scrape_warm', 'scrape_revalidate', 'discover', 'clean', 'stylometry',
+          'index', 'analyze_cold', 'analyze_cached', 'write')
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(samples: List[float], items: int) -> Dict:
+    """Latency percentiles over repeats plus items/second at the median."""
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {
+        'runs': len(samples),
+        'items': items,
+        'p50': round(float(p50), 4),
+        'p95': round(float(p95), 4),
+        'mean': round(float(np.mean(samples)), 4),
+        'throughput': round(items / p50, 2) if p50 > 0 else None,
+    }
+
+
+def timed(samples: List[float], fn: Callable):
+    start = time.perf_counter()
+    result = fn()
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def run_size(posts: int, config: Dict) -> Dict:
+    """Benchmark every stage for one archive size; runs in a fresh process."""
+    # Imported here so the parent process stays small and each size starts cold
+    from newsletter_ai import NewsletterAI, refresh_style_guide
+    from utils.archive_discovery import ArchiveDiscovery
+    from utils.beehiiv_scraper import BeehiivScraper
+    from utils.content_cleaner import ContentCleaner
+    from utils.corpus_store import publication_for
+    from utils.llm_cache import PersistentLLMCache
+    from utils.stylometry import compute_style_profile
+    from utils.vector_index import VectorIndex, HashingEmbedder
+
+    repeat = config['repeat']
+    samples = {stage: [] for stage in STAGES}
+    cache = {}
+    work_dir = tempfile.mkdtemp(prefix=f'bench-{posts}-')
+    log = io.StringIO()
+
+    def scraper_for(cache_dir: str) -> BeehiivScraper:
+        return BeehiivScraper(cache_dir=cache_dir, fetch_mode='http',
+                              concurrency=config['concurrency'],
+                              per_host_concurrency=config['per_host_concurrency'],
+                              http_requests_per_second=config['http_rps'])
+
+    def llm(llm_cache=None) -> FakeLLM:
+        return FakeLLM(first_token_latency=config['first_token_latency'],
+                       tokens_per_second=config['tokens_per_second'],
+                       response_tokens=config['response_tokens'],
+                       cache=llm_cache)
+
+    try:
+        with PageServer(SyntheticArchive(posts, config['paragraphs'])) as server, contextlib.redirect_stdout(log):
+            urls = server.urls()
+            publication = publication_for(server.base_url)
+
+            scraped = 0
+            for r in range(repeat):
+                cache_dir = os.path.join(work_dir, f'cache-{r}')
+                scraped = len(timed(samples['scrape_cold'], lambda: scraper_for(cache_dir).process_multiple_urls(urls)))
+
+            hits = revalidated = misses = 0
+            for _ in range(repeat):
+                scraper = scraper_for(cache_dir)
+                timed(samples['scrape_warm'], lambda: scraper.process_multiple_urls(urls))
+                timed(samples['scrape_revalidate'], lambda: scraper.process_multiple_urls(urls, revalidate=True))
+                hits += scraper.cache.stats.hits
+                revalidated += scraper.cache.stats.revalidated
+                misses += scraper.cache.stats.misses
+            cache['scrape'] = {'hits': hits, 'revalidated': revalidated, 'misses': misses,
+                               'not_modified_responses': server.not_modified, 'server_requests': server.requests}
+
+            store = scraper.store
+            for _ in range(repeat):
+                timed(samples['discover'], lambda: ArchiveDiscovery(server.base_url, store).pending_urls())
+
+            cleaner = ContentCleaner()
+            for _ in range(repeat):
+                store.save_cleaned((url, None, None, None) for url in urls)
+                newsletters = timed(samples['clean'], lambda: list(cleaner.iter_clean(store, publication)))
+            cache['clean'] = cleaner.stats.as_dict()
+
+            contents = [newsletter['content'] for newsletter in newsletters]
+            for _ in range(repeat):
+                timed(samples['stylometry'], lambda: compute_style_profile(contents))
+
+            for r in range(repeat):
+                index = VectorIndex(os.path.join(work_dir, f'index-{r}'), embed=HashingEmbedder())
+                timed(samples['index'], lambda: index.update(newsletters))
+
+            llm_calls = prompt_chars = 0
+            llm_stats = {'hits': 0, 'misses': 0}
+            for r in range(repeat):
+                llm_cache = PersistentLLMCache(os.path.join(work_dir, f'llm-{r}.db'))
+                artifact_path = os.path.join(work_dir, f'style_guide-{r}.json')
+                model = llm(llm_cache)
+                ai = NewsletterAI(llm_cache=llm_cache, llm=model)
+                style_guide = timed(samples['analyze_cold'],
+                                    lambda: refresh_style_guide(ai, newsletters, artifact_path=artifact_path))
+                llm_calls += model.calls
+                prompt_chars += model.prompt_chars
+
+                # Same prompts again with the artifact gone: every call should be a cache hit
+                os.remove(artifact_path)
+                llm_cache.stats.hits = llm_cache.stats.misses = 0
+                timed(samples['analyze_cached'],
+                      lambda: refresh_style_guide(ai, newsletters, artifact_path=artifact_path))
+                llm_stats['hits'] += llm_cache.stats.hits
+                llm_stats['misses'] += llm_cache.stats.misses
+            total = llm_stats['hits'] + llm_stats['misses']
+            cache['llm'] = {**llm_stats, 'hit_rate': round(llm_stats['hits'] / total, 4) if total else 0.0,
+                            'calls_per_cold_analysis': llm_calls / repeat,
+                            'prompt_chars_per_cold_analysis': prompt_chars / repeat}
+
+            ai = NewsletterAI(llm=llm())
+            generation = []
+            for r in range(repeat):
+                output_path = os.path.join(work_dir, f'generated-{r}.txt')
+                timed(samples['write'], lambda: ''.join(ai.stream_newsletter(style_guide, 'Margin expansion',
+                                                                             output_path=output_path)))
+                generation.append(ai.last_generation_metrics)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    items = {'scrape_cold': posts, 'scrape_warm': posts, 'scrape_revalidate': posts, 'discover': posts,
+             'clean': posts, 'stylometry': posts, 'index': posts, 'analyze_cold': posts,
+             'analyze_cached': posts, 'write': config['response_tokens']}
+    return {
+        'posts': posts,
+        'scraped': scraped,
+        'stages': {stage: summarize(samples[stage], items[stage]) for stage in STAGES},
+        'generation': {
+            'time_to_first_token_p50': round(float(np.median([m.time_to_first_token or 0.0 for m in generation])), 4),
+            'tokens_per_second_p50': round(float(np.median([m.tokens_per_second for m in generation])), 2),
+        },
+        'cache': cache,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """Render p50 changes per size and stage between two reports."""
+    previous = {run['posts']: run for run in baseline.get('runs', [])}
+    lines = []
+    for run in current['runs']:
+        before = previous.get(run['posts'])
+        if not before:
+            continue
+        for stage, stats in run['stages'].items():
+            old = before['stages'].get(stage, {}).get('p50')
+            if old:
+                lines.append(f"{run['posts']:>6} {stage:<18} {old:>9.4f}s -> {stats['p50']:>9.4f}s "
+                             f"({(stats['p50'] - old) / old:+.1%})")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmarks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help="Archive sizes (posts)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage for the percentiles")
+    parser.add_argument('--paragraphs', type=int, default=8, help="Paragraphs per synthetic post")
+    parser.add_argument('--concurrency', type=int, default=4, help="Scraper concurrency")
+    parser.add_argument('--per-host-concurrency', type=int, default=8,
+                        help="Scraper requests in flight per host (the whole archive is one host)")
+    parser.add_argument('--http-rps', type=float, default=1000.0, help="Scraper HTTP rate limit per host")
+    parser.add_argument('--first-token-latency', type=float, default=0.02, help="Fake LLM seconds to first token")
+    parser.add_argument('--tokens-per-second', type=float, default=2000.0, help="Fake LLM decode speed")
+    parser.add_argument('--response-tokens', type=int, default=120, help="Fake LLM tokens per response")
+    parser.add_argument('--output', default='bench_output.json', help="Where to write the JSON report")
+    parser.add_argument('--baseline', help="Earlier report to compare p50 latencies against")
+    args = parser.parse_args(argv)
+
+    config = {key: value for key, value in vars(args).items() if key not in ('sizes', 'output', 'baseline')}
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'runs': [],
+    }
+    for posts in sorted(args.sizes):
+        print(f"Benchmarking {posts} posts...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            run = pool.submit(run_size, posts, config).result()
+        report['runs'].append(run)
+        for stage, stats in run['stages'].items():
+            print(f"  {stage:<18} p50 {stats['p50']:.4f}s  p95 {stats['p95']:.4f}s  "
+                  f"{stats['throughput'] or 0:.1f} items/s")
+        print(f"  peak RSS {run['peak_rss_mb']} MiB, LLM cache hit rate {run['cache']['llm']['hit_rate']:.0%}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            print('\n'.join(compare(json.load(f), report)))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# config.py
+"""Model endpoint settings and memoized factories for the LLM clients.
+Building an OllamaLLM is not free: every instance opens its own pooled HTTP client
+(with a fresh TLS context), and importing langchain_ollama alone takes over a second.
+The factories here import it on first use, hand out one instance per configuration,
+and make every model on an endpoint share a single ollama.Client, so its connection
+pool is reused across agents, NewsletterAI instances and jobs.
+Functions:
+    ollama_client(base_url): The shared HTTP client for an Ollama endpoint
+    get_llm(...): Memoized OllamaLLM for a model and sampling configuration
+    get_crew_llm(...): Memoized crewai.LLM for the agents, served by the same Ollama endpoint
+    get_llm_cache(path): The PersistentLLMCache for a database file, shared by everything using it
+    get_embeddings(...): Memoized OllamaEmbeddings for an embedding model
+Environment:
+    NEWSLETTER_LLM_PROVIDER: 'ollama' (default), or 'fake' for the offline FakeLLM of the
+        benchmarks; read on the first get_llm/get_crew_llm call for a configuration
+    OLLAMA_BASE_URL: Ollama endpoint (default http://localhost:11434)
+    NEWSLETTER_LLM_MODEL: Generation model (default llama3.2)
+    NEWSLETTER_EMBEDDING_MODEL: Embedding model (default nomic-embed-text)"""
+import functools
+import os
+
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+LLM_MODEL = os.environ.get('NEWSLETTER_LLM_MODEL', 'llama3.2')
+EMBEDDING_MODEL = os.environ.get('NEWSLETTER_EMBEDDING_MODEL', 'nomic-embed-text')
+
+
+@functools.lru_cache(maxsize=None)
+def ollama_client(base_url: str = OLLAMA_BASE_URL):
+    """One synchronous ollama.Client (and so one httpx connection pool) per endpoint."""
+    from ollama import Client
+    return Client(host=base_url)
+
+
+@functools.lru_cache(maxsize=32)
+def get_llm(model: str = LLM_MODEL, base_url: str = OLLAMA_BASE_URL, temperature: float = 0.7,
+            top_k=None, cache=None):
+    """Return the OllamaLLM for this configuration, creating it on first use.
+
+    Instances are shared, so treat them as read-only; bind per-use settings with
+    ``.bind``/``.with_config`` instead of mutating attributes.
+
+    Args:
+        model (str): Ollama model name.
+        base_url (str): Ollama endpoint.
+        temperature (float): Sampling temperature.
+        top_k (int, optional): Top-k sampling; 1 with temperature 0 is greedy decoding.
+        cache (BaseCache, optional): LangChain response cache, e.g. from get_llm_cache.
+    Returns:
+        KeyedOllamaLLM: The memoized model (a FakeLLM with NEWSLETTER_LLM_PROVIDER=fake).
+    """
+    if os.environ.get('NEWSLETTER_LLM_PROVIDER', 'ollama') == 'fake':
+        from benchmarks.fake_llm import FakeLLM
+        return FakeLLM(cache=cache)
+    from utils.ollama_llm import KeyedOllamaLLM
+    llm = KeyedOllamaLLM(model=model, base_url=base_url, temperature=temperature, top_k=top_k, cache=cache)
+    # Synchronous calls go through the endpoint's shared client; the async client stays
+    # per instance because httpx async pools are bound to the event loop that uses them
+    llm._client = ollama_client(base_url)
+    return llm
+
+
+def get_llm_cache(path: str):
+    """Return the PersistentLLMCache stored at ``path``, opening it on first use.
+
+    The LLM factories are memoized on their ``cache`` argument, so every run must
+    pass the same cache object for a file to get the same model back instead of
+    building (and keeping) one per run.
+    """
+    return _llm_cache_at(os.path.abspath(path))
+
+
+@functools.lru_cache(maxsize=None)
+def _llm_cache_at(path: str):
+    from utils.llm_cache import PersistentLLMCache
+    return PersistentLLMCache(path)
+
+
+@functools.lru_cache(maxsize=32)
+def get_crew_llm(model: str = LLM_MODEL, base_url: str = OLLAMA_BASE_URL, temperature: float = 0.7, cache=None):
+    """Return the crewai.LLM the agents run on, creating it on first use.
+
+    CrewAI calls models through LiteLLM and rebuilds any other LLM object it is given
+    from a few guessed attributes (an OllamaLLM loses its model name that way), so
+    agents get a ``crewai.LLM`` for the ``ollama/`` provider instead of get_llm's client.
+
+    Args:
+        model (str): Ollama model name.
+        base_url (str): Ollama endpoint.
+        temperature (float): Sampling temperature.
+        cache (PersistentLLMCache, optional): Response cache, e.g. from get_llm_cache.
+    Returns:
+        CachedCrewLLM: The memoized model (a FakeCrewLLM with NEWSLETTER_LLM_PROVIDER=fake).
+    """
+    if os.environ.get('NEWSLETTER_LLM_PROVIDER', 'ollama') == 'fake':
+        from benchmarks.fake_crew_llm import FakeCrewLLM
+        return FakeCrewLLM(cache=cache)
+    from utils.crew_llm import CachedCrewLLM
+    return CachedCrewLLM(model=f"ollama/{model}", base_url=base_url, temperature=temperature, cache=cache)
+
+
+@functools.lru_cache(maxsize=8)
+def get_embeddings(model: str = EMBEDDING_MODEL, base_url: str = OLLAMA_BASE_URL):
+    """Return the OllamaEmbeddings for ``model``, sharing the endpoint's client."""
+    from langchain_ollama import OllamaEmbeddings
+    embeddings = OllamaEmbeddings(model=model, base_url=base_url)
+    embeddings._client = ollama_client(base_url)
+    return embeddings
@@ -0,0 +1,140 @@
+# crew.py
+"""Runs the newsletter workflow as a crew of agents: ResearchAgent and WriterAgent executing
+NewsletterTasks as a dependency graph.
+The style guide task sees the corpus as its measured StyleProfile plus a few representative
+excerpts, and then one writing task per topic and draft runs concurrently. Every finished task output is cached
+(newsletter_cache/crew_cache.db), so re-running after a failed writing step re-uses the
+analysis instead of repeating it. Per-task timing is printed and saved to crew_report.json.
+Functions:
+    load_corpus(publication_url): Scrapes new posts and returns the cleaned corpus
+    build_graph(newsletters, topics): Builds the TaskGraph of the style guide and writing tasks
+    run_crew(): Runs the whole workflow and writes the drafts
+Usage:
+    $ python crew.py --topic "Rate cuts" --drafts 3 --workers 4
+    $ python crew.py --topics-file topics.txt
+    Offline, with the benchmark FakeLLM (as a FakeCrewLLM) instead of Ollama:
+    $ python crew.py --fake-llm --publication-url http://127.0.0.1:8000
+Output Files:
+    - <output_dir>/style_guide.txt: The merged style guide
+    - <output_dir>/<task>.txt: One file per draft
+    - <output_dir>/crew_report.json: Status and timing of every task"""
+from agents.research_agent import ResearchAgent
+from agents.writer_agent import WriterAgent
+from tasks.tasks import NewsletterTasks
+from newsletter_ai import PUBLICATION_URL, DEFAULT_TOPIC, format_newsletter
+from utils.beehiiv_scraper import BeehiivScraper
+from utils.archive_discovery import ArchiveDiscovery
+from utils.content_cleaner import ContentCleaner
+from utils.corpus_store import publication_for
+from utils.stylometry import compute_style_profile, representative_excerpts
+from utils.batch_writer import load_topics, slugify
+from utils.task_graph import TaskGraph, TaskOutputCache
+from utils.tracing import tracer
+from config import get_llm_cache
+from typing import Dict, List
+import argparse
+import json
+import time
+import os
+
+
+def load_corpus(publication_url: str = PUBLICATION_URL, cache_dir: str = 'newsletter_cache') -> List[Dict]:
+    """Scrape posts the corpus store does not have yet and return the publication's cleaned corpus."""
+    scraper = BeehiivScraper(cache_dir=cache_dir, verbose=False)
+    with scraper.store:
+        with tracer.span('stage.scrape'):
+            new_urls, changed_urls = ArchiveDiscovery(publication_url, scraper.store).pending_urls()
+            print(f"{len(new_urls)} new and {len(changed_urls)} changed newsletters to scrape")
+            if new_urls:
+                scraper.process_multiple_urls(new_urls)
+            if changed_urls:
+                scraper.process_multiple_urls(changed_urls, revalidate=True)
+        with tracer.span('stage.clean'):
+            return list(ContentCleaner().iter_clean(scraper.store, publication_for(publication_url)))
+
+
+def build_graph(newsletters: List[Dict], topics: List[str], drafts: int = 1, excerpt_tokens: int = 1500,
+                cache: TaskOutputCache = None, max_workers: int = 4, llm_cache=None) -> TaskGraph:
+    """Builds the style guide task and the writing fan-out that depends on it.
+
+    Args:
+        newsletters (list): Cleaned newsletter records.
+        topics (list): Topics to write about.
+        drafts (int): Drafts per topic.
+        excerpt_tokens (int): Estimated token budget for the excerpts in the style guide task.
+        cache (TaskOutputCache, optional): Cache of finished task outputs.
+        max_workers (int): Concurrent tasks.
+        llm_cache (PersistentLLMCache, optional): Response cache for the agents' model calls.
+    Returns:
+        TaskGraph: Tasks 'style_guide' and 'write_NN_<topic>[_draftN]'.
+    """
+    researcher, writer = ResearchAgent.create(cache=llm_cache), WriterAgent.create(cache=llm_cache)
+    excerpts = representative_excerpts([format_newsletter(newsletter) for newsletter in newsletters],
+                                       max_tokens=excerpt_tokens)
+    style_stats = compute_style_profile([newsletter['content'] for newsletter in newsletters]).to_prompt()
+    graph = TaskGraph(cache=cache, max_workers=max_workers)
+
+    # Agents keep per-execution state (their executor), so each concurrent task gets its own
+    # copy of the memoized agent; the copies share its LLM client
+    graph.add('style_guide', lambda outputs: NewsletterTasks.analyze_style(
+        researcher.copy(), '\n\n-------------------\n\n'.join(excerpts), style_stats=style_stats))
+
+    for i, topic in enumerate(topics, 1):
+        for draft in range(1, drafts + 1):
+            name = f"write_{i:02d}_{slugify(topic)}" + (f"_draft{draft}" if drafts > 1 else '')
+            graph.add(name, lambda outputs, topic=topic: NewsletterTasks.write_newsletter(
+                writer.copy(), outputs['style_guide'], topic), depends_on=['style_guide'])
+    return graph
+
+
+def run_crew(topics: List[str], drafts: int = 1, max_workers: int = 4, publication_url: str = PUBLICATION_URL,
+             cache_dir: str = 'newsletter_cache', output_dir: str = 'crew_output') -> Dict:
+    """Runs the crew and writes the style guide, drafts and crew_report.json to ``output_dir``.
+
+    Returns:
+        Dict: The report, as saved to crew_report.json.
+    """
+    newsletters = load_corpus(publication_url, cache_dir)
+    if not newsletters:
+        raise Exception("No newsletters were successfully scraped!")
+    graph = build_graph(newsletters, topics, drafts=drafts, max_workers=max_workers,
+                        cache=TaskOutputCache(os.path.join(cache_dir, 'crew_cache.db')),
+                        llm_cache=get_llm_cache(os.path.join(cache_dir, 'llm_cache.db')))
+
+    print(f"\nRunning crew on {len(newsletters)} newsletters with {max_workers} workers...")
+    start = time.perf_counter()
+    with tracer.span('stage.crew'):
+        results = graph.run()
+    report = TaskGraph.report(results, time.perf_counter() - start)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, result in results.items():
+        if result.output is not None and (name == 'style_guide' or name.startswith('write_')):
+            with open(os.path.join(output_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+                f.write(result.output)
+    with open(os.path.join(output_dir, 'crew_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'task':<40} {'status':<8} {'start s':>8} {'time s':>8}")
+    for result in report['results']:
+        print(f"{result['name']:<40} {result['status']:<8} {result['started']:>8.2f} {result['seconds']:>8.2f}")
+    print(f"Wall time {report['wall_time']:.2f}s for {report['task_time']:.2f}s of task time "
+          f"({report['cached']} cached, {report['failed']} failed, {report['skipped']} skipped)")
+    print(f"Report saved to {os.path.join(output_dir, 'crew_report.json')}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze and write newsletters with a crew of agents.")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC, help="Topic to write about")
+    parser.add_argument("--topics-file", help="File with one topic per line")
+    parser.add_argument("--drafts", type=int, default=1, help="Drafts per topic")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent tasks")
+    parser.add_argument("--publication-url", default=PUBLICATION_URL, help="Beehiiv publication to analyze")
+    parser.add_argument("--output-dir", default="crew_output", help="Where drafts and the report are written")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the offline benchmark FakeLLM instead of Ollama")
+    args = parser.parse_args()
+    if args.fake_llm:
+        os.environ['NEWSLETTER_LLM_PROVIDER'] = 'fake'
+    run_crew(load_topics(args.topics_file) if args.topics_file else [args.topic], drafts=args.drafts,
+             max_workers=args.workers, publication_url=args.publication_url, output_dir=args.output_dir)
@@ -0,0 +1,213 @@
+# job_runner.py
+"""Runs the newsletter pipeline for many Beehiiv publications (tenants) from a persistent job queue.
+Every tenant gets an isolated workspace under ``--root`` holding its own corpus database,
+scrape and LLM caches, passage index, style guide and generated articles, so publications
+never share cached state. Jobs live in a SQLite JobQueue and are worked on by a pool of
+threads that claim them fairly across tenants (round-robin, at most ``--per-tenant`` running
+jobs each) while all LLM and embedding requests share ``--llm-slots`` slots on the Ollama
+endpoint. Jobs hold a lease that the runner keeps renewing; if the runner crashes, the lease
+expires and the next start re-queues the job, which resumes cheaply because scraping, style
+analysis and LLM responses are all served from the tenant's caches.
+Classes:
+    JobRunner: Worker pool executing queued jobs
+Usage:
+    Queue jobs, one per tenant publication and topic (or topics file):
+    $ python job_runner.py submit --tenant lootbag --url https://lootbag.beehiiv.com --topic "Rate cuts"
+    Work through the queue with 4 workers and 2 concurrent Ollama requests:
+    $ python job_runner.py run --workers 4 --llm-slots 2 --until-idle
+    Show job status:
+    $ python job_runner.py status
+Output Files:
+    - <root>/jobs.db: The job queue
+    - <root>/<tenant>/newsletter_cache/: The tenant's corpus database, LLM cache and passage index
+    - <root>/<tenant>/style_guide.txt, style_guide.json: The tenant's style guide
+    - <root>/<tenant>/jobs/<id>/: newsletter.txt, or one file per topic plus batch_report.json"""
+from newsletter_ai import main as run_pipeline, DEFAULT_TOPIC
+from utils.job_queue import Job, JobQueue, validate_tenant
+from utils.tracing import tracer
+from typing import Callable, Dict, Optional, Set
+import threading
+import argparse
+import time
+import os
+
+
+class JobRunner:
+    """Executes queued jobs on a pool of worker threads.
+
+    Attributes:
+        queue (JobQueue): Where jobs are claimed from.
+        root (str): Parent directory of the tenant workspaces.
+        workers (int): Jobs executed concurrently.
+        max_per_tenant (int): Running jobs allowed per tenant. Jobs of one tenant share
+            its workspace, so the default of 1 also keeps them from racing on its files.
+        llm_gate (threading.BoundedSemaphore): Concurrent requests allowed on the shared
+            model endpoint, across all jobs of this runner.
+        lease_seconds (float): How long a claimed job stays leased without a heartbeat.
+        poll_interval (float): Seconds an idle worker waits before looking again.
+        llm_factory (Callable, optional): Returns a fresh uncached LangChain LLM per job
+            instead of Ollama, e.g. the FakeLLM of the benchmarks.
+    Example:
+        >>> queue = JobQueue('tenants/jobs.db')
+        >>> queue.submit('lootbag', 'https://lootbag.beehiiv.com', topic='Rate cuts')
+        >>> JobRunner(queue, root='tenants', workers=4, llm_concurrency=2).run(until_idle=True)
+    """
+    def __init__(self, queue: JobQueue, root: str = 'tenants', workers: int = 4, max_per_tenant: int = 1,
+                 llm_concurrency: int = 2, lease_seconds: float = 120.0, poll_interval: float = 1.0,
+                 llm_factory: Optional[Callable] = None):
+        self.queue = queue
+        self.root = root
+        self.workers = max(1, workers)
+        self.max_per_tenant = max_per_tenant
+        self.llm_gate = threading.BoundedSemaphore(max(1, llm_concurrency))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.llm_factory = llm_factory
+        self._running: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def workspace(self, tenant: str) -> str:
+        """The tenant's private directory for caches and outputs."""
+        return os.path.join(self.root, validate_tenant(tenant))
+
+    def execute(self, job: Job) -> Dict:
+        """Run the pipeline for one job in its tenant's workspace. Returns the output paths."""
+        work_dir = self.workspace(job.tenant)
+        job_dir = os.path.join(work_dir, 'jobs', str(job.id))
+        os.makedirs(job_dir, exist_ok=True)
+        output_path = os.path.join(job_dir, 'newsletter.txt')
+        run_pipeline(
+            topic=job.topic or DEFAULT_TOPIC,
+            topics_file=job.topics_file,
+            output_dir=job_dir,
+            publication_url=job.publication_url,
+            work_dir=work_dir,
+            output_path=output_path,
+            llm=self.llm_factory() if self.llm_factory else None,
+            llm_gate=self.llm_gate,
+            on_stage=lambda stage: self.queue.set_stage(job.id, stage)
+        )
+        return {
+            'style_guide': os.path.join(work_dir, 'style_guide.txt'),
+            **({'output_dir': job_dir} if job.topics_file else {'output_path': output_path}),
+        }
+
+    def _work(self, worker: str, until_idle: bool):
+        while not self._stopped.is_set():
+            job = self.queue.claim(worker, max_per_tenant=self.max_per_tenant, lease_seconds=self.lease_seconds)
+            if job is None:
+                if until_idle and not self.queue.counts()['queued']:
+                    return
+                self._stopped.wait(self.poll_interval)
+                continue
+            with self._lock:
+                self._running.add(job.id)
+            print(f"[{worker}] job {job.id} ({job.tenant}) started, attempt {job.attempts}/{job.max_attempts}")
+            try:
+                with tracer.span('job', job_id=job.id, tenant=job.tenant, attempt=job.attempts):
+                    result = self.execute(job)
+            except Exception as e:
+                status = self.queue.fail(job.id, str(e))
+                print(f"[{worker}] job {job.id} ({job.tenant}) failed: {str(e)} ({status})")
+            else:
+                self.queue.complete(job.id, result)
+                print(f"[{worker}] job {job.id} ({job.tenant}) done")
+            finally:
+                with self._lock:
+                    self._running.discard(job.id)
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            with self._lock:
+                running = list(self._running)
+            self.queue.heartbeat(running, self.lease_seconds)
+
+    def run(self, until_idle: bool = False, recover_all: bool = False) -> Dict[str, int]:
+        """Work on the queue until ``stop`` is called, or until it is empty with ``until_idle``.
+
+        Args:
+            until_idle (bool): Return once no queued jobs remain.
+            recover_all (bool): Re-queue every job left running, without waiting for its lease
+                to expire; only safe when no other runner uses the queue.
+        Returns:
+            Dict[str, int]: Number of jobs per status afterwards.
+        """
+        recovered = self.queue.recover(all_running=recover_all)
+        if recovered:
+            print(f"Resuming {recovered} interrupted jobs")
+        self._stopped.clear()
+        heartbeat = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._work, args=(f"worker-{os.getpid()}-{i}", until_idle),
+                                    name=f"job-worker-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("Stopping after the running jobs finish (interrupt again to abort; they resume on restart)")
+            self.stop()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stopped.set()
+        return self.queue.counts()
+
+    def stop(self):
+        """Let workers finish their current job, then exit."""
+        self._stopped.set()
+
+
+def print_status(queue: JobQueue, tenant: Optional[str] = None):
+    for job in queue.jobs(tenant=tenant):
+        detail = job.error if job.status in ('queued', 'failed') and job.error else (job.stage or '')
+        print(f"{job.id:>5}  {job.tenant:<20} {job.status:<8} {job.attempts}/{job.max_attempts}  "
+              f"{job.topic or os.path.basename(job.topics_file or '')}  {detail}")
+    print(', '.join(f"{count} {status}" for status, count in queue.counts().items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the newsletter pipeline for many publications.")
+    parser.add_argument("--root", default="tenants", help="Directory holding the queue and tenant workspaces")
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="Queue a job")
+    submit.add_argument("--tenant", required=True, help="Tenant id (lowercase slug)")
+    submit.add_argument("--url", required=True, help="Beehiiv publication URL")
+    submit.add_argument("--topic", help="Topic for a single newsletter")
+    submit.add_argument("--topics-file", help="File with one topic per line")
+    submit.add_argument("--max-attempts", type=int, default=3, help="Attempts before the job fails")
+    run = commands.add_parser("run", help="Work through the queue")
+    run.add_argument("--workers", type=int, default=4, help="Jobs executed concurrently")
+    run.add_argument("--per-tenant", type=int, default=1, help="Running jobs allowed per tenant")
+    run.add_argument("--llm-slots", type=int, default=2, help="Concurrent requests on the Ollama endpoint")
+    run.add_argument("--until-idle", action="store_true", help="Exit once the queue is empty")
+    run.add_argument("--recover-all", action="store_true",
+                     help="Re-queue all running jobs at start (no other runner may be active)")
+    run.add_argument("--trace", help="Write JSON-lines spans, counters and histograms to this file")
+    status = commands.add_parser("status", help="List jobs")
+    status.add_argument("--tenant", help="Only this tenant's jobs")
+    args = parser.parse_args()
+
+    queue = JobQueue(os.path.join(args.root, 'jobs.db'))
+    if args.command == "submit":
+        job_id = queue.submit(args.tenant, args.url, topic=args.topic, topics_file=args.topics_file,
+                              max_attempts=args.max_attempts)
+        print(f"Queued job {job_id} for {args.tenant}")
+    elif args.command == "run":
+        if args.trace:
+            tracer.configure(args.trace)
+        runner = JobRunner(queue, root=args.root, workers=args.workers, max_per_tenant=args.per_tenant,
+                           llm_concurrency=args.llm_slots)
+        started = time.perf_counter()
+        counts = runner.run(until_idle=args.until_idle, recover_all=args.recover_all)
+        print(f"\nFinished in {time.perf_counter() - started:.1f}s: "
+              + ', '.join(f"{count} {status}" for status, count in counts.items()))
+        if args.trace:
+            print(f"\n{tracer.report()}")
+            tracer.close()
+    else:
+        print_status(queue, tenant=args.tenant)
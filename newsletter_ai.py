@@ -6,17 +6,27 @@ language processing, and AI text generation.
 Classes:
     NewsletterAI: Handles AI analysis and generation of newsletters
 Functions:
-    load_newsletter_urls(): Returns list of Beehiiv newsletter URLs to analyze
+    format_newsletter(newsletter): Formats one newsletter record for a prompt
+    refresh_style_guide(newsletter_ai, newsletters): Skips, updates or rebuilds the style guide
+    build_retriever(newsletters): Updates the passage index and returns a retrieval function
+    load_newsletter_urls(): Returns the fallback list of Beehiiv newsletter URLs
     main(): Orchestrates the newsletter analysis and generation workflow
 Usage:
     Run the script directly to analyze newsletters and generate a new one:
     $ python newsletter_ai.py
+    Or generate a batch of articles, one per line of a topics file:
+    $ python newsletter_ai.py --topics-file topics.txt --workers 3
+    Or write several drafts of one topic and keep the one closest to the corpus:
+    $ python newsletter_ai.py --topic "Rate cuts" --drafts 4
+    Record per-stage spans (JSON lines) and/or a cProfile of the run:
+    $ python newsletter_ai.py --trace trace.jsonl --profile run.prof
     - langchain
     - ollama
     - Custom BeehiivScraper utility
     - Local Ollama instance running on port 11434
 Output Files:
     - style_guide.txt: Analysis of writing style from source newsletters
+    - style_guide.json: Versioned style guide artifact with the corpus fingerprint it was built from
     - generated_newsletter.txt: The newly generated newsletter content
     >>> python newsletter_ai.py
     Starting newsletter scraping process...
@@ -24,12 +34,146 @@ Output Files:
     Style guide saved to style_guide.txt
     Writing new newsletter...
     New newsletter saved to generated_newsletter.txt"""
-from langchain_ollama import OllamaLLM
-from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnableSequence
-from langchain.chains import LLMChain
+from langchain_core.prompts import PromptTemplate
+from langchain_core.outputs import Generation
+from config import get_llm, get_llm_cache, get_embeddings
 from utils.beehiiv_scraper import BeehiivScraper
+from utils.corpus_store import publication_for
+from utils.archive_discovery import ArchiveDiscovery
+from utils.chunking import chunk_texts
+from utils.content_cleaner import ContentCleaner
+from utils.llm_cache import llm_string_for
+from utils.generation_metrics import StreamTimer
+from utils.batch_writer import BatchWriter, load_topics
+from utils.stylometry import compute_style_profile, representative_excerpts, stats_block
+from utils.tracing import tracer, profiling, LLMTracingHandler
+from utils.pipeline import ScrapeStream, StreamingStyleAnalyzer
+from utils.vector_index import VectorIndex, format_passages
+from utils.style_guide_store import StyleGuideArtifact, RebuildPolicy, corpus_fingerprint
+from utils.draft_scorer import CorpusModel, DraftScorer
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import contextlib
+import itertools
+import argparse
 import json
+import os
+
+STYLE_FOCUS = """
+            1. Writing tone and voice
+            2. Common phrases and expressions
+            3. Typical article structure
+            4. How complex financial concepts are explained
+            5. Use of examples and metaphors
+            6. Paragraph length and formatting patterns
+            7. Transition styles between sections
+            8. Types of hooks and conclusions used"""
+
+STYLE_NOTES_PROMPT = PromptTemplate(
+    input_variables=["newsletters"],
+    template="""
+            Analyze the following newsletter excerpts and write concise style notes.
+            
+            Newsletters:
+            {newsletters}
+            
+            Note concrete observations and short quoted examples for:""" + STYLE_FOCUS + """
+            
+            Be brief; these notes will be merged with notes from other excerpts.
+            """
+)
+
+STYLE_MERGE_PROMPT = PromptTemplate(
+    input_variables=["notes", "style_stats"],
+    template="""
+            Merge the following style notes, each taken from a different set of newsletters
+            by the same author, into one comprehensive style guide.
+            
+            Style notes:
+            {notes}
+            {style_stats}
+            Keep patterns that recur across notes, resolve contradictions, and cover:""" + STYLE_FOCUS + """
+            
+            Provide a detailed style guide that captures all these elements.
+            """
+)
+
+WRITING_PROMPT = PromptTemplate(
+    input_variables=["style_guide", "topic"],
+    template="""
+            Write a financial newsletter following this style guide:
+            
+            {style_guide}
+            
+            Topic to cover: {topic}
+            
+            Requirements:
+            1. Match the established tone and voice perfectly
+            2. Follow the same structural patterns
+            3. Explain concepts using similar approaches
+            4. Maintain consistent paragraph length and formatting
+            5. Use similar transition styles
+            6. Create hooks and conclusions in the same style
+            
+            The final output should be indistinguishable from the original author's writing.
+            """
+)
+
+WRITING_WITH_REFERENCES_PROMPT = PromptTemplate(
+    input_variables=["style_guide", "topic", "references"],
+    template="""
+            Write a financial newsletter following this style guide:
+            
+            {style_guide}
+            
+            Topic to cover: {topic}
+            
+            Relevant passages from the author's past newsletters, for voice and context:
+            
+            {references}
+            
+            Requirements:
+            1. Match the established tone and voice perfectly
+            2. Follow the same structural patterns
+            3. Explain concepts using similar approaches
+            4. Maintain consistent paragraph length and formatting
+            5. Use similar transition styles
+            6. Create hooks and conclusions in the same style
+            
+            Do not copy the passages; use them only as a reference for voice and context.
+            The final output should be indistinguishable from the original author's writing.
+            """
+)
+
+STYLE_UPDATE_PROMPT = PromptTemplate(
+    input_variables=["style_guide", "newsletters", "style_stats"],
+    template="""
+            Here is an existing style guide for a financial newsletter author:
+            
+            {style_guide}
+            
+            The author has published the following new material since it was written:
+            
+            {newsletters}
+            {style_stats}
+            Update the style guide so it also reflects the new material. Keep everything
+            that still holds, refine points the new material sharpens, and add any new
+            recurring patterns, covering:""" + STYLE_FOCUS + """
+            
+            Return the complete updated style guide.
+            """
+)
+
+# Added to the topic of every draft after the first, so best-of-N drafts differ even
+# when responses are cached or decoding is greedy
+DRAFT_ANGLES = (
+    "Open with a concrete number or data point.",
+    "Open with a short anecdote or scenario.",
+    "Open with a question to the reader.",
+    "Start from the contrarian view before making your own case.",
+    "Frame it around what it means for the reader's portfolio.",
+)
 
 class NewsletterAI:
     """A class that uses AI to analyze and generate financial newsletters.
@@ -37,31 +181,86 @@ class NewsletterAI:
     and generate new ones that match the identified style patterns.
     Attributes:
         llm (Ollama): The language model instance configured with specific parameters.
+        llm_cache (PersistentLLMCache): Optional response cache underneath ``llm``.
+        last_generation_metrics (GenerationMetrics): Timing of the last streamed generation.
     Methods:
         analyze_style(newsletters): Analyzes writing style of given newsletters and creates a style guide.
+        analyze_style_map_reduce(newsletters): Same, over token-bounded chunks analyzed in parallel.
+        style_notes(chunk) / merge_style_notes(notes): The map and reduce steps on their own.
+        update_style_guide(style_guide, newsletters): Folds new newsletters into an existing guide.
         write_newsletter(style_guide, topic): Generates a new newsletter following a given style guide.
+        stream_newsletter(style_guide, topic): Same, yielding chunks as they are generated.
+        write_drafts(style_guide, topic, n): Generates ``n`` differently angled drafts concurrently.
+        write_best_of(style_guide, topic, scorer, n): Same, returning the draft closest to the corpus.
     Example:
         >>> ai = NewsletterAI()
         >>> style_guide = ai.analyze_style(existing_newsletters)
         >>> new_newsletter = ai.write_newsletter(style_guide, "Market Trends 2024")
     """
-    def __init__(self):
-        self.llm = OllamaLLM(
-            model="llama3.2",
-            temperature=0.7,
-            base_url="http://localhost:11434"
+    def __init__(self, llm_cache=None, deterministic=False, llm=None, llm_gate=None):
+        """Initializes the Ollama-backed model.
+
+        Args:
+            llm_cache (PersistentLLMCache, optional): Disk-backed response cache; when set,
+                identical prompts with identical model parameters are served from disk.
+            deterministic (bool): Use greedy decoding (temperature 0, top_k 1) so cached
+                responses are an exact replay of what the model would produce.
+            llm (BaseLLM, optional): Use this LangChain LLM instead of Ollama, e.g. the
+                FakeLLM of the offline benchmarks. Without ``llm_gate``, ``llm_cache`` is set
+                on it in place unless it already uses that cache.
+            llm_gate (threading.Semaphore, optional): Slots on the model endpoint shared with
+                other NewsletterAI instances (see GatedLLM). ``llm_cache`` then sits in front
+                of the gate, so pass ``llm`` without a cache of its own.
+        Raises:
+            ValueError: If ``llm`` already has a different cache than ``llm_cache``.
+        """
+        # Shared per configuration (see config.get_llm), so it is only built once per process
+        self.llm = llm or get_llm(
+            temperature=0 if deterministic else 0.7,
+            top_k=1 if deterministic else None,
+            cache=None if llm_gate else llm_cache
         )
+        if llm_gate:
+            from utils.llm_gate import GatedLLM
+            self.llm = GatedLLM(llm=self.llm, gate=llm_gate, cache=llm_cache)
+        elif llm_cache is not None and self.llm.cache is not llm_cache:
+            if self.llm.cache not in (None, False):
+                raise ValueError("llm already has its own cache; pass llm_cache to it or leave llm_cache unset")
+            self.llm.cache = llm_cache
+        # Records an llm.call span per request that reaches the model when tracing is on;
+        # the model may be shared, so attach the handler only once
+        if not any(isinstance(handler, LLMTracingHandler) for handler in self.llm.callbacks or []):
+            self.llm.callbacks = [*(self.llm.callbacks or []), LLMTracingHandler()]
+        self.llm_cache = llm_cache
+        self.last_generation_metrics = None
         
-    def analyze_style(self, newsletters):
-        """Analyzes newsletters to create a comprehensive style guide."""
+    def analyze_style(self, newsletters, style_stats=None, excerpt_tokens=1500):
+        """Analyzes newsletters to create a comprehensive style guide.
+
+        ``style_stats`` is an optional StyleProfile.to_prompt() block measured over
+        the whole corpus. With it, the prompt carries those statistics and only
+        representative_excerpts of ``newsletters`` within ``excerpt_tokens``, not
+        their full text; without it, every newsletter is sent.
+
+        Args:
+            newsletters (list or str): Formatted newsletters (see format_newsletter).
+            style_stats (str, optional): Measured statistics for the whole corpus.
+            excerpt_tokens (int): Estimated token budget for the excerpts.
+        Returns:
+            str: The style guide.
+        """
+        if isinstance(newsletters, str):
+            newsletters = [newsletters]
+        if style_stats:
+            newsletters = representative_excerpts(newsletters, max_tokens=excerpt_tokens)
         style_analysis_prompt = PromptTemplate(
-            input_variables=["newsletters"],
+            input_variables=["newsletters", "style_stats"],
             template="""
             Analyze the following newsletters and create a comprehensive style guide.
             
             Newsletters:
             {newsletters}
-            
+            {style_stats}
             Focus on identifying:
             1. Writing tone and voice
             2. Common phrases and expressions
@@ -80,41 +279,328 @@ class NewsletterAI:
         chain = style_analysis_prompt | self.llm
         
         # Use invoke instead of run
-        return chain.invoke({"newsletters": newsletters})
+        with tracer.span('analyze.single'):
+            return chain.invoke({"newsletters": "\n\n-------------------\n\n".join(newsletters),
+                                 "style_stats": stats_block(style_stats)})
+
+    def analyze_style_map_reduce(self, newsletters, max_chunk_tokens=3000, max_workers=4, merge_fan_in=4,
+                                 style_stats=None):
+        """Analyzes a corpus too large for one prompt using a map-reduce over chunks.
+
+        Each token-bounded chunk is analyzed in parallel (map), then the partial style
+        notes are merged in groups of ``merge_fan_in`` until a single style guide
+        remains (reduce). Wall time scales with the number of chunks divided by
+        ``max_workers`` rather than with the corpus size.
+
+        Args:
+            newsletters (list): Formatted newsletters (see format_newsletter).
+            max_chunk_tokens (int): Estimated token budget per map chunk.
+            max_workers (int): Maximum concurrent LLM calls.
+            merge_fan_in (int): Number of partial notes merged per reduce call.
+            style_stats (str, optional): Measured statistics added to the final merge prompt.
+        Returns:
+            str: The final style guide.
+        """
+        chunks = chunk_texts(newsletters, max_tokens=max_chunk_tokens)
+        if not chunks:
+            raise ValueError("No newsletters to analyze")
+        if len(chunks) == 1:
+            return self.analyze_style(chunks[0], style_stats=style_stats)
+
+        map_chain = STYLE_NOTES_PROMPT | self.llm
+        with tracer.span('analyze.map', chunks=len(chunks)):
+            notes = self._invoke_all(map_chain, [{"newsletters": chunk} for chunk in chunks], max_workers)
+        return self.merge_style_notes(notes, max_workers=max_workers, merge_fan_in=merge_fan_in,
+                                      style_stats=style_stats)
+
+    @staticmethod
+    def _invoke_all(chain, inputs, max_workers):
+        """Invoke ``chain`` once per input with up to ``max_workers`` requests in flight.
+
+        ``chain.batch`` is not used: BaseLLM.batch turns each ``max_concurrency`` group
+        into one ``generate`` call, which OllamaLLM serves one prompt at a time.
+        """
+        if len(inputs) == 1:
+            return [chain.invoke(inputs[0])]
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, chain.invoke, item) for item in inputs]
+            return [future.result() for future in futures]
+
+    def style_notes(self, chunk):
+        """Map step of the style analysis: style notes for one chunk of newsletters."""
+        return (STYLE_NOTES_PROMPT | self.llm).invoke({"newsletters": chunk})
+
+    def merge_style_notes(self, notes, max_workers=4, merge_fan_in=4, style_stats=None):
+        """Reduce step of the style analysis: merge style notes into one style guide.
+
+        Notes are merged in groups of ``merge_fan_in`` per call, in parallel, until one
+        remains. There is always at least one merge, so a single note still comes
+        back as a full style guide. ``style_stats`` only go into the final merge.
+        """
+        merge_chain = STYLE_MERGE_PROMPT | self.llm
+        fan_in = max(2, merge_fan_in)
+        while True:
+            groups = [notes[i:i + fan_in] for i in range(0, len(notes), fan_in)]
+            stats = stats_block(style_stats) if len(groups) == 1 else ""
+            with tracer.span('analyze.reduce', notes=len(notes), groups=len(groups)):
+                notes = self._invoke_all(
+                    merge_chain,
+                    [{"notes": "\n\n-------------------\n\n".join(group), "style_stats": stats} for group in groups],
+                    max_workers
+                )
+            if len(notes) == 1:
+                return notes[0]
+
+    def update_style_guide(self, style_guide, newsletters, max_chunk_tokens=3000, max_workers=4, style_stats=None,
+                           excerpt_tokens=1500):
+        """Folds newly published newsletters into an existing style guide.
+
+        Only the new newsletters are sent to the model: with ``style_stats``,
+        representative_excerpts of them within ``excerpt_tokens``; otherwise all of
+        them, condensed into style notes in parallel first when they do not fit one
+        chunk.
+
+        Args:
+            style_guide (str): The current style guide.
+            newsletters (list): Formatted new newsletters (see format_newsletter).
+            max_chunk_tokens (int): Estimated token budget per chunk.
+            max_workers (int): Maximum concurrent LLM calls.
+            style_stats (str, optional): Measured statistics for the whole corpus.
+            excerpt_tokens (int): Estimated token budget for the excerpts.
+        Returns:
+            str: The updated style guide.
+        """
+        if style_stats:
+            newsletters = representative_excerpts(newsletters, max_tokens=excerpt_tokens)
+        chunks = chunk_texts(newsletters, max_tokens=max_chunk_tokens)
+        if len(chunks) > 1:
+            map_chain = STYLE_NOTES_PROMPT | self.llm
+            with tracer.span('analyze.map', chunks=len(chunks)):
+                chunks = self._invoke_all(map_chain, [{"newsletters": chunk} for chunk in chunks], max_workers)
+        chain = STYLE_UPDATE_PROMPT | self.llm
+        with tracer.span('analyze.update', posts=len(newsletters)):
+            return chain.invoke({
+                "style_guide": style_guide,
+                "newsletters": "\n\n-------------------\n\n".join(chunks),
+                "style_stats": stats_block(style_stats)
+            })
     
-    def write_newsletter(self, style_guide, topic):
-        """Write a new newsletter following a specified style guide and topic."""
-        writing_prompt = PromptTemplate(
-            input_variables=["style_guide", "topic"],
-            template="""
-            Write a financial newsletter following this style guide:
-            
-            {style_guide}
-            
-            Topic to cover: {topic}
+    @staticmethod
+    def _writing_prompt(style_guide, topic, references=None):
+        """Pick the writing prompt and its inputs, adding retrieved passages when given."""
+        if references:
+            return WRITING_WITH_REFERENCES_PROMPT, {
+                "style_guide": style_guide, "topic": topic, "references": references}
+        return WRITING_PROMPT, {"style_guide": style_guide, "topic": topic}
+
+    def write_newsletter(self, style_guide, topic, references=None):
+        """Write a new newsletter following a specified style guide and topic.
+
+        ``references`` are optional passages from past newsletters (see
+        VectorIndex.search and format_passages) added to the prompt.
+        """
+        prompt, inputs = self._writing_prompt(style_guide, topic, references)
+        # New syntax using RunnableSequence
+        chain = prompt | self.llm
+        
+        # Use invoke instead of run
+        with tracer.span('write.generate', topic=topic, references=bool(references)):
+            return chain.invoke(inputs)
+
+    def write_drafts(self, style_guide, topic, n=3, references=None, max_workers=3):
+        """Write ``n`` drafts of one newsletter concurrently.
+
+        The first draft uses the plain writing prompt; the others each add one of
+        DRAFT_ANGLES to the topic so they differ in approach (and in cache key).
+
+        Returns:
+            list: The drafts, first one first.
+        """
+        topics = [topic] + [
+            f"{topic}\n\n            For this draft: {DRAFT_ANGLES[(i - 1) % len(DRAFT_ANGLES)]}"
+            + (f" (variant {i})" if i > len(DRAFT_ANGLES) else '')
+            for i in range(1, n)
+        ]
+        prompt, _ = self._writing_prompt(style_guide, topic, references)
+        chain = prompt | self.llm
+        with tracer.span('write.drafts', topic=topic, drafts=n, references=bool(references)):
+            return self._invoke_all(chain, [self._writing_prompt(style_guide, t, references)[1] for t in topics],
+                                    max_workers)
+
+    def write_best_of(self, style_guide, topic, scorer, n=3, references=None, max_workers=3):
+        """Write ``n`` drafts and pick the one closest to the author's corpus.
+
+        Drafts are scored locally by ``scorer`` (a DraftScorer: TF-IDF similarity,
+        phrase overlap and stylometric distance), with no further LLM calls.
+
+        Returns:
+            tuple: ``(best_draft, scores)`` with scores best first (see DraftScore).
+        """
+        drafts = self.write_drafts(style_guide, topic, n=n, references=references, max_workers=max_workers)
+        scores = scorer.rank(drafts)
+        return drafts[scores[0].index], scores
+
+    def stream_newsletter(self, style_guide, topic, output_path=None, max_tokens=None, references=None):
+        """Stream a new newsletter chunk by chunk as the model generates it.
+
+        Chunks are yielded as they arrive and, when ``output_path`` is given, appended
+        to that file and flushed immediately so it can be previewed live. Timing is
+        available on ``last_generation_metrics`` once the generator is exhausted.
+        LangChain's ``stream`` never consults the response cache, so ``llm_cache`` is
+        checked here: a hit is replayed as a single chunk, and a completed stream is
+        stored under the same key ``invoke`` would use.
+
+        Args:
+            style_guide (str): The style guide to follow.
+            topic (str): The topic to cover.
+            output_path (str, optional): File to write incrementally.
+            max_tokens (int, optional): Stop after this many streamed chunks to cut off
+                runaway generations.
+            references (str, optional): Retrieved passages from past newsletters.
+        Yields:
+            str: Generated text chunks.
+        Example:
+            >>> for chunk in ai.stream_newsletter(style_guide, "Market Trends 2024", "draft.txt"):
+            ...     print(chunk, end="", flush=True)
+            >>> ai.last_generation_metrics.time_to_first_token
+        """
+        prompt, inputs = self._writing_prompt(style_guide, topic, references)
+        chain = prompt | self.llm
+        timer = StreamTimer()
+        stopped_early = False
+        output = open(output_path, 'w', encoding='utf-8') if output_path else None
+        span = tracer.start_span('write.stream', topic=topic, references=bool(references))
+        cache = self.llm_cache
+        if cache:
+            prompt_text, llm_string = prompt.format(**inputs), llm_string_for(self.llm)
+            cached = cache.lookup(prompt_text, llm_string)
+        else:
+            cached = None
+        span.set(cached=bool(cached))
+        chunks = []
+        try:
+            for chunk in [cached[0].text] if cached else chain.stream(inputs):
+                timer.record(chunk)
+                chunks.append(chunk)
+                if output:
+                    output.write(chunk)
+                    output.flush()
+                yield chunk
+                if max_tokens and timer.metrics.tokens >= max_tokens:
+                    stopped_early = True
+                    break
+            else:
+                # Only complete generations are cached, never one cut off by max_tokens
+                if cache and not cached:
+                    cache.update(prompt_text, llm_string, [Generation(text="".join(chunks))])
+        finally:
+            if output:
+                output.close()
+            self.last_generation_metrics = timer.finish(stopped_early)
+            span.set(**self.last_generation_metrics.as_dict())
+            span.end()
+
+def format_newsletter(newsletter):
+    """Format a single newsletter record for inclusion in an analysis prompt."""
+    return f"""
+            Title: {newsletter['title']}
+            Date: {newsletter['date']}
+            Author: {newsletter['author']}
             
-            Requirements:
-            1. Match the established tone and voice perfectly
-            2. Follow the same structural patterns
-            3. Explain concepts using similar approaches
-            4. Maintain consistent paragraph length and formatting
-            5. Use similar transition styles
-            6. Create hooks and conclusions in the same style
+            Content:
+            {newsletter['content']}
             
-            The final output should be indistinguishable from the original author's writing.
+            -------------------
             """
+
+PUBLICATION_URL = "https://lootbag.beehiiv.com"
+DEFAULT_TOPIC = "Margin Expansion and Earnings Per Share Growth"
+
+def refresh_style_guide(newsletter_ai, newsletters, artifact_path='style_guide.json', policy=None, rebuild=None):
+    """Returns an up-to-date style guide, doing as little LLM work as possible.
+
+    Compares the corpus fingerprint with the persisted StyleGuideArtifact and
+    either reuses the guide unchanged, folds only the new posts into it, or
+    rebuilds it from the whole corpus when the RebuildPolicy says so.
+
+    Args:
+        newsletter_ai (NewsletterAI): The AI used for analysis.
+        newsletters (list): Newsletter records from the corpus store.
+        artifact_path (str): Where the versioned artifact is persisted.
+        policy (RebuildPolicy, optional): Rebuild thresholds.
+        rebuild (Callable, optional): ``rebuild(style_stats) -> guide`` used for a full
+            rebuild, e.g. StreamingStyleAnalyzer.finish when the map phase already ran
+            while scraping. By default the guide is rebuilt from the measured StyleProfile
+            and a few representative excerpts in a single call.
+    Returns:
+        str: The style guide.
+    """
+    policy = policy or RebuildPolicy()
+    fingerprint = corpus_fingerprint(newsletters)
+    artifact = StyleGuideArtifact.load(artifact_path)
+    plan = policy.plan(artifact, fingerprint)
+    print(f"Style guide: {plan.action} ({plan.reason})")
+
+    if plan.action == 'skip':
+        return artifact.guide
+
+    style_stats = compute_style_profile([newsletter['content'] for newsletter in newsletters]).to_prompt()
+
+    if plan.action == 'update':
+        new_urls = set(plan.new_urls)
+        artifact.guide = newsletter_ai.update_style_guide(
+            artifact.guide,
+            [format_newsletter(newsletter) for newsletter in newsletters if newsletter['url'] in new_urls],
+            style_stats=style_stats
         )
-        
-        # New syntax using RunnableSequence
-        chain = writing_prompt | self.llm
-        
-        # Use invoke instead of run
-        return chain.invoke({
-            "style_guide": style_guide,
-            "topic": topic
-        })
+        artifact.fingerprint = fingerprint
+        artifact.added_since_rebuild += len(plan.new_urls)
+        artifact.revision += 1
+        artifact.updated_at = datetime.now().isoformat()
+    else:
+        if rebuild:
+            guide = rebuild(style_stats)
+        else:
+            guide = newsletter_ai.analyze_style(
+                [format_newsletter(newsletter) for newsletter in newsletters], style_stats=style_stats)
+        artifact = StyleGuideArtifact(
+            guide=guide,
+            fingerprint=fingerprint,
+            revision=artifact.revision + 1 if artifact else 1,
+            base_size=len(fingerprint)
+        )
+    artifact.save(artifact_path)
+    return artifact.guide
+
+def build_retriever(newsletters, index_dir='newsletter_cache/vector_index', k=5, llm_gate=None):
+    """Updates the passage index for the corpus and returns ``retrieve(topic) -> str``.
+
+    If the embedding model is unavailable, when indexing or when a topic is embedded
+    for the search, writing proceeds without references.
+    With ``llm_gate`` set, embedding requests share the generation model's endpoint slots.
+    """
+    try:
+        embed = get_embeddings().embed_documents
+        if llm_gate:
+            from utils.llm_gate import gated
+            embed = gated(embed, llm_gate)
+        index = VectorIndex(index_dir, embed=embed)
+        embedded = index.update(newsletters)
+        print(f"Vector index: {len(index)} passages ({embedded} newly embedded)")
+    except Exception as e:
+        print(f"Retrieval disabled, could not update vector index: {str(e)}")
+        return lambda topic: None
+
+    def retrieve(topic):
+        try:
+            return format_passages(index.search(topic, k=k)) or None
+        except Exception as e:
+            print(f"Writing without references, retrieval failed for '{topic}': {str(e)}")
+            return None
+    return retrieve
 
 def load_newsletter_urls():
+    """Fallback archive list used when sitemap/RSS discovery returns nothing."""
     return [
         "https://lootbag.beehiiv.com/p/closer-look-feds-2-inflation-target",
         "https://lootbag.beehiiv.com/p/landlord-artificial-intelligence",
@@ -128,74 +614,203 @@ def load_newsletter_urls():
         "https://lootbag.beehiiv.com/p/retail-resurgence"
     ]
 
-def main():
+def main(topic=DEFAULT_TOPIC, topics_file=None, output_dir='generated', max_workers=3,
+         publication_url=PUBLICATION_URL, work_dir='.', output_path=None, llm=None, llm_gate=None,
+         on_stage=None, drafts=1):
     """Main execution function for the newsletter generation process.
     This function orchestrates the entire newsletter generation workflow:
     1. Initializes the AI and web scraper components
-    2. Scrapes newsletters from provided URLs
-    3. Formats the scraped content
-    4. Analyzes the writing style
-    5. Generates a new newsletter based on the analyzed style
+    2. Discovers new or changed posts from the publication's sitemap/RSS and scrapes only those;
+       when a full style analysis is due, its map phase consumes posts as they are scraped
+    3. Streams the publication's corpus from the corpus store, stripping boilerplate
+       repeated across posts (subscribe boxes, share buttons, footers)
+    4. Reuses, incrementally updates, or rebuilds the persisted style guide
+       and updates the passage index used to retrieve relevant past writing
+    5. Streams a new newsletter based on the analyzed style to disk, or, when
+       ``topics_file`` is given, generates every topic concurrently with BatchWriter
+    Args:
+        topic (str): Topic for a single newsletter.
+        topics_file (str, optional): File with one topic per line for batch mode.
+        output_dir (str): Directory for batch articles and batch_report.json.
+        max_workers (int): Concurrent generations in batch mode.
+        publication_url (str): Beehiiv publication to analyze.
+        work_dir (str): Directory for the caches, style guide files and the single-topic
+            output; the job runner gives every tenant its own.
+        output_path (str, optional): Single-topic output file, defaults to
+            ``<work_dir>/generated_newsletter.txt``.
+        llm (BaseLLM, optional): Use this model instead of Ollama (see NewsletterAI).
+        llm_gate (threading.Semaphore, optional): Endpoint slots shared with concurrent runs.
+        on_stage (Callable, optional): Called with each stage name as it starts
+            ('scrape', 'clean', 'analyze', 'index', 'write').
+        drafts (int): For a single topic, write this many drafts concurrently and keep
+            the one a DraftScorer rates closest to the corpus.
     Raises:
         Exception: If no newsletters were successfully scraped
     Returns:
-        str: The generated newsletter content
-    Files created:
+        str: The generated newsletter content (a list of TopicResult in batch mode)
+    Files created (in ``work_dir``):
+        - newsletter_cache/: Corpus database, LLM response cache and passage index
         - style_guide.txt: Contains the analyzed writing style guide
-        - generated_newsletter.txt: Contains the newly generated newsletter"""
+        - style_guide.json: Versioned style guide artifact used to skip or update analysis
+        - generated_newsletter.txt: Contains the newly generated newsletter
+        - generated_newsletter_scores.json: Scores of every draft with ``drafts`` > 1
+        - <output_dir>/NN_<topic>.txt and batch_report.json in batch mode"""
+    stage = on_stage or (lambda name: None)
+    cache_dir = os.path.join(work_dir, 'newsletter_cache')
+    artifact_path = os.path.join(work_dir, 'style_guide.json')
+    style_guide_path = os.path.join(work_dir, 'style_guide.txt')
+    output_path = output_path or os.path.join(work_dir, 'generated_newsletter.txt')
+    
     # Initialize the AI and scraper
-    newsletter_ai = NewsletterAI()
-    scraper = BeehiivScraper(cache_dir='newsletter_cache', verbose=False)
+    # Shared with earlier runs on this work_dir, so they also share the memoized model
+    llm_cache = get_llm_cache(os.path.join(cache_dir, 'llm_cache.db'))
+    cache_hits, cache_misses = llm_cache.stats.hits, llm_cache.stats.misses
+    newsletter_ai = NewsletterAI(llm_cache=llm_cache, llm=llm, llm_gate=llm_gate)
+    scraper = BeehiivScraper(cache_dir=cache_dir, verbose=False)
     
-    print("\nStarting newsletter scraping process...")
-    urls = load_newsletter_urls()
-    newsletters = scraper.process_multiple_urls(urls)
+    # Closed when the run ends, however it ends: job runners call main() once per job
+    with scraper.store:
+        print("\nStarting newsletter scraping process...")
+        stage('scrape')
+        publication = publication_for(publication_url)
+        discovery = ArchiveDiscovery(publication_url, scraper.store)
+        with tracer.span('stage.discover'):
+            new_urls, changed_urls = discovery.pending_urls()
+        if (not new_urls and not changed_urls and scraper.store.count(publication) == 0
+                and publication_url == PUBLICATION_URL):
+            # Discovery unavailable and nothing cached yet: fall back to the known archive
+            new_urls = load_newsletter_urls()
+        print(f"{len(new_urls)} new and {len(changed_urls)} changed newsletters to scrape")
     
-    if not newsletters:
-        raise Exception("No newsletters were successfully scraped!")
+        pending = set(new_urls) | set(changed_urls)
+        plan = RebuildPolicy().predict(StyleGuideArtifact.load(artifact_path), scraper.store.urls(publication), pending)
+        analyzer = None
+        if plan.action == 'rebuild':
+            # A full analysis is due anyway: feed stored and freshly scraped posts into its
+            # map phase as they arrive so inference overlaps with scraping
+            print(f"Pipelining scraping and style analysis ({plan.reason})")
+            analyzer = StreamingStyleAnalyzer(newsletter_ai)
+            with tracer.span('stage.scrape_and_map', new=len(new_urls), changed=len(changed_urls)):
+                scraped = ScrapeStream(scraper, [(new_urls, False), (changed_urls, True)])
+                stored = (newsletter for newsletter in scraper.store.iter_newsletters(publication=publication)
+                          if newsletter['url'] not in pending)
+                try:
+                    for newsletter in ContentCleaner().clean_stream(itertools.chain(stored, scraped)):
+                        analyzer.add(format_newsletter(newsletter))
+                finally:
+                    scraped.close()
+        else:
+            with tracer.span('stage.scrape', new=len(new_urls), changed=len(changed_urls)):
+                if new_urls:
+                    scraper.process_multiple_urls(new_urls)
+                if changed_urls:
+                    scraper.process_multiple_urls(changed_urls, revalidate=True)
+        stats = scraper.cache.stats
+        print(f"Cache: {stats.hits} hits, {stats.revalidated} revalidated, {stats.misses} misses")
     
-    # Format newsletters for analysis
-    formatted_content = []
-    for newsletter in newsletters:
-        formatted_content.append(
-            f"""
-            Title: {newsletter['title']}
-            Date: {newsletter['date']}
-            Author: {newsletter['author']}
-            
-            Content:
-            {newsletter['content']}
-            
-            -------------------
-            """
-        )
+        if scraper.store.count(publication) == 0:
+            if analyzer:
+                analyzer.close()
+            raise Exception("No newsletters were successfully scraped!")
+    
+        # Stream the publication's corpus from the store with shared boilerplate stripped
+        stage('clean')
+        cleaner = ContentCleaner()
+        with tracer.span('stage.clean'):
+            newsletters = list(cleaner.iter_clean(scraper.store, publication))
+        stats = cleaner.stats
+        print(f"Cleaning: {stats.recleaned}/{stats.posts} posts re-cleaned, saved {stats.bytes_saved} bytes "
+              f"(~{stats.tokens_saved} of {stats.tokens_before} estimated tokens)")
+    
+        # Reuse, incrementally update, or rebuild the persisted style guide
+        print("\nAnalyzing newsletter style...")
+        stage('analyze')
+        with tracer.span('stage.analyze', posts=len(newsletters)):
+            try:
+                style_guide = refresh_style_guide(newsletter_ai, newsletters, artifact_path,
+                                                  rebuild=analyzer.finish if analyzer else None)
+            finally:
+                if analyzer:
+                    analyzer.close()
+    
+        # Save style guide
+        with open(style_guide_path, 'w', encoding='utf-8') as f:
+            f.write(style_guide)
+            print(f"\nStyle guide saved to {style_guide_path}")
     
-    newsletter_text = "\n".join(formatted_content)
+        # Embed new or changed posts so writing only sees the most relevant passages
+        stage('index')
+        with tracer.span('stage.index'):
+            retrieve = build_retriever(newsletters, index_dir=os.path.join(cache_dir, 'vector_index'),
+                                       llm_gate=llm_gate)
     
-    # Analyze style
-    print("\nAnalyzing newsletter style...")
-    style_guide = newsletter_ai.analyze_style(newsletter_text)
+        stage('write')
+        if topics_file:
+            topics = load_topics(topics_file)
+            print(f"\nWriting {len(topics)} newsletters with {max_workers} workers...")
+            with tracer.span('stage.write', topics=len(topics)):
+                results = BatchWriter(newsletter_ai, output_dir=output_dir, max_workers=max_workers,
+                                      retrieve=retrieve).run(style_guide, topics)
+            print(f"\nBatch report saved to {os.path.join(output_dir, 'batch_report.json')}")
+            return results
     
-    # Save style guide
-    with open('style_guide.txt', 'w', encoding='utf-8') as f:
-        f.write(style_guide)
-        print("\nStyle guide saved to style_guide.txt")
+        if drafts > 1:
+            # Best of N: drafts are generated concurrently and scored locally against corpus
+            # statistics that are only rebuilt when the corpus changes
+            print(f"\nWriting {drafts} drafts...")
+            with tracer.span('stage.write', topics=1, drafts=drafts):
+                model = CorpusModel.load_or_build(newsletters, os.path.join(cache_dir, 'draft_scorer.npz'))
+                new_newsletter, scores = newsletter_ai.write_best_of(style_guide, topic, DraftScorer(model), n=drafts,
+                                                                     references=retrieve(topic),
+                                                                     max_workers=max_workers)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(new_newsletter)
+            scores_path = f"{os.path.splitext(output_path)[0]}_scores.json"
+            with open(scores_path, 'w', encoding='utf-8') as f:
+                json.dump([score.as_dict() for score in scores], f, indent=2)
+            for score in scores:
+                print(f"Draft {score.index + 1}: score {score.score:.3f} (tf-idf {score.tfidf:.3f}, "
+                      f"phrases {score.phrases:.3f}, style {score.style:.3f})")
+            print(f"\nBest draft ({scores[0].index + 1}) saved to {output_path}, scores to {scores_path}")
+            return new_newsletter
     
-    # Write new newsletter
-    print("\nWriting new newsletter...")
-    new_newsletter = newsletter_ai.write_newsletter(
-        style_guide=style_guide,
-        topic="Margin Expansion and Earnings Per Share Growth"
-    )
+        # Write new newsletter, streaming it to disk as it is generated
+        print("\nWriting new newsletter...")
+        with tracer.span('stage.write', topics=1):
+            new_newsletter = "".join(newsletter_ai.stream_newsletter(
+                style_guide=style_guide,
+                topic=topic,
+                output_path=output_path,
+                references=retrieve(topic)
+            ))
+        print(f"\nNew newsletter saved to {output_path}")
+        metrics = newsletter_ai.last_generation_metrics
+        print(f"Time to first token: {metrics.time_to_first_token or 0:.2f}s, "
+              f"{metrics.tokens_per_second:.1f} tokens/s, total {metrics.total_latency:.2f}s")
     
-    # Save new newsletter
-    with open('generated_newsletter.txt', 'w', encoding='utf-8') as f:
-        f.write(new_newsletter)
-        print("\nNew newsletter saved to generated_newsletter.txt")
+        hits, misses = llm_cache.stats.hits - cache_hits, llm_cache.stats.misses - cache_misses
+        print(f"LLM cache: {hits} hits, {misses} misses ({hits / max(hits + misses, 1):.0%} hit rate)")
     
-    return new_newsletter
+        return new_newsletter
 
 if __name__ == "__main__":
-    result = main()
+    parser = argparse.ArgumentParser(description="Analyze Beehiiv newsletters and write new ones in the same style.")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC, help="Topic for a single newsletter")
+    parser.add_argument("--topics-file", help="File with one topic per line; generates all of them in one run")
+    parser.add_argument("--output-dir", default="generated", help="Output directory for batch mode")
+    parser.add_argument("--workers", type=int, default=3, help="Concurrent generations in batch and best-of mode")
+    parser.add_argument("--drafts", type=int, default=1, help="Write this many drafts of the topic and keep the best")
+    parser.add_argument("--trace", help="Write JSON-lines spans, counters and histograms to this file")
+    parser.add_argument("--profile", help="Run under cProfile and save the stats to this file")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.configure(args.trace)
+    with profiling(args.profile) if args.profile else contextlib.nullcontext():
+        result = main(topic=args.topic, topics_file=args.topics_file, output_dir=args.output_dir,
+                      max_workers=args.workers, drafts=args.drafts)
+    if args.trace:
+        print(f"\n{tracer.report()}")
+        tracer.close()
+        print(f"Trace saved to {args.trace}")
     print("\nFinal Result:")
     # print(result)
\ No newline at end of file
@@ -1,5 +1,5 @@
 # tasks/tasks.py
-from crewai import Task
+from utils.stylometry import stats_block
 
 class NewsletterTasks:
     """A class containing static methods for newsletter-related tasks.
@@ -17,13 +17,16 @@ class NewsletterTasks:
     >>> new_newsletter = tasks.write_newsletter(agent, style_guide, "Market Update")
     """
     @staticmethod
-    def analyze_style(agent, newsletters):
+    def analyze_style(agent, newsletters, style_stats=None):
         """Analyzes newsletters to create a comprehensive style guide.
         This function creates a Task object that instructs an AI agent to analyze provided newsletters
         and generate a detailed style guide focusing on various writing elements.
         Parameters:
             agent: The AI agent responsible for executing the analysis task
-            newsletters (list or str): Collection of newsletters to be analyzed
+            newsletters (list or str): Newsletters to be analyzed; with style_stats, pass
+                representative_excerpts of the corpus rather than all of it
+            style_stats (str, optional): Precomputed stylometric statistics
+                (StyleProfile.to_prompt()) covering the whole corpus
         Returns:
             Task: A Task object containing the style analysis instructions and expected output
         The analysis covers:
@@ -37,13 +40,14 @@ class NewsletterTasks:
             - Hooks and conclusions
         Expected output format is a comprehensive style guide document detailing all analyzed elements.
         """
+        from crewai import Task
         return Task(
             description=f"""
             Analyze the provided newsletters to create a comprehensive style guide.
             
             Newsletters to analyze:
             {newsletters}
-            
+            {stats_block(style_stats)}
             Focus on identifying:
             1. Writing tone and voice
             2. Common phrases and expressions
@@ -83,6 +87,7 @@ class NewsletterTasks:
         >>> topic = "Q3 Market Analysis"
         >>> task = write_newsletter(agent, style_guide, topic)
         """
+        from crewai import Task
         return Task(
             description=f"""
             Write a new financial newsletter following the provided style guide.
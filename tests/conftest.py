@@ -0,0 +1,93 @@
+# tests/conftest.py
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import threading
+import pytest
+import os
+import sys
+
+# The repo is not an installed package; make its top-level modules importable from any cwd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.page_server import PageServer, SyntheticArchive  # noqa: E402
+from utils.resilience import CircuitBreakers, RetryPolicy  # noqa: E402
+from utils.beehiiv_scraper import BeehiivScraper  # noqa: E402
+from utils.http_fetcher import parse_newsletter_html  # noqa: E402
+import utils.beehiiv_scraper  # noqa: E402
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+@pytest.fixture
+def page_server():
+    """A 6-post synthetic publication served offline."""
+    with PageServer(SyntheticArchive(posts=6, paragraphs=4)) as server:
+        yield server
+
+
+@pytest.fixture
+def fixture_server():
+    """Serves tests/fixtures/<name>.html at /p/<name>, with an ETag and Last-Modified."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = FIXTURES / f"{self.path.rsplit('/', 1)[-1]}.html"
+            if not path.exists():
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = path.read_bytes()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', '"v1"')
+            self.send_header('Last-Modified', 'Mon, 18 Mar 2024 13:00:00 GMT')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_scraper(tmp_path):
+    """BeehiivScraper factory with quick retries and a breaker that stays closed unless overridden."""
+    def make(**kwargs):
+        kwargs.setdefault('retry_policy', RetryPolicy(max_attempts=2, base_delay=0.01, seed=0))
+        kwargs.setdefault('breakers', CircuitBreakers(failure_threshold=100))
+        return BeehiivScraper(cache_dir=str(tmp_path / 'cache'), **kwargs)
+    return make
+
+
+class FakeBrowserEngine:
+    """Stands in for AsyncScrapeEngine so the browser fallback runs without Playwright."""
+    scraped = []
+
+    def __init__(self, **kwargs):
+        self.failures = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scrape_many(self, urls, on_result=None):
+        for index, url in enumerate(urls):
+            FakeBrowserEngine.scraped.append(url)
+            data = parse_newsletter_html(f"<h1>Rendered</h1><main><p>Rendered body of {url}</p></main>", url)
+            on_result(index, url, data)
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    """Replaces the browser engine; ``fake_browser.scraped`` lists the URLs sent to it."""
+    FakeBrowserEngine.scraped = []
+    monkeypatch.setattr(utils.beehiiv_scraper, 'AsyncScrapeEngine', FakeBrowserEngine)
+    return FakeBrowserEngine
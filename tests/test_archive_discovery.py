@@ -0,0 +1,51 @@
+# tests/test_archive_discovery.py
+from utils.archive_discovery import ArchiveDiscovery
+from utils.corpus_store import CorpusStore
+from benchmarks.page_server import render_post
+from utils.http_fetcher import parse_newsletter_html
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CorpusStore(str(tmp_path / 'corpus.db'))
+    yield store
+    store.close()
+
+
+def stored(url, validated_at):
+    index = int(url.rsplit('-', 1)[1])
+    record = parse_newsletter_html(render_post(index, 4), url)
+    record.update(scraped_at=validated_at, validated_at=validated_at, content_hash=str(index))
+    return record
+
+
+def test_discover_lists_sitemap_posts_with_lastmod(page_server, store):
+    posts = ArchiveDiscovery(page_server.base_url, store).discover()
+
+    assert sorted(posts) == sorted(page_server.urls())
+    assert posts[f"{page_server.base_url}/p/post-3"] == '2020-01-04'
+
+
+def test_pending_urls_skips_stored_posts_and_flags_newer_lastmod(page_server, store):
+    urls = page_server.urls()
+    # post-0 was validated after its lastmod, post-1 before it
+    store.upsert_many([stored(urls[0], '2021-01-01T00:00:00'), stored(urls[1], '2019-06-01T00:00:00')])
+
+    new_urls, changed_urls = ArchiveDiscovery(page_server.base_url, store).pending_urls()
+
+    assert new_urls == urls[2:]
+    assert changed_urls == [urls[1]]
+
+
+def test_pending_urls_resumes_failed_and_skips_gone(page_server, store):
+    urls = page_server.urls()
+    store.upsert_many([stored(url, '2021-01-01T00:00:00') for url in urls])
+    store.mark_failed(urls[2], 'HTTP 503')
+    store.mark_failed(urls[4], 'HTTP 404', gone=True)
+    store.mark_failed(f"{page_server.base_url}/p/unlisted", 'timeout')
+
+    new_urls, changed_urls = ArchiveDiscovery(page_server.base_url, store).pending_urls()
+
+    assert new_urls == [f"{page_server.base_url}/p/unlisted"]
+    assert changed_urls == [urls[2]]
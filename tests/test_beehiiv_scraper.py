@@ -0,0 +1,109 @@
+# tests/test_beehiiv_scraper.py
+from benchmarks.page_server import Faults, PageServer, SyntheticArchive
+from utils.resilience import CircuitBreaker, CircuitBreakers, CircuitOpenError, RetryPolicy
+from utils.scrape_engine import AsyncScrapeEngine
+from utils.tracing import tracer
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def traced():
+    tracer.configure(None)
+    yield tracer
+    tracer.configure(enabled=False)
+
+
+def statuses(scraper):
+    return {row['url']: row['status'] for row in scraper.store.manifest()}
+
+
+def test_successful_scrape_marks_manifest_done(make_scraper, page_server):
+    scraper = make_scraper(fetch_mode='http')
+
+    assert len(scraper.process_multiple_urls(page_server.urls())) == len(page_server.urls())
+    assert set(statuses(scraper).values()) == {'done'}
+    assert scraper.failure_summary()['failed'] == 0
+
+
+def test_failures_are_summarized_and_kept_in_manifest(make_scraper):
+    faults = Faults(status=503, fail_first=2, gone={1})
+    with PageServer(SyntheticArchive(posts=4, paragraphs=3), faults=faults) as server:
+        urls = server.urls()
+        scraper = make_scraper(fetch_mode='http')
+
+        assert scraper.process_multiple_urls(urls) == []
+        summary = scraper.failure_summary()
+        assert summary['failed'] == 4
+        assert summary['reasons'] == {'HTTP 503': 3, 'HTTP 404': 1}
+        assert summary['urls'][urls[1]] == 'HTTP 404'
+        assert statuses(scraper) == {urls[0]: 'failed', urls[1]: 'gone', urls[2]: 'failed', urls[3]: 'failed'}
+        assert sorted(scraper.store.unfinished_urls()) == sorted([urls[0], urls[2], urls[3]])
+
+        # The host recovered: a rerun of the unfinished URLs completes them
+        newsletters = scraper.process_multiple_urls(scraper.store.unfinished_urls())
+        assert len(newsletters) == 3
+        assert scraper.failure_summary()['failed'] == 0
+        assert statuses(scraper) == {urls[0]: 'done', urls[1]: 'gone', urls[2]: 'done', urls[3]: 'done'}
+        assert scraper.store.unfinished_urls() == []
+
+
+def test_circuit_opens_on_a_failing_host(make_scraper):
+    with PageServer(SyntheticArchive(posts=6, paragraphs=3), faults=Faults(error_rate=1.0, seed=1)) as server:
+        scraper = make_scraper(fetch_mode='http', concurrency=1, per_host_concurrency=1,
+                               breakers=CircuitBreakers(failure_threshold=3, reset_timeout=60))
+
+        scraper.process_multiple_urls(server.urls())
+
+        summary = scraper.failure_summary()
+        assert summary['failed'] == 6
+        assert summary['circuits_opened'] == {server.base_url.split('//')[1]: 1}
+        assert 'circuit open' in summary['reasons']
+        # Requests stop reaching the host once the circuit is open
+        assert server.requests < 6 * 2
+
+
+def test_gone_and_failing_posts_are_not_sent_to_browser(make_scraper, fake_browser):
+    faults = Faults(status=503, fail_first=5, gone={0})
+    with PageServer(SyntheticArchive(posts=2, paragraphs=3), faults=faults) as server:
+        scraper = make_scraper(fetch_mode='auto')
+
+        assert scraper.process_multiple_urls(server.urls()) == []
+
+        assert fake_browser.scraped == []
+        assert scraper.failure_summary()['reasons'] == {'HTTP 404': 1, 'HTTP 503': 1}
+
+
+def test_browser_success_clears_the_http_failure(make_scraper, fake_browser):
+    with PageServer(SyntheticArchive(posts=2, paragraphs=3), faults=Faults(status=403, fail_first=1)) as server:
+        scraper = make_scraper(fetch_mode='auto')
+
+        scraper.process_multiple_urls(server.urls())
+
+        assert scraper.failure_summary()['failed'] == 0
+        assert set(statuses(scraper).values()) == {'done'}
+
+
+def test_circuit_opening_is_counted_not_printed(traced, capsys):
+    breaker = CircuitBreaker('x.beehiiv.com', failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.opened == 1
+    assert {'name': 'circuit.opened', 'attributes': {'host': 'x.beehiiv.com'}, 'value': 1} in \
+        traced.summary()['counters']
+    assert capsys.readouterr().out == ''
+
+
+def test_wait_span_ends_when_the_circuit_is_open(traced):
+    url = 'https://x.beehiiv.com/p/post-1'
+    engine = AsyncScrapeEngine(retry_policy=RetryPolicy(max_attempts=1),
+                               breakers=CircuitBreakers(failure_threshold=1, reset_timeout=60))
+    engine.breakers.for_url(url).record_failure()
+
+    # The attempt is refused before a page is taken, so no browser is needed
+    assert asyncio.run(engine.scrape(url)) is None
+
+    assert isinstance(engine.failures[url], CircuitOpenError)
+    assert traced.summary()['histograms']['span.scrape.wait']['count'] == 1
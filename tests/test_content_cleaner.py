@@ -0,0 +1,70 @@
+# tests/test_content_cleaner.py
+from benchmarks.page_server import BOILERPLATE_HEAD, BOILERPLATE_TAIL, render_post
+from utils.http_fetcher import parse_newsletter_html
+from utils.newsletter_cache import content_hash
+from utils.content_cleaner import ContentCleaner
+from utils.corpus_store import CorpusStore
+import pytest
+
+BOILERPLATE = set(BOILERPLATE_HEAD + BOILERPLATE_TAIL)
+
+
+def post(index):
+    record = parse_newsletter_html(render_post(index, 3), f"https://lootbag.beehiiv.com/p/post-{index}")
+    record['content_hash'] = content_hash(record['content'])
+    return record
+
+
+def body(record):
+    # line_key ignores numbers, so the '© 2025' footer and the synthetic headings
+    # ('Synthetic post 3') count as boilerplate as well; the paragraphs are the body
+    return [line for line in record['content'].split('\n')
+            if line not in BOILERPLATE and not line.startswith(('©', 'Synthetic post'))]
+
+
+@pytest.fixture
+def posts():
+    posts = [post(i) for i in range(6)]
+    # Only the year differs, which line_key ignores
+    posts[5]['content'] = posts[5]['content'].replace('© 2024', '© 2025')
+    return posts
+
+
+def test_boilerplate_is_stripped_and_the_body_survives(posts):
+    assert all(line in posts[0]['content'] for line in BOILERPLATE)
+
+    cleaned = list(ContentCleaner().clean_stream(posts, warmup=4))
+
+    assert [record['url'] for record in cleaned] == [record['url'] for record in posts]
+    for raw, record in zip(posts, cleaned):
+        lines = record['content'].split('\n')
+        assert not BOILERPLATE & set(lines)
+        assert '© 2025 Lootbag. All rights reserved.' not in lines
+        # Every paragraph is kept, in order
+        assert lines == body(raw) and len(lines) == 3
+
+
+def test_iter_clean_caches_cleaned_text_in_the_store(tmp_path, posts):
+    store = CorpusStore(str(tmp_path / 'corpus.db'))
+    store.upsert_many(posts)
+    cleaner = ContentCleaner()
+
+    first = list(cleaner.iter_clean(store, 'lootbag.beehiiv.com'))
+    stats = cleaner.stats
+    second = list(cleaner.iter_clean(store, 'lootbag.beehiiv.com'))
+
+    assert stats.boilerplate_lines == len(BOILERPLATE) + 1
+    assert stats.recleaned == len(posts) and stats.bytes_saved > 0
+    assert cleaner.stats.recleaned == 0
+    assert [record['content'] for record in second] == [record['content'] for record in first]
+    assert all(record['content'].split('\n') == body(raw)
+               for raw, record in zip(sorted(posts, key=lambda r: (r['date'], r['url'])), first))
+    store.close()
+
+
+def test_small_corpora_are_only_normalized(posts):
+    cleaner = ContentCleaner(min_posts=3)
+    boilerplate = cleaner.find_boilerplate(record['content'] for record in posts[:2])
+
+    assert boilerplate == set()
+    assert ContentCleaner.clean("Share  this post \n\n\n\nBody", boilerplate) == "Share this post\n\nBody"
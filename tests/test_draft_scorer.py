@@ -0,0 +1,140 @@
+# tests/test_draft_scorer.py
+from langchain_core.language_models.llms import LLM
+from collections import Counter
+from utils.draft_scorer import CorpusModel, DraftScorer, _WORD
+from utils.stylometry import style_features
+from newsletter_ai import NewsletterAI, DRAFT_ANGLES
+import numpy as np
+import math
+import pytest
+
+CORPUS = [
+    "Rate cuts are coming. The Fed signalled rate cuts twice this week.\nInvestors cheered.",
+    "Earnings season starts Monday. Watch the banks: rate cuts squeeze their margins.\nWe like cash flow.",
+    "Why do bond yields fall? Rate cuts. Investors buy duration before the Fed moves.\nStay patient.",
+]
+
+
+def terms(text):
+    words = _WORD.findall(text.lower())
+    return Counter(words + list(zip(words, words[1:])))
+
+
+def naive_tfidf_score(corpus, draft):
+    """Cosine of the draft's TF-IDF vector to the normalized mean of the posts' normalized vectors."""
+    documents = [terms(text) for text in corpus]
+    df = Counter(term for document in documents for term in document)
+
+    def vector(counts):
+        weights = {term: count * (math.log((1 + len(corpus)) / (1 + df[term])) + 1)
+                   for term, count in counts.items()}
+        norm = math.sqrt(sum(weight ** 2 for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()}
+
+    centroid = Counter()
+    for document in documents:
+        centroid.update(vector(document))
+    norm = math.sqrt(sum(weight ** 2 for weight in centroid.values()))
+    return sum(weight * centroid[term] / norm for term, weight in vector(terms(draft)).items())
+
+
+@pytest.fixture
+def scorer():
+    return DraftScorer(CorpusModel.build(CORPUS))
+
+
+@pytest.mark.parametrize('draft', [
+    "Investors cheered rate cuts. The banks like cash flow.",
+    "Rate cuts are coming. The Fed signalled rate cuts twice this week.\nInvestors cheered.",
+    "Why do the banks fall? Watch duration.",
+])
+def test_tfidf_score_matches_a_naive_centroid(scorer, draft):
+    assert scorer.score(draft).tfidf == pytest.approx(naive_tfidf_score(CORPUS, draft), abs=1e-4)
+
+
+def test_tfidf_of_a_single_post_corpus_is_one_for_that_post():
+    scorer = DraftScorer(CorpusModel.build(CORPUS[:1]))
+
+    assert scorer.score(CORPUS[0]).tfidf == pytest.approx(1.0, abs=1e-4)
+
+
+def test_repeated_informative_bigrams_are_phrases(scorer):
+    model = scorer.model
+    first, second = np.divmod(model.phrases - model.vocab_size, model.vocab_size)
+
+    # 'rate cuts' and 'the fed' recur; 'rate cuts' four times, 'the fed' twice
+    assert {(model.vocabulary[a], model.vocabulary[b]) for a, b in zip(first, second)} == {
+        ('rate', 'cuts'), ('the', 'fed')}
+
+
+def test_phrase_share_counts_unseen_bigrams(scorer):
+    # Bigrams: 'the fed' and 'rate cuts' are phrases; 'fed hinted', 'hinted at' and
+    # 'at rate' contain words the corpus never used
+    assert scorer.score("The Fed hinted at rate cuts.").phrases == pytest.approx(2 / 5)
+
+
+def test_style_is_the_inverse_rms_z_distance():
+    corpus = CORPUS[:2]
+    scorer = DraftScorer(CorpusModel.build(corpus))
+    features = [style_features(text) for text in corpus]
+
+    # With two posts every feature of either one is 0 or 1 standard deviation from the mean
+    differing = int(np.sum(~np.isclose(features[0], features[1])))
+    assert differing > 0
+    expected = 1 / (1 + math.sqrt(differing / len(features[0])))
+    assert scorer.score(corpus[0]).style == pytest.approx(expected, abs=1e-4)
+
+
+def test_score_combines_the_signals_with_the_weights(scorer):
+    result = scorer.score("Investors cheered rate cuts. The banks like cash flow.")
+
+    assert result.score == pytest.approx(0.4 * result.tfidf + 0.2 * result.phrases + 0.4 * result.style, abs=1e-3)
+    only_style = DraftScorer(scorer.model, weights={'tfidf': 0, 'phrases': 0}).score(
+        "Investors cheered rate cuts. The banks like cash flow.")
+    assert only_style.score == result.style
+
+
+def test_model_is_rebuilt_only_when_the_corpus_changes(tmp_path):
+    newsletters = [{'url': f"https://x.beehiiv.com/p/{i}", 'content': text, 'content_hash': f"hash-{i}"}
+                   for i, text in enumerate(CORPUS)]
+    path = str(tmp_path / 'draft_scorer.npz')
+
+    built = CorpusModel.load_or_build(newsletters, path)
+    loaded = CorpusModel.load_or_build(newsletters, path)
+    changed = CorpusModel.load_or_build(newsletters[:2], path)
+
+    assert loaded is not built and loaded.fingerprint == built.fingerprint
+    assert np.array_equal(loaded.centroid, built.centroid)
+    assert changed.documents == 2 and changed.fingerprint != built.fingerprint
+
+
+class ScriptedLLM(LLM):
+    """Answers a writing prompt with the draft of the first DRAFT_ANGLES entry it contains."""
+    drafts: dict
+
+    @property
+    def _llm_type(self) -> str:
+        return 'scripted'
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        for angle, draft in self.drafts.items():
+            if angle and angle in prompt:
+                return draft
+        return self.drafts[None]
+
+
+def test_best_of_picks_the_draft_closest_to_the_corpus(scorer):
+    drafts = {
+        None: "BUY NOW!!! Crypto to the moon!!! Lambo season!!!",
+        DRAFT_ANGLES[0]: "Rate cuts are coming. The Fed signalled rate cuts again.\nInvestors cheered.",
+        DRAFT_ANGLES[1]: "Picture a saver at the bank. Rates look low and cash feels idle.\nShe waits.",
+    }
+    ai = NewsletterAI(llm=ScriptedLLM(drafts=drafts))
+
+    written = ai.write_drafts('Plain and direct.', 'Rate cuts', n=3)
+    best, scores = ai.write_best_of('Plain and direct.', 'Rate cuts', scorer, n=3)
+
+    assert written == [drafts[None], drafts[DRAFT_ANGLES[0]], drafts[DRAFT_ANGLES[1]]]
+    assert best == drafts[DRAFT_ANGLES[0]]
+    assert [score.index for score in scores] == [1, 2, 0]
+    assert [score.score for score in scores] == sorted((score.score for score in scores), reverse=True)
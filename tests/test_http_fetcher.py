@@ -0,0 +1,122 @@
+# tests/test_http_fetcher.py
+from benchmarks.page_server import Faults, PageServer, SyntheticArchive
+from utils.http_fetcher import HttpNewsletterFetcher, parse_newsletter_html
+from pathlib import Path
+import threading
+import requests
+import pytest
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text(encoding='utf-8')
+
+
+def test_parses_beehiiv_post():
+    record = parse_newsletter_html(fixture('beehiiv_post.html'), 'https://lootbag.beehiiv.com/p/fed-target')
+
+    assert record['url'] == 'https://lootbag.beehiiv.com/p/fed-target'
+    assert record['title'] == "The Fed's 2% Target, Up Close"
+    assert record['author'] == 'Jane Writer'
+    assert record['date'] == '2024-03-18T13:00:00.000Z'
+    assert record['content'].splitlines() == [
+        'Subscribe to get every issue in your inbox.',
+        'Why 2%? It is a question the Fed rarely answers directly.',
+        'The target dates back to New Zealand in 1990, and it stuck & spread from there.',
+        'Inflation expectations',
+        'Measurement bias',
+    ]
+    assert 'Unsubscribe' not in record['content']
+
+
+def test_falls_back_to_author_class_and_missing_date():
+    record = parse_newsletter_html(fixture('author_class.html'), 'https://x.beehiiv.com/p/roundup')
+
+    assert record['title'] == 'Weekly Roundup #42'
+    assert record['author'] == 'Sam Editor'
+    assert record['date'] == ''
+
+
+def test_client_rendered_page_needs_browser():
+    assert parse_newsletter_html(fixture('client_rendered.html'), 'https://x.beehiiv.com/p/spa') is None
+    assert parse_newsletter_html('<html><body><p>No main</p></body></html>', 'https://x.beehiiv.com/p/none') is None
+
+
+def test_fetch_keeps_validators(fixture_server):
+    fetcher = HttpNewsletterFetcher()
+
+    record = fetcher.fetch(f"{fixture_server}/p/beehiiv_post")
+
+    assert record['title'] == "The Fed's 2% Target, Up Close"
+    assert record['etag'] == '"v1"'
+    assert record['last_modified'] == 'Mon, 18 Mar 2024 13:00:00 GMT'
+    assert fetcher.fetch(f"{fixture_server}/p/client_rendered") is None
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(f"{fixture_server}/p/missing")
+    fetcher.close()
+
+
+def test_http_path_scrapes_every_post(make_scraper, page_server, fake_browser):
+    scraper = make_scraper(fetch_mode='auto')
+
+    newsletters = scraper.process_multiple_urls(page_server.urls())
+
+    assert [n['url'] for n in newsletters] == page_server.urls()
+    assert newsletters[2]['title'] == 'Synthetic post 2'
+    assert newsletters[2]['author'] == 'Benchmark Author'
+    assert fake_browser.scraped == []
+
+
+def test_auto_falls_back_to_browser_for_client_rendered_pages(make_scraper, fixture_server, fake_browser):
+    urls = [f"{fixture_server}/p/beehiiv_post", f"{fixture_server}/p/client_rendered"]
+    scraper = make_scraper(fetch_mode='auto')
+
+    newsletters = scraper.process_multiple_urls(urls)
+
+    assert fake_browser.scraped == [urls[1]]
+    assert [n['title'] for n in newsletters] == ["The Fed's 2% Target, Up Close", 'Rendered']
+
+
+def test_auto_falls_back_to_browser_for_refused_http(make_scraper, fake_browser):
+    with PageServer(SyntheticArchive(posts=3, paragraphs=3), faults=Faults(status=403, fail_first=1)) as server:
+        scraper = make_scraper(fetch_mode='auto')
+
+        newsletters = scraper.process_multiple_urls(server.urls())
+
+        assert fake_browser.scraped == server.urls()
+        assert [n['title'] for n in newsletters] == ['Rendered'] * 3
+        assert scraper.failure_summary()['failed'] == 0
+
+
+def test_http_mode_never_launches_browser(make_scraper, fixture_server, fake_browser):
+    url = f"{fixture_server}/p/client_rendered"
+    scraper = make_scraper(fetch_mode='http')
+
+    assert scraper.process_multiple_urls([url]) == []
+    assert fake_browser.scraped == []
+    assert scraper.failure_summary()['urls'] == {url: 'no content'}
+
+
+def test_http_path_respects_per_host_concurrency(make_scraper):
+    faults = Faults(stall_rate=1.0, stall_seconds=0.05, seed=0)
+    with PageServer(SyntheticArchive(posts=12, paragraphs=3), faults=faults) as server:
+        scraper = make_scraper(fetch_mode='http', concurrency=8, per_host_concurrency=2, http_requests_per_second=0)
+        fetch, lock = scraper.http_fetcher.fetch, threading.Lock()
+        in_flight, peak = 0, 0
+
+        def counting_fetch(url):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            try:
+                return fetch(url)
+            finally:
+                with lock:
+                    in_flight -= 1
+
+        scraper.http_fetcher.fetch = counting_fetch
+        assert len(scraper.process_multiple_urls(server.urls())) == 12
+
+    assert peak == 2
@@ -0,0 +1,138 @@
+# tests/test_job_queue.py
+from benchmarks.page_server import PageServer, SyntheticArchive
+from benchmarks.fake_llm import FakeLLM
+from utils.vector_index import HashingEmbedder
+from utils.corpus_store import CorpusStore
+from utils.job_queue import JobQueue
+from job_runner import JobRunner
+import newsletter_ai
+import pytest
+import time
+import os
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    yield queue
+    queue.close()
+
+
+def test_claims_are_fair_across_tenants(queue):
+    for topic in ('a1', 'a2', 'a3'):
+        queue.submit('alpha', 'https://alpha.beehiiv.com', topic=topic)
+    queue.submit('beta', 'https://beta.beehiiv.com', topic='b1')
+
+    first = queue.claim('w1', max_per_tenant=1)
+    second = queue.claim('w2', max_per_tenant=1)
+
+    assert {first.tenant, second.tenant} == {'alpha', 'beta'}
+    # alpha already has a running job
+    assert queue.claim('w3', max_per_tenant=1) is None
+
+
+def test_expired_lease_is_recovered_but_live_one_is_not(queue):
+    expired_id = queue.submit('alpha', 'https://alpha.beehiiv.com', topic='crashed')
+    live_id = queue.submit('beta', 'https://beta.beehiiv.com', topic='running')
+    queue.claim('dead-worker', lease_seconds=0.01)
+    queue.claim('live-worker', lease_seconds=60)
+    time.sleep(0.05)
+
+    assert queue.recover() == 1
+
+    expired, live = queue.get(expired_id), queue.get(live_id)
+    assert (expired.status, expired.error, expired.worker) == ('queued', 'Interrupted; resumed', None)
+    assert live.status == 'running'
+    resumed = queue.claim('new-worker')
+    assert (resumed.id, resumed.attempts) == (expired_id, 2)
+
+
+def test_heartbeat_keeps_a_lease_alive(queue):
+    job_id = queue.submit('alpha', 'https://alpha.beehiiv.com')
+    queue.claim('worker', lease_seconds=0.05)
+    queue.heartbeat([job_id], lease_seconds=60)
+    time.sleep(0.1)
+
+    assert queue.recover() == 0
+    assert queue.get(job_id).status == 'running'
+
+
+def test_job_interrupted_too_often_fails(queue):
+    job_id = queue.submit('alpha', 'https://alpha.beehiiv.com', max_attempts=1)
+    queue.claim('dead-worker', lease_seconds=0.01)
+    time.sleep(0.05)
+
+    assert queue.recover() == 0
+    assert (queue.get(job_id).status, queue.get(job_id).error) == ('failed', 'Interrupted too many times')
+
+
+def test_failed_attempt_is_requeued_with_backoff(queue):
+    job_id = queue.submit('alpha', 'https://alpha.beehiiv.com', max_attempts=2)
+    queue.claim('worker')
+
+    assert queue.fail(job_id, 'boom', retry_delay=60) == 'queued'
+    assert queue.claim('worker') is None
+    assert queue.get(job_id).error == 'boom'
+
+
+class Embeddings:
+    def embed_documents(self, texts):
+        return HashingEmbedder()(texts)
+
+
+def test_runner_resumes_a_job_whose_lease_expired(tmp_path, queue, monkeypatch):
+    monkeypatch.setattr(newsletter_ai, 'get_embeddings', Embeddings)
+    llms = []
+
+    def llm_factory():
+        llms.append(FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=40))
+        return llms[-1]
+
+    with PageServer(SyntheticArchive(posts=5, paragraphs=4)) as server:
+        job_id = queue.submit('alpha', server.base_url, topic='Rate cuts')
+        queue.claim('dead-worker', lease_seconds=0.01)
+        time.sleep(0.05)
+
+        counts = JobRunner(queue, root=str(tmp_path / 'tenants'), workers=2, poll_interval=0.05,
+                           llm_factory=llm_factory).run(until_idle=True)
+
+    job = queue.get(job_id)
+    assert counts['done'] == 1 and counts['queued'] == counts['running'] == 0
+    assert (job.status, job.attempts, job.stage) == ('done', 2, 'write')
+    with open(job.result['output_path'], encoding='utf-8') as f:
+        assert f.read().strip()
+    assert os.path.exists(job.result['style_guide'])
+    assert sum(llm.calls for llm in llms) > 0
+    store = CorpusStore(str(tmp_path / 'tenants' / 'alpha' / 'newsletter_cache' / 'corpus.db'))
+    assert sorted(store.urls()) == sorted(server.urls())
+    assert {row['status'] for row in store.manifest()} == {'done'}
+    store.close()
+
+
+def test_every_job_closes_its_corpus_store(tmp_path, queue, monkeypatch):
+    monkeypatch.setattr(newsletter_ai, 'get_embeddings', Embeddings)
+    opened, closed = [], []
+    init, close = CorpusStore.__init__, CorpusStore.close
+
+    def tracked_init(self, path):
+        init(self, path)
+        opened.append(self)
+
+    def tracked_close(self):
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(CorpusStore, '__init__', tracked_init)
+    monkeypatch.setattr(CorpusStore, 'close', tracked_close)
+
+    with PageServer(SyntheticArchive(posts=3, paragraphs=3)) as server:
+        done = queue.submit('alpha', server.base_url, topic='Rate cuts')
+        # Nothing listens there, so this job fails after opening its store
+        failed = queue.submit('beta', 'http://127.0.0.1:9', topic='Rate cuts', max_attempts=1)
+        JobRunner(queue, root=str(tmp_path / 'tenants'), workers=2, poll_interval=0.05,
+                  llm_factory=lambda: FakeLLM(first_token_latency=0, tokens_per_second=10000,
+                                              response_tokens=20)).run(until_idle=True)
+
+    assert (queue.get(done).status, queue.get(failed).status) == ('done', 'failed')
+    assert len(opened) == 2
+    assert {id(store) for store in closed} == {id(store) for store in opened}
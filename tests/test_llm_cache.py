@@ -0,0 +1,102 @@
+# tests/test_llm_cache.py
+from langchain_core.outputs import Generation
+from benchmarks.fake_llm import FakeLLM
+from utils.llm_cache import PersistentLLMCache, cache_key, llm_string_for
+from newsletter_ai import NewsletterAI
+import time
+import pytest
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'llm_cache.db')
+
+
+def generations(text):
+    return [Generation(text=text)]
+
+
+def test_miss_then_hit_updates_stats(cache_path):
+    cache = PersistentLLMCache(cache_path)
+
+    assert cache.lookup('prompt', 'model') is None
+    cache.update('prompt', 'model', generations('answer'))
+    hit = cache.lookup('prompt', 'model')
+
+    assert [generation.text for generation in hit] == ['answer']
+    assert cache.lookup('prompt', 'other model') is None
+    assert cache.stats.as_dict() == {'hits': 1, 'misses': 2, 'evictions': 0, 'hit_rate': round(1 / 3, 4)}
+
+
+def test_llm_calls_go_through_the_cache(cache_path):
+    cache = PersistentLLMCache(cache_path)
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20, cache=cache)
+
+    first = llm.invoke('Describe the tone.')
+    second = llm.invoke('Describe the tone.')
+    llm.invoke('Describe the layout.')
+
+    assert first == second
+    assert llm.calls == 2
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+    assert cache.count() == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache_path):
+    cache = PersistentLLMCache(cache_path, max_entries=2)
+    cache.update('a', 'model', generations('A'))
+    time.sleep(0.01)
+    cache.update('b', 'model', generations('B'))
+    time.sleep(0.01)
+    cache.lookup('a', 'model')
+    time.sleep(0.01)
+
+    cache.update('c', 'model', generations('C'))
+
+    assert cache.count() == 2
+    assert cache.stats.evictions == 1
+    # 'b' was written after 'a' but 'a' was read since, so 'b' goes
+    assert cache.lookup('b', 'model') is None
+    assert cache.lookup('a', 'model') is not None
+    assert cache.lookup('c', 'model') is not None
+
+
+def test_eviction_respects_max_bytes(cache_path):
+    cache = PersistentLLMCache(cache_path, max_bytes=300)
+
+    for i in range(5):
+        cache.update(f"prompt {i}", 'model', generations('x' * 100))
+        time.sleep(0.01)
+
+    assert cache.count() == 2
+    assert cache.stats.evictions == 3
+    assert cache.lookup('prompt 4', 'model') is not None
+
+
+def test_entries_persist_across_instances(cache_path):
+    PersistentLLMCache(cache_path).update('prompt', 'model', generations('answer'))
+
+    reopened = PersistentLLMCache(cache_path)
+
+    assert [generation.text for generation in reopened.lookup('prompt', 'model')] == ['answer']
+    assert reopened.stats.hits == 1
+
+
+def test_deterministic_mode_keys_entries_apart_from_sampling(cache_path, monkeypatch):
+    monkeypatch.delenv('NEWSLETTER_LLM_PROVIDER', raising=False)
+    pytest.importorskip('langchain_ollama')
+    cache = PersistentLLMCache(cache_path)
+    greedy = NewsletterAI(llm_cache=cache, deterministic=True).llm
+    sampled = NewsletterAI(llm_cache=cache).llm
+
+    greedy_key = llm_string_for(greedy)
+    assert greedy_key != llm_string_for(sampled)
+    assert "('temperature', 0" in greedy_key and "('top_k', 1)" in greedy_key
+    assert "('model', " in greedy_key
+    assert cache_key('prompt', greedy_key) != cache_key('prompt', llm_string_for(sampled))
+
+    cache.update('prompt', greedy_key, generations('greedy answer'))
+    # A second run in deterministic mode reuses the entry; sampling does not
+    assert llm_string_for(NewsletterAI(llm_cache=cache, deterministic=True).llm) == greedy_key
+    assert cache.lookup('prompt', greedy_key) is not None
+    assert cache.lookup('prompt', llm_string_for(sampled)) is None
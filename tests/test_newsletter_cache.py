@@ -0,0 +1,42 @@
+# tests/test_newsletter_cache.py
+from utils.newsletter_cache import NewsletterCache, TTLPolicy, content_hash
+from datetime import datetime, timedelta
+
+
+def test_ttl_pins_old_posts_and_expires_recent_ones():
+    policy = TTLPolicy(fresh_ttl=timedelta(hours=6), pin_after=timedelta(days=14))
+    now = datetime.now()
+    recent = {'date': now.isoformat(), 'validated_at': (now - timedelta(hours=7)).isoformat()}
+    old = {'date': '2020-01-01T00:00:00', 'validated_at': '2020-01-02T00:00:00'}
+
+    assert not policy.is_fresh(recent)
+    assert policy.is_fresh({**recent, 'validated_at': (now - timedelta(hours=1)).isoformat()})
+    assert policy.ttl_for(old) is None and policy.is_fresh(old)
+
+
+def test_lookup_classifies_fresh_stale_and_missing(tmp_path):
+    cache = NewsletterCache(str(tmp_path), policy=TTLPolicy(fresh_ttl=timedelta(hours=1), pin_after=None))
+    cache.put('https://x.beehiiv.com/p/fresh', {'title': 'Fresh', 'content': 'body'})
+    cache.put('https://x.beehiiv.com/p/stale', {'title': 'Stale', 'content': 'body',
+                                                  'scraped_at': (datetime.now() - timedelta(hours=2)).isoformat()})
+
+    (fresh, is_fresh), (stale, stale_fresh), (missing, _) = cache.lookup_many(
+        ['https://x.beehiiv.com/p/fresh', 'https://x.beehiiv.com/p/stale', 'https://x.beehiiv.com/p/missing'])
+
+    assert is_fresh and fresh['content_hash'] == content_hash('body')
+    assert stale['title'] == 'Stale' and not stale_fresh
+    assert missing is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_stale_entries_are_revalidated_with_etags(make_scraper, page_server):
+    scraper = make_scraper(fetch_mode='http')
+    scraper.process_multiple_urls(page_server.urls())
+    requests_before = page_server.requests
+
+    newsletters = scraper.process_multiple_urls(page_server.urls(), revalidate=True)
+
+    assert len(newsletters) == len(page_server.urls())
+    assert page_server.requests - requests_before == len(page_server.urls())
+    assert page_server.not_modified == len(page_server.urls())
+    assert scraper.cache.stats.revalidated == len(page_server.urls())
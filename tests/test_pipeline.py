@@ -0,0 +1,140 @@
+# tests/test_pipeline.py
+from benchmarks.page_server import render_post
+from benchmarks.fake_llm import FakeLLM
+from utils.http_fetcher import parse_newsletter_html
+from utils.corpus_store import CorpusStore
+from utils.pipeline import ScrapeStream, StreamingStyleAnalyzer
+from newsletter_ai import NewsletterAI, format_newsletter
+import threading
+import time
+import pytest
+
+
+class FakeScraper:
+    """Stands in for BeehiivScraper: 'scrapes' each URL after ``delay`` seconds."""
+    def __init__(self, delay=0.0, fail_after=None, store=None):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.store = store
+        self.batches = []
+        self.written = []
+
+    def process_multiple_urls(self, urls, revalidate=False, on_result=None):
+        self.batches.append((list(urls), revalidate))
+        for url in urls:
+            if self.fail_after is not None and len(self.written) >= self.fail_after:
+                raise RuntimeError(f"scrape failed at {url}")
+            time.sleep(self.delay)
+            record = {'url': url, 'title': url.rsplit('/', 1)[-1], 'content': f"Body of {url}"}
+            if self.store:
+                self.store.upsert(record)
+            self.written.append(url)
+            on_result(url, record)
+
+
+def urls(*slugs):
+    return [f"https://x.beehiiv.com/p/{slug}" for slug in slugs]
+
+
+def test_stream_yields_records_in_job_order():
+    scraper = FakeScraper()
+
+    stream = ScrapeStream(scraper, [(urls('a', 'b'), False), ([], True), (urls('c'), True)])
+
+    assert [record['url'] for record in stream] == urls('a', 'b', 'c')
+    # Empty jobs are skipped; the revalidate flag goes with its own batch
+    assert scraper.batches == [(urls('a', 'b'), False), (urls('c'), True)]
+
+
+def test_stream_reraises_scrape_errors_after_the_records_before_them():
+    scraper = FakeScraper(fail_after=2)
+    stream = ScrapeStream(scraper, [(urls('a', 'b', 'c', 'd'), False)])
+    received = []
+
+    with pytest.raises(RuntimeError, match='scrape failed'):
+        for record in stream:
+            received.append(record['url'])
+
+    assert received == urls('a', 'b')
+    assert not stream._thread.is_alive()
+
+
+def test_close_waits_for_the_scrape_thread(tmp_path):
+    store = CorpusStore(str(tmp_path / 'corpus.db'))
+    scraper = FakeScraper(delay=0.05, store=store)
+    stream = ScrapeStream(scraper, [(urls(*'abcdef'), False), (urls(*'ghij'), True)], max_buffered=1)
+
+    first = next(iter(stream))
+    assert stream.close() is True
+
+    assert first['url'] == urls('a')[0]
+    assert not stream._thread.is_alive()
+    # The batch in progress finishes, the next job never starts and nothing is written afterwards
+    assert len(scraper.batches) == 1
+    written = store.count()
+    time.sleep(0.2)
+    assert store.count() == written == len(scraper.written)
+    store.close()
+
+
+def test_iter_newsletters_is_a_snapshot_while_another_thread_writes(tmp_path):
+    store = CorpusStore(str(tmp_path / 'corpus.db'))
+    store.upsert_many({'url': url, 'title': url, 'content': 'x', 'date': f"2024-01-{i + 1:02d}"}
+                      for i, url in enumerate(urls(*(f"old-{i}" for i in range(20)))))
+    writer_done = threading.Event()
+
+    def write():
+        for i in range(50):
+            # Dated after every stored post, so they would sort into the rest of the stream
+            store.upsert({'url': urls(f"new-{i}")[0], 'title': 'new', 'content': 'y',
+                          'date': f"2025-01-{i % 28 + 1:02d}"})
+        writer_done.set()
+
+    seen = []
+    for record in store.iter_newsletters(batch_size=3):
+        if not seen:
+            threading.Thread(target=write).start()
+            assert writer_done.wait(10)
+        seen.append(record['url'])
+
+    assert seen == urls(*(f"old-{i}" for i in range(20)))
+    assert store.count() == 70
+    store.close()
+
+
+@pytest.fixture
+def newsletters():
+    return [format_newsletter(parse_newsletter_html(render_post(i, 6), f"https://x.beehiiv.com/p/post-{i}"))
+            for i in range(16)]
+
+
+def test_streaming_analysis_matches_map_reduce(newsletters):
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20)
+    newsletter_ai = NewsletterAI(llm=llm)
+    analyzer = StreamingStyleAnalyzer(newsletter_ai, max_chunk_tokens=600, max_workers=4, max_pending=2)
+
+    for newsletter in newsletters:
+        analyzer.add(newsletter)
+    streamed = analyzer.finish(style_stats='Average sentence: 12 words')
+
+    assert analyzer.documents == len(newsletters)
+    # Same chunks in the same order, so the merge prompts and the deterministic answers match
+    assert streamed == newsletter_ai.analyze_style_map_reduce(newsletters, max_chunk_tokens=600, max_workers=4,
+                                                              style_stats='Average sentence: 12 words')
+
+
+def test_streaming_analysis_of_one_chunk_skips_the_reduce(newsletters):
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20)
+    analyzer = StreamingStyleAnalyzer(NewsletterAI(llm=llm), max_chunk_tokens=3000)
+
+    analyzer.add(newsletters[0])
+    analyzer.finish()
+
+    assert llm.calls == 1
+
+
+def test_streaming_analysis_without_newsletters_raises():
+    analyzer = StreamingStyleAnalyzer(NewsletterAI(llm=FakeLLM(tokens_per_second=10000)))
+
+    with pytest.raises(ValueError):
+        analyzer.finish()
@@ -0,0 +1,110 @@
+# tests/test_streaming.py
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from benchmarks.fake_llm import FakeLLM
+from utils.llm_cache import PersistentLLMCache
+from utils.generation_metrics import GenerationMetrics, StreamTimer
+from newsletter_ai import NewsletterAI
+from config import get_llm
+import utils.generation_metrics
+import threading
+import pytest
+import json
+
+CHUNKS = ['Rates ', 'are ', 'coming ', 'down, ', 'slowly.']
+
+
+@pytest.fixture
+def llm_cache(tmp_path):
+    return PersistentLLMCache(str(tmp_path / 'llm_cache.db'))
+
+
+@pytest.fixture
+def ollama_stub():
+    """Minimal Ollama server: /api/generate streams CHUNKS as NDJSON and records each request."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            requests.append((self.path, request))
+            lines = [{'model': request['model'], 'created_at': '2024-01-01T00:00:00Z', 'response': chunk,
+                      'done': False} for chunk in CHUNKS]
+            lines.append({'model': request['model'], 'created_at': '2024-01-01T00:00:00Z', 'response': '',
+                          'done': True, 'done_reason': 'stop', 'eval_count': len(CHUNKS)})
+            body = ''.join(json.dumps(line) + '\n' for line in lines).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = requests
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_from_ollama_is_cached_and_replayed(tmp_path, llm_cache, ollama_stub):
+    ai = NewsletterAI(llm=get_llm(model='stub-model', base_url=ollama_stub.base_url), llm_cache=llm_cache)
+    output_path = tmp_path / 'draft.txt'
+
+    first = list(ai.stream_newsletter('Be brief.', 'Rate cuts', output_path=str(output_path)))
+
+    # The closing 'done' message streams as an empty chunk
+    assert first == [*CHUNKS, '']
+    assert output_path.read_text(encoding='utf-8') == ''.join(CHUNKS)
+    assert len(ollama_stub.requests) == 1
+    path, request = ollama_stub.requests[0]
+    assert (path, request['model'], request['stream']) == ('/api/generate', 'stub-model', True)
+    assert 'Rate cuts' in request['prompt']
+    assert not ai.last_generation_metrics.stopped_early
+
+    replay = list(ai.stream_newsletter('Be brief.', 'Rate cuts'))
+
+    assert replay == [''.join(CHUNKS)]
+    assert len(ollama_stub.requests) == 1
+    # invoke shares the streamed entry
+    assert ai.write_newsletter('Be brief.', 'Rate cuts') == ''.join(CHUNKS)
+    assert len(ollama_stub.requests) == 1
+
+
+def test_stream_cut_short_is_not_cached(llm_cache):
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=50)
+    ai = NewsletterAI(llm=llm, llm_cache=llm_cache)
+
+    partial = ''.join(ai.stream_newsletter('Be brief.', 'Rate cuts', max_tokens=5))
+    assert ai.last_generation_metrics.stopped_early
+
+    full = ''.join(ai.stream_newsletter('Be brief.', 'Rate cuts'))
+    replay = list(ai.stream_newsletter('Be brief.', 'Rate cuts'))
+
+    assert llm.calls == 2
+    assert full.startswith(partial) and len(full) > len(partial)
+    assert replay == [full]
+
+
+def test_throughput_counts_the_tokens_after_the_first(monkeypatch):
+    # Request at 10.0 s, first token at 10.5 s, last of the five at 11.5 s
+    clock = iter([10.0, 10.5, 11.5])
+    monkeypatch.setattr(utils.generation_metrics, 'time', SimpleNamespace(perf_counter=lambda: next(clock)))
+
+    timer = StreamTimer()
+    for chunk in CHUNKS:
+        timer.record(chunk)
+    metrics = timer.finish()
+
+    assert (metrics.time_to_first_token, metrics.total_latency, metrics.tokens) == (0.5, 1.5, 5)
+    assert metrics.tokens_per_second == 4.0
+    assert metrics.as_dict()['tokens_per_second'] == 4.0
+
+
+def test_throughput_of_a_single_token_is_zero():
+    assert GenerationMetrics(time_to_first_token=0.5, total_latency=0.5, tokens=1).tokens_per_second == 0.0
+    assert GenerationMetrics(time_to_first_token=0.5, total_latency=0.7, tokens=1).tokens_per_second == 0.0
@@ -0,0 +1,74 @@
+# tests/test_style_analysis.py
+from benchmarks.page_server import render_post
+from benchmarks.fake_llm import FakeLLM
+from utils.http_fetcher import parse_newsletter_html
+from utils.chunking import chunk_texts
+from newsletter_ai import NewsletterAI, format_newsletter
+import threading
+import pytest
+
+
+class ProbeLLM(FakeLLM):
+    """FakeLLM that records how many requests were in flight at once."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        object.__setattr__(self, '_probe', {'active': 0, 'peak': 0, 'lock': threading.Lock()})
+
+    @property
+    def peak(self):
+        return self._probe['peak']
+
+    def _call(self, *args, **kwargs):
+        probe = self._probe
+        with probe['lock']:
+            probe['active'] += 1
+            probe['peak'] = max(probe['peak'], probe['active'])
+        try:
+            return super()._call(*args, **kwargs)
+        finally:
+            with probe['lock']:
+                probe['active'] -= 1
+
+
+@pytest.fixture
+def newsletters():
+    return [format_newsletter(parse_newsletter_html(render_post(i, 6), f"https://x.beehiiv.com/p/post-{i}"))
+            for i in range(24)]
+
+
+def test_map_reduce_runs_chunks_concurrently(newsletters):
+    llm = ProbeLLM(first_token_latency=0.05, tokens_per_second=10000, response_tokens=20)
+    chunks = chunk_texts(newsletters, max_tokens=600)
+    assert len(chunks) > 8
+
+    guide = NewsletterAI(llm=llm).analyze_style_map_reduce(newsletters, max_chunk_tokens=600, max_workers=4,
+                                                             merge_fan_in=4, style_stats='Average sentence: 12 words')
+
+    # One map call per chunk, then merges of up to 4 notes until one guide remains
+    merges = 0
+    notes = len(chunks)
+    while True:
+        notes = -(-notes // 4)
+        merges += notes
+        if notes == 1:
+            break
+    assert llm.calls == len(chunks) + merges
+    assert llm.peak == 4
+    assert guide.strip()
+
+
+def test_map_results_keep_input_order(newsletters):
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20)
+    chunks = chunk_texts(newsletters, max_tokens=600)
+
+    notes = NewsletterAI._invoke_all(llm, chunks, max_workers=4)
+
+    assert notes == [llm.invoke(chunk) for chunk in chunks]
+
+
+def test_single_chunk_skips_the_reduce(newsletters):
+    llm = ProbeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20)
+
+    NewsletterAI(llm=llm).analyze_style_map_reduce(newsletters[:1], max_chunk_tokens=3000)
+
+    assert llm.calls == 1
@@ -0,0 +1,114 @@
+# tests/test_style_guide_store.py
+from utils.style_guide_store import RebuildPolicy, StyleGuideArtifact, corpus_fingerprint
+from benchmarks.fake_llm import FakeLLM
+from newsletter_ai import NewsletterAI, refresh_style_guide
+import pytest
+
+
+def fingerprint(count, version='v1'):
+    return {f"https://x.beehiiv.com/p/post-{i}": f"{version}-{i}" for i in range(count)}
+
+
+def built_from(fingerprint, added_since_rebuild=0):
+    """Artifact covering ``fingerprint``, the last ``added_since_rebuild`` posts folded in incrementally."""
+    return StyleGuideArtifact(guide='Guide', fingerprint=dict(fingerprint),
+                              base_size=len(fingerprint) - added_since_rebuild,
+                              added_since_rebuild=added_since_rebuild)
+
+
+@pytest.fixture
+def policy():
+    return RebuildPolicy(max_added=10, max_drift=0.5)
+
+
+def test_no_artifact_rebuilds(policy):
+    plan = policy.plan(None, fingerprint(3))
+
+    assert (plan.action, len(plan.new_urls)) == ('rebuild', 3)
+
+
+def test_unchanged_corpus_skips(policy):
+    assert policy.plan(built_from(fingerprint(6)), fingerprint(6)).action == 'skip'
+
+
+def test_small_archive_growing_by_two_updates(policy):
+    plan = policy.plan(built_from(fingerprint(6)), fingerprint(8))
+
+    assert plan.action == 'update'
+    assert plan.new_urls == ['https://x.beehiiv.com/p/post-6', 'https://x.beehiiv.com/p/post-7']
+
+
+def test_drift_is_measured_against_the_current_corpus(policy):
+    # 6 posts rebuilt, 4 folded in since: 2 more are 6 of 12 posts, not 6 of the original 6
+    plan = policy.plan(built_from(fingerprint(10), added_since_rebuild=4), fingerprint(12))
+
+    assert plan.action == 'update'
+
+
+def test_changed_post_is_folded_in(policy):
+    current = fingerprint(12)
+    current['https://x.beehiiv.com/p/post-3'] = 'v2-3'
+
+    plan = policy.plan(built_from(fingerprint(12)), current)
+
+    assert (plan.action, plan.new_urls) == ('update', ['https://x.beehiiv.com/p/post-3'])
+
+
+def test_rebuilds_after_max_added_posts(policy):
+    plan = policy.plan(built_from(fingerprint(40), added_since_rebuild=8), fingerprint(42))
+
+    assert plan.action == 'rebuild'
+    assert plan.reason == '10 posts added since last rebuild'
+
+
+def test_rebuilds_when_most_of_the_corpus_changed(policy):
+    plan = policy.plan(built_from(fingerprint(12)), {**fingerprint(12), **fingerprint(7, version='v2')})
+
+    assert plan.action == 'rebuild'
+    assert plan.reason.startswith('corpus drift 58%')
+
+
+def test_removed_posts_rebuild(policy):
+    plan = policy.plan(built_from(fingerprint(12)), fingerprint(11))
+
+    assert (plan.action, plan.removed_urls) == ('rebuild', ['https://x.beehiiv.com/p/post-11'])
+
+
+def test_predict_treats_pending_posts_as_changed(policy):
+    artifact = built_from(fingerprint(8))
+
+    plan = policy.predict(artifact, list(fingerprint(8)), ['https://x.beehiiv.com/p/post-8'])
+
+    assert (plan.action, plan.new_urls) == ('update', ['https://x.beehiiv.com/p/post-8'])
+
+
+def test_artifact_round_trip(tmp_path):
+    artifact = built_from(fingerprint(3))
+    artifact.save(str(tmp_path / 'style_guide.json'))
+
+    loaded = StyleGuideArtifact.load(str(tmp_path / 'style_guide.json'))
+
+    assert loaded == artifact and loaded.digest == artifact.digest
+    assert StyleGuideArtifact.load(str(tmp_path / 'missing.json')) is None
+
+
+def newsletters(count):
+    return [{'url': url, 'title': f"Post {i}", 'date': '2024-01-01', 'author': 'A',
+             'content': f"Post number {i} talks about rates. It is short.\n\nA second paragraph.",
+             'content_hash': digest}
+            for i, (url, digest) in enumerate(fingerprint(count).items())]
+
+
+def test_refresh_style_guide_takes_the_incremental_path(tmp_path):
+    llm = FakeLLM(first_token_latency=0, tokens_per_second=10000, response_tokens=20)
+    ai, path = NewsletterAI(llm=llm), str(tmp_path / 'style_guide.json')
+
+    first = refresh_style_guide(ai, newsletters(6), path)
+    assert refresh_style_guide(ai, newsletters(6), path) == first
+    calls = llm.calls
+    refresh_style_guide(ai, newsletters(8), path)
+
+    artifact = StyleGuideArtifact.load(path)
+    assert llm.calls == calls + 1
+    assert (artifact.revision, artifact.base_size, artifact.added_since_rebuild) == (2, 6, 2)
+    assert artifact.fingerprint == corpus_fingerprint(newsletters(8))
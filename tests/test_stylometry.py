@@ -0,0 +1,130 @@
+# tests/test_stylometry.py
+from collections import Counter
+from utils.stylometry import STOPWORDS, TRANSITIONS, compute_style_profile
+import numpy as np
+import re
+import pytest
+
+CORPUS = [
+    "Rates fell again this week. However, the market barely moved!\n"
+    "Why? In other words, investors had priced it in.\n"
+    "- Bonds rallied\n- Stocks drifted\n"
+    "The bottom line: rate cuts are coming. Rate cuts are not a surprise.",
+    "Earnings season starts Monday. For example, the banks report first.\n"
+    "So what should you watch? Net interest margin. Then deposits.\n"
+    "1. Margins\n2. Deposits\n3. Guidance\n"
+    "Rate cuts squeeze margins, because deposits reprice slowly. Still, the banks look cheap!",
+    "A short one today.\n"
+    "Inflation cooled. That said, rents are sticky and services are not cooling fast.\n"
+    "Meanwhile the Fed waits. Rate cuts are coming, but not yet. Stay patient; stay diversified.",
+]
+
+
+def syllables(word):
+    groups = re.findall(r'[aeiouy]+', word)
+    silent_e = word.endswith('e') and not word.endswith('le') and len(groups) > 1
+    return max(len(groups) - silent_e, 1)
+
+
+def naive_profile(texts):
+    """The same statistics computed one document, sentence and word at a time."""
+    sentence_lengths, paragraph_lengths, ngrams = [], [], {2: Counter(), 3: Counter()}
+    words, transitions = [], Counter()
+    for text in texts:
+        doc_words = []
+        sentence = paragraph = 0
+        for token in re.findall(r"[a-z0-9]+(?:'[a-z]+)?|[.!?]+(?=\s)|\n", text.lower() + '\n'):
+            if token == '\n' or token[0] in '.!?':
+                if sentence:
+                    sentence_lengths.append(sentence)
+                sentence = 0
+                if token == '\n':
+                    if paragraph:
+                        paragraph_lengths.append(paragraph)
+                    paragraph = 0
+            else:
+                doc_words.append(token)
+                sentence += 1
+                paragraph += 1
+        for n in ngrams:
+            for i in range(len(doc_words) - n + 1):
+                window = doc_words[i:i + n]
+                if not all(word in STOPWORDS for word in window):
+                    ngrams[n][' '.join(window)] += 1
+        for phrase in TRANSITIONS:
+            parts = phrase.split()
+            transitions[phrase] += sum(doc_words[i:i + len(parts)] == parts for i in range(len(doc_words)))
+        words.extend(doc_words)
+    return {
+        'words': len(words),
+        'sentence_lengths': sentence_lengths,
+        'paragraph_lengths': paragraph_lengths,
+        'syllables': sum(syllables(word) for word in words),
+        'transitions': {phrase: round(count * 1000 / len(words), 2) for phrase, count in transitions.items() if count},
+        'bigrams': {(phrase, count) for phrase, count in ngrams[2].items() if count >= 2},
+        'trigrams': {(phrase, count) for phrase, count in ngrams[3].items() if count >= 2},
+    }
+
+
+@pytest.fixture
+def profiles():
+    return compute_style_profile(CORPUS, top_n=50, top_transitions=50), naive_profile(CORPUS)
+
+
+def summary(values):
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {'mean': round(float(np.mean(values)), 1), 'median': round(float(median), 1),
+            'p10': round(float(p10), 1), 'p90': round(float(p90), 1)}
+
+
+def test_lengths_match_a_per_document_count(profiles):
+    profile, naive = profiles
+
+    assert profile.documents == len(CORPUS)
+    assert profile.words == naive['words']
+    assert profile.sentence_words == summary(naive['sentence_lengths'])
+    assert profile.paragraph_words == summary(naive['paragraph_lengths'])
+    assert profile.paragraphs_per_post == round(np.mean([len(text.split('\n')) for text in CORPUS]), 1)
+
+
+def test_shares_and_readability_match_a_per_document_count(profiles):
+    profile, naive = profiles
+    sentences = len(naive['sentence_lengths'])
+    paragraphs = [p for text in CORPUS for p in text.split('\n')]
+    words_per_sentence = naive['words'] / sentences
+    syllables_per_word = naive['syllables'] / naive['words']
+
+    assert profile.list_line_share == round(sum(re.match(r'(?:-|\d+\.) ', p) is not None
+                                                for p in paragraphs) / len(paragraphs), 3)
+    assert profile.question_share == round(sum(text.count('?') for text in CORPUS) / sentences, 3)
+    assert profile.exclamation_share == round(sum(text.count('!') for text in CORPUS) / sentences, 3)
+    assert profile.flesch_reading_ease == round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1)
+    assert profile.flesch_kincaid_grade == round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 1)
+
+
+def test_transitions_match_a_per_document_search(profiles):
+    profile, naive = profiles
+
+    assert profile.transitions == naive['transitions']
+    assert {'however', 'in other words', 'that said', 'the bottom line'} <= set(profile.transitions)
+
+
+def test_ngrams_match_a_per_document_count(profiles):
+    profile, naive = profiles
+
+    assert set(profile.bigrams) == naive['bigrams']
+    assert set(profile.trigrams) == naive['trigrams']
+    assert ('rate cuts', 4) in profile.bigrams and ('rate cuts are', 3) in profile.trigrams
+    counts = [count for _, count in profile.bigrams]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_ngrams_do_not_span_posts():
+    # Across post boundaries 'alpha beta' and 'beta gamma' would each occur twice
+    profile = compute_style_profile(['alpha beta', 'gamma alpha', 'beta gamma'])
+
+    assert profile.bigrams == []
+
+
+def test_empty_corpus_gives_an_empty_profile():
+    assert compute_style_profile(['', '   ']).documents == 0
@@ -0,0 +1,155 @@
+# tests/test_task_graph.py
+from utils.task_graph import TaskGraph, TaskOutputCache, task_key
+import threading
+import time
+import pytest
+
+
+class StubTask:
+    """Quacks like a crewai.Task: ``execute_sync`` returns an output after ``delay`` seconds."""
+    log = []
+    lock = threading.Lock()
+
+    def __init__(self, name, description, delay=0.0, fail=False):
+        self.name = name
+        self.description = description
+        self.expected_output = 'text'
+        self.agent = None
+        self.delay = delay
+        self.fail = fail
+
+    def execute_sync(self):
+        with self.lock:
+            self.log.append(('start', self.name, time.perf_counter()))
+        time.sleep(self.delay)
+        with self.lock:
+            self.log.append(('end', self.name, time.perf_counter()))
+        if self.fail:
+            raise RuntimeError(f"{self.name} broke")
+        return f"output of {self.name}"
+
+
+@pytest.fixture(autouse=True)
+def task_log():
+    StubTask.log = []
+    return StubTask.log
+
+
+def stub(name, delay=0.0, fail=False):
+    """Factory that builds a StubTask whose prompt embeds the dependency outputs."""
+    return lambda outputs: StubTask(name, f"{name} from {sorted(outputs.items())}", delay=delay, fail=fail)
+
+
+def events(log, kind):
+    return {name: at for event, name, at in log if event == kind}
+
+
+def test_tasks_run_after_their_dependencies(task_log):
+    received = {}
+
+    def draft(outputs):
+        received.update(outputs)
+        return StubTask('draft', 'draft')
+
+    graph = TaskGraph(max_workers=4)
+    graph.add('style_guide', stub('style_guide', delay=0.05))
+    graph.add('outline', stub('outline', delay=0.02), depends_on=['style_guide'])
+    graph.add('draft', draft, depends_on=['style_guide', 'outline'])
+
+    results = graph.run()
+
+    assert list(results) == ['style_guide', 'outline', 'draft']
+    assert all(result.status == 'ok' for result in results.values())
+    starts, ends = events(task_log, 'start'), events(task_log, 'end')
+    assert starts['outline'] >= ends['style_guide']
+    assert starts['draft'] >= max(ends['style_guide'], ends['outline'])
+    # Factories get the outputs of their dependencies
+    assert received == {'style_guide': 'output of style_guide', 'outline': 'output of outline'}
+
+
+def test_independent_tasks_run_concurrently(task_log):
+    graph = TaskGraph(max_workers=4)
+    graph.add('style_guide', stub('style_guide'))
+    for i in range(4):
+        graph.add(f"write_{i}", stub(f"write_{i}", delay=0.2), depends_on=['style_guide'])
+
+    start = time.perf_counter()
+    results = graph.run()
+    wall_time = time.perf_counter() - start
+
+    assert wall_time < 0.6
+    starts, ends = events(task_log, 'start'), events(task_log, 'end')
+    writes = [f"write_{i}" for i in range(4)]
+    # Every draft started before the first one finished
+    assert max(starts[name] for name in writes) < min(ends[name] for name in writes)
+    assert TaskGraph.report(results, wall_time)['parallel_speedup'] > 2
+
+
+def test_dependents_of_a_failed_task_are_skipped():
+    graph = TaskGraph(max_workers=2)
+    graph.add('style_guide', stub('style_guide', fail=True))
+    graph.add('draft', stub('draft'), depends_on=['style_guide'])
+    graph.add('review', stub('review'), depends_on=['draft'])
+    graph.add('research', stub('research'))
+
+    results = graph.run()
+
+    assert results['style_guide'].status == 'failed' and 'broke' in results['style_guide'].error
+    assert results['draft'].status == 'skipped' and 'style_guide' in results['draft'].error
+    assert results['review'].status == 'skipped'
+    assert results['research'].status == 'ok'
+    report = TaskGraph.report(results, 1.0)
+    assert (report['succeeded'], report['failed'], report['skipped']) == (1, 1, 2)
+
+
+def test_unknown_or_duplicate_tasks_are_rejected():
+    graph = TaskGraph()
+    graph.add('style_guide', stub('style_guide'))
+
+    with pytest.raises(ValueError, match='unknown'):
+        graph.add('draft', stub('draft'), depends_on=['outline'])
+    with pytest.raises(ValueError, match='Duplicate'):
+        graph.add('style_guide', stub('style_guide'))
+
+
+def test_cached_outputs_are_reused_after_a_failed_run(tmp_path, task_log):
+    cache = TaskOutputCache(str(tmp_path / 'crew_cache.db'))
+    broken = TaskGraph(cache=cache)
+    broken.add('style_guide', stub('style_guide'))
+    broken.add('draft', stub('draft', fail=True), depends_on=['style_guide'])
+    assert broken.run()['draft'].status == 'failed'
+
+    task_log.clear()
+    graph = TaskGraph(cache=cache)
+    graph.add('style_guide', stub('style_guide'))
+    graph.add('draft', stub('draft'), depends_on=['style_guide'])
+    results = graph.run()
+
+    assert results['style_guide'].status == 'cached'
+    assert results['style_guide'].output == 'output of style_guide'
+    assert results['draft'].status == 'ok'
+    assert [name for event, name, _ in task_log if event == 'start'] == ['draft']
+
+
+def test_task_key_separates_names_and_prompts():
+    task = StubTask('draft', 'Write about rates')
+
+    assert task_key(task, 'draft_1') == task_key(StubTask('draft', 'Write about rates'), 'draft_1')
+    assert task_key(task, 'draft_1') != task_key(task, 'draft_2')
+    assert task_key(task, 'draft_1') != task_key(StubTask('draft', 'Write about jobs'), 'draft_1')
+
+
+def test_crew_graph_fans_out_writing_tasks(monkeypatch, tmp_path):
+    pytest.importorskip('crewai')
+    monkeypatch.setenv('NEWSLETTER_LLM_PROVIDER', 'fake')
+    from crew import build_graph
+    newsletters = [{'url': f"https://x.beehiiv.com/p/post-{i}", 'title': f"Post {i}", 'subtitle': '', 'date': '',
+                    'author': 'Ed', 'content': f"Rates moved again in week {i}. Markets noticed. " * 20} for i in range(3)]
+
+    graph = build_graph(newsletters, ['Rate cuts', 'Jobs report'], drafts=2,
+                        cache=TaskOutputCache(str(tmp_path / 'crew_cache.db')))
+
+    writes = ['write_01_rate_cuts_draft1', 'write_01_rate_cuts_draft2',
+              'write_02_jobs_report_draft1', 'write_02_jobs_report_draft2']
+    assert list(graph._factories) == ['style_guide', *writes]
+    assert all(graph._depends_on[name] == ['style_guide'] for name in writes)
@@ -0,0 +1,96 @@
+# tests/test_vector_index.py
+from utils.vector_index import HashingEmbedder, VectorIndex, format_passages
+import newsletter_ai
+import pytest
+
+RATES = ("The Federal Reserve held interest rates steady again, and bond markets priced in two cuts "
+         "before the end of the year as inflation cooled.")
+MORTGAGES = ("Mortgage rates follow the ten-year Treasury yield more than the Federal Reserve, which is "
+             "why interest rates on home loans barely moved.")
+COFFEE = ("Coffee futures doubled after a poor harvest in Brazil and Vietnam, and roasters are passing "
+          "the higher bean prices on to cafes.")
+CHIPS = ("Chip makers are racing to add packaging capacity because every new accelerator needs stacks "
+         "of high-bandwidth memory next to the processor.")
+
+
+def newsletter(slug, *paragraphs):
+    content = '\n'.join(paragraphs)
+    return {'url': f"https://example.beehiiv.com/p/{slug}", 'title': slug.title(), 'date': '2024-01-01',
+            'content': content, 'content_hash': str(hash(content))}
+
+
+@pytest.fixture
+def corpus():
+    return [newsletter('rates', RATES, MORTGAGES), newsletter('coffee', COFFEE), newsletter('chips', CHIPS)]
+
+
+def test_search_ranks_the_matching_post_first(tmp_path, corpus):
+    index = VectorIndex(str(tmp_path), embed=HashingEmbedder())
+    assert index.update(corpus) == 4
+
+    results = index.search('what the federal reserve does with interest rates', k=3)
+
+    assert [result['url'] for result in results[:2]] == [corpus[0]['url']] * 2
+    assert results[0]['text'] == RATES
+    assert results[0]['score'] > results[2]['score']
+    assert index.search('coffee bean prices after the harvest', k=1)[0]['url'] == corpus[1]['url']
+
+
+def test_search_caps_passages_per_post(tmp_path, corpus):
+    index = VectorIndex(str(tmp_path), embed=HashingEmbedder())
+    index.update(corpus)
+
+    results = index.search('federal reserve interest rates', k=3, max_per_post=1)
+
+    assert len({result['url'] for result in results}) == 3
+
+
+def test_update_only_embeds_changed_posts_and_persists(tmp_path, corpus):
+    embed = HashingEmbedder()
+    calls = []
+    index = VectorIndex(str(tmp_path), embed=lambda texts: calls.append(len(texts)) or embed(texts))
+    index.update(corpus)
+    assert index.update(corpus) == 0
+
+    corpus[1] = newsletter('coffee', COFFEE, 'Cocoa is following coffee higher, for the same reasons: '
+                                             'bad weather in the growing regions and thin inventories.')
+    assert index.update(corpus[:2]) == 2
+    assert len(index) == 4
+
+    reloaded = VectorIndex(str(tmp_path), embed=embed)
+    assert len(reloaded) == 4
+    assert reloaded.search('cocoa inventories', k=1)[0]['url'] == corpus[1]['url']
+    assert all(result['url'] != "https://example.beehiiv.com/p/chips"
+               for result in reloaded.search('chip packaging memory', k=4))
+
+
+class Embeddings:
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+        self.embed = HashingEmbedder()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ConnectionError('embedding model unavailable')
+        return self.embed(texts)
+
+
+def test_build_retriever_formats_references(tmp_path, corpus, monkeypatch):
+    monkeypatch.setattr(newsletter_ai, 'get_embeddings', lambda: Embeddings())
+    retrieve = newsletter_ai.build_retriever(corpus, index_dir=str(tmp_path), k=1)
+
+    references = retrieve('the federal reserve held rates steady')
+
+    assert references == format_passages([{'title': 'Rates', 'text': RATES}])
+
+
+def test_build_retriever_writes_without_references_when_embedding_fails(tmp_path, corpus, monkeypatch):
+    monkeypatch.setattr(newsletter_ai, 'get_embeddings', lambda: Embeddings(fail_after=0))
+    assert newsletter_ai.build_retriever(corpus, index_dir=str(tmp_path / 'index'))('rates') is None
+
+    # Indexing worked but the model went away before the topic was embedded
+    monkeypatch.setattr(newsletter_ai, 'get_embeddings', lambda: Embeddings(fail_after=1))
+    retrieve = newsletter_ai.build_retriever(corpus, index_dir=str(tmp_path / 'index'))
+    assert retrieve('federal reserve interest rates') is None
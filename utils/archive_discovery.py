@@ -0,0 +1,153 @@
+# utils/archive_discovery.py
+from typing import Dict, List, Optional, Tuple
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree
+from utils.corpus_store import CorpusStore, UNFINISHED_STATUSES, publication_for
+from utils.newsletter_cache import parse_datetime
+from utils.scrape_engine import USER_AGENT
+import requests
+
+
+def _local_name(tag: str) -> str:
+    """Strip an XML namespace, e.g. '{http://...}loc' -> 'loc'."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _rfc822_to_iso(value: str) -> Optional[str]:
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+class ArchiveDiscovery:
+    """Discovers a publication's posts from its sitemap and RSS feed.
+
+    Instead of a hardcoded URL list, discovery lists every post the publication
+    advertises together with its last-modified time, and diffs that against the
+    corpus store so only new or changed posts are queued for scraping.
+
+    Attributes:
+        base_url (str): Publication root, e.g. 'https://lootbag.beehiiv.com'.
+        store (CorpusStore): Corpus store to diff against.
+        sitemap_url (Optional[str]): Sitemap location (defaults to '<base_url>/sitemap.xml').
+        feed_url (Optional[str]): RSS feed location; Beehiiv feeds live on their own host,
+            so this is opt-in.
+        post_path (str): Path prefix identifying post URLs.
+    Example:
+        >>> discovery = ArchiveDiscovery('https://lootbag.beehiiv.com', scraper.store)
+        >>> new_urls, changed_urls = discovery.pending_urls()
+    """
+    def __init__(self, base_url: str, store: CorpusStore, sitemap_url: Optional[str] = None,
+                 feed_url: Optional[str] = None, post_path: str = '/p/', timeout: float = 15.0,
+                 verbose: bool = False):
+        self.base_url = base_url.rstrip('/')
+        self.store = store
+        self.sitemap_url = sitemap_url or urljoin(self.base_url + '/', 'sitemap.xml')
+        self.feed_url = feed_url
+        self.post_path = post_path
+        self.timeout = timeout
+        self.verbose = verbose
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+    def _get_xml(self, url: str) -> Optional[ElementTree.Element]:
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return ElementTree.fromstring(response.content)
+        except (requests.RequestException, ElementTree.ParseError) as e:
+            if self.verbose:
+                print(f"Discovery error for {url}: {str(e)}")
+            return None
+
+    def fetch_sitemap(self, url: Optional[str] = None, depth: int = 0) -> Dict[str, Optional[str]]:
+        """Return ``{post_url: lastmod}`` from a sitemap, following sitemap indexes."""
+        root = self._get_xml(url or self.sitemap_url)
+        if root is None:
+            return {}
+        posts = {}
+        for entry in root:
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in entry}
+            if not fields.get('loc'):
+                continue
+            if _local_name(entry.tag) == 'sitemap':
+                if depth < 2:
+                    posts.update(self.fetch_sitemap(fields['loc'], depth + 1))
+            else:
+                posts[fields['loc']] = fields.get('lastmod') or None
+        return posts
+
+    def fetch_feed(self) -> Dict[str, Optional[str]]:
+        """Return ``{post_url: published}`` from the RSS feed, if one is configured."""
+        if not self.feed_url:
+            return {}
+        root = self._get_xml(self.feed_url)
+        if root is None:
+            return {}
+        posts = {}
+        for item in root.iter():
+            if _local_name(item.tag) != 'item':
+                continue
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in item}
+            if fields.get('link'):
+                posts[fields['link']] = _rfc822_to_iso(fields.get('pubDate', ''))
+        return posts
+
+    def discover(self) -> Dict[str, Optional[str]]:
+        """List every advertised post of this publication with its newest known timestamp."""
+        host = urlparse(self.base_url).netloc
+        posts: Dict[str, Optional[str]] = {}
+        for source in (self.fetch_sitemap(), self.fetch_feed()):
+            for url, stamp in source.items():
+                parsed = urlparse(url)
+                if parsed.netloc != host or not parsed.path.startswith(self.post_path):
+                    continue
+                known = posts.get(url)
+                stamp_time = parse_datetime(stamp) if stamp else None
+                known_time = parse_datetime(known) if known else None
+                if stamp_time and (known_time is None or stamp_time > known_time):
+                    posts[url] = stamp
+                else:
+                    posts.setdefault(url, known)
+        if self.verbose:
+            print(f"Discovered {len(posts)} posts for {self.base_url}")
+        return posts
+
+    def pending_urls(self) -> Tuple[List[str], List[str]]:
+        """Diff discovered posts against the store.
+
+        Returns:
+            Tuple[List[str], List[str]]: ``(new_urls, changed_urls)``. A post counts as
+                changed when its advertised timestamp is newer than the time we last
+                validated it. URLs an earlier scrape left unfinished (see the store's scrape
+                manifest) are included even when discovery no longer lists them, e.g.
+                because the sitemap request failed; posts found gone (404/410) are skipped
+                until they are advertised with a newer timestamp.
+        """
+        posts = self.discover()
+        manifest = {row['url']: row for row in self.store.manifest(publication_for(self.base_url),
+                                                                    (*UNFINISHED_STATUSES, 'gone'))}
+        for url, row in manifest.items():
+            if row['status'] != 'gone':
+                posts.setdefault(url, None)
+        cached = self.store.get_many(list(posts))
+        new_urls, changed_urls = [], []
+        for url, stamp in posts.items():
+            entry = cached.get(url)
+            advertised = parse_datetime(stamp) if stamp else None
+            row = manifest.get(url)
+            if row and row['status'] == 'gone':
+                gone_at = parse_datetime(row['updated_at'])
+                if not (advertised and gone_at and advertised > gone_at):
+                    continue
+            if entry is None:
+                new_urls.append(url)
+                continue
+            validated = parse_datetime(entry.get('validated_at') or entry.get('scraped_at') or '')
+            if (advertised and (validated is None or advertised > validated)) or row:
+                changed_urls.append(url)
+        if self.verbose and manifest:
+            print(f"Resuming {sum(row['status'] != 'gone' for row in manifest.values())} unfinished URLs")
+        return new_urls, changed_urls
@@ -0,0 +1,139 @@
+# utils/batch_writer.py
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+from utils.tracing import tracer
+import contextvars
+import random
+import json
+import time
+import os
+import re
+
+
+def load_topics(path: str) -> List[str]:
+    """Read one topic per line, ignoring blank lines and '#' comments."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def slugify(text: str, max_length: int = 60) -> str:
+    """Turn a topic into a filesystem-safe slug, e.g. 'Chips Ahoy!' -> 'chips_ahoy'."""
+    slug = re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+    return slug[:max_length].rstrip('_') or 'untitled'
+
+
+@dataclass
+class TopicResult:
+    """Outcome of generating one article in a batch.
+
+    Attributes:
+        topic (str): The requested topic.
+        status (str): 'ok' or 'failed'.
+        output_path (Optional[str]): Where the article was written.
+        latency (float): Seconds spent on this topic, including retries.
+        attempts (int): Number of generation attempts.
+        error (Optional[str]): Last error for failed topics.
+    """
+    topic: str
+    status: str
+    output_path: Optional[str] = None
+    latency: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class BatchWriter:
+    """Generates articles for many topics concurrently from one style guide.
+
+    Each topic runs on a bounded thread pool against the LLM endpoint and is
+    retried with exponential backoff and jitter. Every article gets its own file
+    in ``output_dir`` and a JSON summary report is written alongside.
+
+    Attributes:
+        newsletter_ai (NewsletterAI): The writer.
+        output_dir (str): Directory for articles and the report.
+        max_workers (int): Concurrent generations.
+        max_retries (int): Retries per topic after the first attempt.
+        backoff (float): Base delay in seconds for exponential backoff.
+        retrieve (Callable, optional): Maps a topic to reference passages for its prompt.
+    Example:
+        >>> writer = BatchWriter(NewsletterAI(), output_dir='generated', max_workers=3)
+        >>> results = writer.run(style_guide, load_topics('topics.txt'))
+    """
+    def __init__(self, newsletter_ai, output_dir: str = 'generated', max_workers: int = 3,
+                 max_retries: int = 2, backoff: float = 2.0,
+                 retrieve: Optional[Callable[[str], Optional[str]]] = None):
+        self.newsletter_ai = newsletter_ai
+        self.output_dir = output_dir
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retrieve = retrieve
+
+    def _output_path(self, index: int, topic: str) -> str:
+        return os.path.join(self.output_dir, f"{index:02d}_{slugify(topic)}.txt")
+
+    def _write_one(self, index: int, style_guide: str, topic: str) -> TopicResult:
+        start = time.perf_counter()
+        result = TopicResult(topic=topic, status='failed')
+        references, retrieved = None, not self.retrieve
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            if attempt:
+                tracer.count('batch.retries')
+            try:
+                # Inside the retry so a failing retriever fails this topic, not the whole batch
+                if not retrieved:
+                    references, retrieved = self.retrieve(topic), True
+                article = self.newsletter_ai.write_newsletter(style_guide=style_guide, topic=topic,
+                                                              references=references)
+                output_path = self._output_path(index, topic)
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(article)
+                result.status, result.output_path, result.error = 'ok', output_path, None
+                break
+            except Exception as e:
+                result.error = str(e)
+                print(f"Attempt {attempt + 1} failed for '{topic}': {str(e)}")
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+        result.latency = time.perf_counter() - start
+        return result
+
+    def run(self, style_guide: str, topics: List[str], report_name: str = 'batch_report.json') -> List[TopicResult]:
+        """Generate every topic and write the summary report.
+
+        Returns:
+            List[TopicResult]: One result per topic, in input order.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Copy the context so each topic's spans nest under the caller's span
+            futures = [pool.submit(contextvars.copy_context().run, self._write_one, i, style_guide, topic)
+                       for i, topic in enumerate(topics, 1)]
+            results = []
+            for future in futures:
+                result = future.result()
+                mark = '✓' if result.status == 'ok' else '✗'
+                print(f"[{len(results) + 1}/{len(topics)}] {mark} {result.topic} ({result.latency:.1f}s)")
+                results.append(result)
+
+        report = self.summarize(results, time.perf_counter() - start)
+        with open(os.path.join(self.output_dir, report_name), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return results
+
+    @staticmethod
+    def summarize(results: List[TopicResult], wall_time: float) -> Dict:
+        latencies = sorted(result.latency for result in results)
+        return {
+            'topics': len(results),
+            'succeeded': sum(result.status == 'ok' for result in results),
+            'failed': sum(result.status != 'ok' for result in results),
+            'wall_time': round(wall_time, 3),
+            'mean_latency': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'max_latency': round(latencies[-1], 3) if latencies else 0.0,
+            'results': [asdict(result) for result in results]
+        }
@@ -1,148 +1,428 @@
 # utils/beehiiv_scraper.py
-from playwright.sync_api import sync_playwright, TimeoutError
 from typing import Dict, Optional, Callable, List
+from collections import Counter
 from datetime import datetime
-import time
-import os
-import json
+from utils.scrape_engine import AsyncScrapeEngine, TokenBucket, EXTRACT_JS, USER_AGENT, VIEWPORT
+from utils.http_fetcher import HttpNewsletterFetcher
+from utils.newsletter_cache import NewsletterCache, TTLPolicy, content_hash
+from utils.resilience import (RetryPolicy, CircuitBreakers, HTTPStatusError, NoContentError, retry_call,
+                              aretry_call, describe_error, is_gone, is_host_failure)
+from utils.tracing import tracer
+from urllib.parse import urlparse
+import contextlib
+import asyncio
 
 class BeehiivScraper:
-    def __init__(self, cache_dir: str = 'newsletter_cache', verbose: bool = False):
-        """Initialize scraper with caching directory and verbosity setting"""
+    def __init__(self, cache_dir: str = 'newsletter_cache', verbose: bool = False,
+                 concurrency: int = 4, per_host_concurrency: int = 2,
+                 requests_per_second: float = 2.0, fetch_mode: str = 'auto',
+                 http_requests_per_second: float = 10.0, cache_policy: Optional[TTLPolicy] = None,
+                 retry_policy: Optional[RetryPolicy] = None, breakers: Optional[CircuitBreakers] = None):
+        """Initialize scraper with caching directory, verbosity and concurrency settings.
+
+        Args:
+            cache_dir (str): Directory holding the corpus database (corpus.db).
+            verbose (bool): Print per-URL diagnostics.
+            concurrency (int): Number of pooled browser pages used by process_multiple_urls.
+            per_host_concurrency (int): Maximum in-flight requests against a single host, on the
+                HTTP and browser paths alike.
+            requests_per_second (float): Token-bucket rate per host; <= 0 disables rate limiting.
+            fetch_mode (str): 'auto' tries a plain HTTP fetch first and falls back to Playwright
+                when ``main`` is missing or empty; 'http' never launches a browser; 'browser'
+                always uses Playwright.
+            http_requests_per_second (float): Token-bucket rate per host for the HTTP path.
+            cache_policy (TTLPolicy, optional): When cached posts are revalidated; defaults to a
+                one-day TTL with posts older than 30 days pinned.
+            retry_policy (RetryPolicy, optional): Backoff for timeouts, dropped connections and
+                retryable statuses; defaults to 4 attempts with jittered exponential backoff.
+            breakers (CircuitBreakers, optional): Per-host circuit breakers shared by the HTTP and
+                browser paths; defaults to opening after 5 consecutive failures for 30 seconds.
+        """
+        if fetch_mode not in ('auto', 'http', 'browser'):
+            raise ValueError(f"Unknown fetch_mode: {fetch_mode}")
         self.cache_dir = cache_dir
         self.verbose = verbose
-        os.makedirs(cache_dir, exist_ok=True)
+        self.concurrency = concurrency
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.requests_per_second = requests_per_second
+        self.fetch_mode = fetch_mode
+        self.http_requests_per_second = http_requests_per_second
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or CircuitBreakers()
+        self.failures: Dict[str, BaseException] = {}
+        self._http_fetcher: Optional[HttpNewsletterFetcher] = None
+        self.cache = NewsletterCache(cache_dir, policy=cache_policy, verbose=verbose)
+        self.store = self.cache.store
     
-    def _get_cache_filename(self, url: str) -> str:
-        """Convert a URL into a valid filename for caching.
-
-        This method takes a URL and converts it into a safe filename that can be used
-        for caching the scraped content. It replaces hyphens with underscores and 
-        appends .json extension.
+    def _load_from_cache(self, url: str) -> Optional[Dict]:
+        entry, fresh = self.cache.lookup(url)
+        if entry is None or fresh:
+            return entry
+        return self._revalidate(url, entry)
 
-        Args:
-            url (str): The URL to convert into a filename
+    def _revalidate(self, url: str, entry: Dict) -> Optional[Dict]:
+        """Revalidate a stale cache entry with a conditional request, retrying transient errors.
 
         Returns:
-            str: The sanitized filename path within the cache directory
-
-        Example:
-            >>> _get_cache_filename("https://example.com/page-name")
-            "/cache/dir/page_name.json"
+            Optional[Dict]: The cached entry when the server reports it unchanged (304 or
+                identical content hash), the freshly fetched record when it changed, or None
+                when the URL has to be scraped again.
         """
-        # Take the last part of the URL and sanitize it
-        safe_name = url.split('/')[-1].replace('-', '_')
-        return os.path.join(self.cache_dir, f"{safe_name}.json")
-    
-    def _load_from_cache(self, url: str) -> Optional[Dict]:
-        cache_file = self._get_cache_filename(url)
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    cache_time = datetime.fromisoformat(data['scraped_at'])
-                    if (datetime.now() - cache_time).days < 1:
-                        if self.verbose:  # Move behind verbose flag
-                            print(f"Loading from cache: {url}")
-                        return data
-            except Exception as e:
-                if self.verbose:  # Move behind verbose flag
-                    print(f"Cache read error: {str(e)}")
+        try:
+            return retry_call(lambda: self._revalidate_once(url, entry), self.retry_policy,
+                              self.breakers.for_url(url))
+        except Exception as e:
+            if self.verbose:
+                print(f"Revalidation error for {url}: {str(e)}")
+            self.cache.record_miss()
+            return None
+
+    def _revalidate_once(self, url: str, entry: Dict) -> Optional[Dict]:
+        """One conditional request; raises on request errors so callers can retry."""
+        not_modified, data = self.http_fetcher.revalidate(url, entry.get('etag'), entry.get('last_modified'))
+        if not_modified or (data and content_hash(data['content']) == entry['content_hash']):
+            validators = data or {}
+            return self.cache.mark_revalidated(url, entry, validators.get('etag'), validators.get('last_modified'))
+
+        self.cache.record_miss()
+        if data and self.fetch_mode != 'browser':
+            self._save_to_cache(url, data)
+            return data
         return None
 
-    
     def _save_to_cache(self, url: str, data: Dict):
-        cache_file = self._get_cache_filename(url)
+        self.cache.put(url, data)
+
+    @property
+    def http_fetcher(self) -> HttpNewsletterFetcher:
+        """Shared keep-alive HTTP fetcher, created on first use."""
+        if self._http_fetcher is None:
+            self._http_fetcher = HttpNewsletterFetcher(pool_size=max(self.concurrency * 2, 10), verbose=self.verbose)
+        return self._http_fetcher
+
+    def _record_failure(self, url: str, error: BaseException, path: str):
+        """Remember why ``url`` failed on ``path`` ('http' or 'browser') for the failure summary."""
+        self.failures[url] = error
+        tracer.count('scrape.errors', path=path, reason=describe_error(error))
+        if self.verbose:
+            print(f"{path.upper()} fetch error for {url}: {str(error)}")
+
+    def _browser_may_help(self, url: str) -> bool:
+        """After the HTTP path gave up on ``url``, whether the browser is worth trying.
+
+        It is when the page simply lacked server-rendered content or the server refused
+        plain HTTP clients, but not when the post is gone or its host keeps failing.
+        """
+        error = self.failures.get(url)
+        return error is None or not (is_gone(error) or is_host_failure(error))
+
+    def _fetch_over_http(self, url: str) -> Optional[Dict]:
+        """Try the lightweight HTTP path, retrying transient errors.
+
+        Returns:
+            Optional[Dict]: The record, or None when the browser is needed or the
+                request failed (see ``failures``).
+        """
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            if self.verbose:
-                print(f"Saved to cache: {url}")
+            return retry_call(lambda: self.http_fetcher.fetch(url), self.retry_policy, self.breakers.for_url(url))
         except Exception as e:
-            print(f"Cache write error: {str(e)}")
+            self._record_failure(url, e, 'http')
+            return None
 
-    def scrape_newsletter(self, url: str) -> Optional[Dict]:
-        cached_data = self._load_from_cache(url)
-        if cached_data:
-            return cached_data
-            
+    def _scrape_with_browser(self, url: str) -> Optional[Dict]:
         try:
-            with sync_playwright() as p:
+            return retry_call(lambda: self._browser_fetch(url), self.retry_policy, self.breakers.for_url(url),
+                              path='browser')
+        except Exception as e:
+            self._record_failure(url, e, 'browser')
+            return None
+
+    def _browser_fetch(self, url: str) -> Dict:
+        # Playwright is only needed on the browser path, so it is not imported at startup
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            with tracer.span('browser.launch', pool_size=1):
                 browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                )
+                context = browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
                 page = context.new_page()
-                page.set_default_timeout(60000)
-                
+            page.set_default_timeout(60000)
+            try:
                 if self.verbose:  # Move behind verbose flag
                     print(f"\nScraping new content: {url}")
-                    
-                page.goto(url, wait_until='networkidle')
-                page.wait_for_load_state('domcontentloaded')
-                time.sleep(2)
-                
+
+                with tracer.span('page.goto', url=url):
+                    response = page.goto(url, wait_until='networkidle')
+                if response is not None and response.status >= 400:
+                    raise HTTPStatusError(response.status, url, response.headers.get('retry-after'))
+
                 if self.verbose:  # Move behind verbose flag
                     print("Looking for main content...")
-                main_element = page.wait_for_selector('main', timeout=30000)
-                
-                newsletter_data = {
+                with tracer.span('page.wait_for_selector', url=url):
+                    page.wait_for_selector('main', timeout=30000)
+
+                with tracer.span('page.evaluate', url=url):
+                    data = page.evaluate(EXTRACT_JS)
+                return {
                     'url': url,
-                    'title': page.evaluate('() => document.querySelector("h1")?.innerText || ""'),
-                    'date': page.evaluate('() => document.querySelector("time")?.getAttribute("datetime") || ""'),
-                    'content': page.evaluate('() => document.querySelector("main")?.innerText || ""'),
-                    'author': page.evaluate('() => document.querySelector(".post-author, .author")?.innerText || ""'),
+                    'title': data['title'],
+                    'date': data['date'],
+                    'content': data['content'],
+                    'author': data['author'],
                     'scraped_at': datetime.now().isoformat()
                 }
-                
+            finally:
                 browser.close()
-                # Save to cache before returning
-                self._save_to_cache(url, newsletter_data)
-                return newsletter_data
-                
-        except Exception as e:
-            if self.verbose:  # Move behind verbose flag
-                print(f"Error scraping {url}: {str(e)}")
-            return None
 
-    def process_multiple_urls(self, urls: List[str], progress_callback: Callable = None) -> List[Dict]:
+    def scrape_newsletter(self, url: str) -> Optional[Dict]:
+        cached_data = self._load_from_cache(url)
+        if cached_data:
+            return cached_data
+
+        newsletter_data = None
+        self.failures.pop(url, None)
+        if self.fetch_mode != 'browser':
+            newsletter_data = self._fetch_over_http(url)
+        if newsletter_data is None and self.fetch_mode != 'http' and self._browser_may_help(url):
+            newsletter_data = self._scrape_with_browser(url)
+
+        if newsletter_data:
+            # Save to cache before returning
+            self._save_to_cache(url, newsletter_data)
+            self.failures.pop(url, None)
+        else:
+            self._mark_failed(url)
+        return newsletter_data
+
+    def _mark_failed(self, url: str):
+        error = self.failures.setdefault(url, NoContentError(url))
+        self.store.mark_failed(url, describe_error(error), gone=is_gone(error))
+
+    def failure_summary(self) -> Dict:
+        """What went wrong in the last process_multiple_urls run (or scrape_newsletter calls since).
+
+        Returns:
+            Dict: ``failed`` (count), ``reasons`` (``{reason: count}``), ``urls``
+                (``{url: reason}``) and ``circuits_opened`` (``{host: times}``).
+        """
+        reasons = {url: describe_error(error) for url, error in self.failures.items()}
+        return {
+            'failed': len(reasons),
+            'reasons': dict(Counter(reasons.values()).most_common()),
+            'urls': reasons,
+            'circuits_opened': self.breakers.opened(),
+        }
+
+    def print_failure_summary(self):
+        summary = self.failure_summary()
+        if not summary['failed']:
+            return
+        print(f"Failed: {summary['failed']} ("
+              + ', '.join(f"{count} {reason}" for reason, count in summary['reasons'].items()) + ")")
+        for host, opened in summary['circuits_opened'].items():
+            print(f"Circuit for {host} opened {opened} time(s)")
+        for url, reason in list(summary['urls'].items())[:None if self.verbose else 10]:
+            print(f"  {reason}: {url}")
+        if not self.verbose and summary['failed'] > 10:
+            print(f"  ... and {summary['failed'] - 10} more (see the scrape_manifest table)")
+        unfinished = sum(not is_gone(error) for error in self.failures.values())
+        if unfinished:
+            print(f"{unfinished} URLs are kept as failed in the manifest and retried on the next run")
+
+    def process_multiple_urls(self, urls: List[str], progress_callback: Callable = None,
+                              revalidate: bool = False, on_result: Callable = None) -> List[Dict]:
         """
         Process multiple newsletter URLs and scrape their content.
-        This method iterates through a list of URLs, scrapes each newsletter's content,
-        and provides progress updates during the process. It includes a delay between
-        requests to prevent overwhelming the server.
+        Fresh cache entries are served from disk and stale ones are revalidated with
+        conditional requests (see NewsletterCache). Unless fetch_mode is 'browser', the rest are
+        first fetched concurrently over plain HTTP; whatever still lacks server-rendered
+        content is scraped concurrently through a single shared browser (see
+        AsyncScrapeEngine). Both paths use per-host concurrency limits and token-bucket
+        rate limiting instead of a fixed delay between requests, retry timeouts, dropped
+        connections and retryable statuses with jittered exponential backoff, and share a
+        circuit breaker per host that stops requests to a host that keeps failing.
+        Every URL's progress is checkpointed in the corpus store's scrape manifest: URLs
+        are marked pending up front, done as their record is stored and failed (with the
+        reason) once retries are exhausted, so an interrupted or partly failed run can be
+        resumed: ArchiveDiscovery.pending_urls picks up ``store.unfinished_urls()``. A
+        failure summary is printed at the end and kept in ``failure_summary()``.
         Args:
             urls (List[str]): A list of newsletter URLs to process.
             progress_callback (Callable, optional): A callback function to report progress.
                 The callback should accept two parameters: current count and total count.
+            revalidate (bool): Treat every cached entry as stale and revalidate it, ignoring TTLs.
+            on_result (Callable, optional): Called as ``on_result(url, data)`` as soon as each URL
+                is done, in completion order; ``data`` is None for failures. Lets callers
+                consume records while the rest are still being scraped.
         Returns:
-            List[Dict]: A list of dictionaries containing scraped newsletter data.
-                Returns empty list if no newsletters could be scraped.
+            List[Dict]: A list of dictionaries containing scraped newsletter data, in the
+                same order as ``urls``. Returns empty list if no newsletters could be scraped.
                 Each dictionary contains newsletter details like title, content, etc.
         Example:
             >>> scraper = BeehiivScraper()
             >>> urls = ["url1", "url2"]
             >>> newsletters = scraper.process_multiple_urls(urls)
         """
-        newsletters = []
+        return asyncio.run(self.aprocess_multiple_urls(urls, progress_callback, revalidate, on_result))
+
+    async def aprocess_multiple_urls(self, urls: List[str], progress_callback: Callable = None,
+                                     revalidate: bool = False, on_result: Callable = None) -> List[Dict]:
+        """Async variant of process_multiple_urls for callers already inside an event loop."""
         total_urls = len(urls)
         print(f"Starting to process {total_urls} newsletters...")  # Keep this
-        
-        for i, url in enumerate(urls, 1):
-            newsletter_data = self.scrape_newsletter(url)
-            
+
+        results: List[Optional[Dict]] = [None] * total_urls
+        pending = []
+        completed = 0
+        self.failures = {}
+
+        def report(url: str, newsletter_data: Optional[Dict], source: str):
+            nonlocal completed
+            completed += 1
+            tracer.count('scrape.results', source=source, ok=bool(newsletter_data))
             if newsletter_data:
-                newsletters.append(newsletter_data)
-                print(f"[{i}/{total_urls}] ✓ Processed: {url}")  # Just print URL instead of content
+                # An earlier path may have failed before a fallback succeeded
+                self.failures.pop(url, None)
+                print(f"[{completed}/{total_urls}] ✓ Processed: {url}")  # Just print URL instead of content
             else:
-                print(f"[{i}/{total_urls}] ✗ Failed to process: {url}")
-            
+                # Stored records mark themselves done in the manifest; failures are recorded here
+                self._mark_failed(url)
+                print(f"[{completed}/{total_urls}] ✗ Failed to process: {url}")
             if progress_callback:
-                progress_callback(i, total_urls)
-            
-            if i < total_urls:
-                time.sleep(1)
-        
+                progress_callback(completed, total_urls)
+            if on_result:
+                on_result(url, newsletter_data)
+
+        stale = {}
+        for i, (url, (entry, fresh)) in enumerate(zip(urls, self.cache.lookup_many(urls, revalidate))):
+            if fresh:
+                results[i] = entry
+                report(url, entry, 'cache')
+            elif entry:
+                stale[i] = entry
+            else:
+                pending.append(i)
+
+        # Checkpoint what this run still has to do, so an interrupted run can be resumed
+        # from the manifest (see CorpusStore.unfinished_urls)
+        self.store.mark_pending([urls[i] for i in sorted([*stale, *pending])])
+
+        # Results are reported as each request completes so on_result consumers can
+        # start on them while the rest are still in flight
+        if stale:
+            def on_revalidated(i: int, newsletter_data: Optional[Dict], error: Optional[BaseException]):
+                if newsletter_data:
+                    results[i] = newsletter_data
+                    report(urls[i], newsletter_data, 'revalidate')
+                elif error is not None and is_host_failure(error):
+                    # The host is failing, a full fetch would not fare better; the stored copy stays
+                    self.cache.record_miss()
+                    self._record_failure(urls[i], error, 'http')
+                    report(urls[i], None, 'revalidate')
+                else:
+                    if error is not None:
+                        self.cache.record_miss()
+                    pending.append(i)
+
+            with tracer.span('scrape.revalidate_all', urls=len(stale)):
+                await self._gather_http(urls, list(stale), lambda i: self._revalidate_once(urls[i], stale[i]),
+                                        on_done=on_revalidated)
+
+        if pending and self.fetch_mode != 'browser':
+            still_pending = []
+
+            def on_fetched(i: int, newsletter_data: Optional[Dict], error: Optional[BaseException]):
+                if newsletter_data:
+                    self._save_to_cache(urls[i], newsletter_data)
+                    results[i] = newsletter_data
+                    report(urls[i], newsletter_data, 'http')
+                    return
+                if error is not None:
+                    self._record_failure(urls[i], error, 'http')
+                if self.fetch_mode == 'http' or not self._browser_may_help(urls[i]):
+                    report(urls[i], None, 'http')
+                else:
+                    still_pending.append(i)
+
+            with tracer.span('scrape.http_all', urls=len(pending)):
+                await self._gather_http(urls, pending, lambda i: self.http_fetcher.fetch(urls[i]), on_done=on_fetched)
+            pending = sorted(still_pending)
+
+        if pending and self.fetch_mode != 'http':
+            def on_scraped(index: int, url: str, newsletter_data: Optional[Dict]):
+                if newsletter_data:
+                    self._save_to_cache(url, newsletter_data)
+                    results[pending[index]] = newsletter_data
+                elif url in engine.failures:
+                    # Already counted and logged by the engine
+                    self.failures[url] = engine.failures[url]
+                report(url, newsletter_data, 'browser')
+
+            with tracer.span('scrape.browser_all', urls=len(pending)):
+                async with AsyncScrapeEngine(
+                    pool_size=min(self.concurrency, len(pending)),
+                    per_host_concurrency=self.per_host_concurrency,
+                    requests_per_second=self.requests_per_second,
+                    verbose=self.verbose,
+                    retry_policy=self.retry_policy,
+                    breakers=self.breakers
+                ) as engine:
+                    await engine.scrape_many([urls[i] for i in pending], on_result=on_scraped)
+
+        newsletters = [data for data in results if data]
         print(f"\nCompleted: {len(newsletters)}/{total_urls} newsletters processed")
-        return newsletters
\ No newline at end of file
+        self.print_failure_summary()
+        if self.verbose:
+            print(f"Cache stats: {self.cache.stats.as_dict()}")
+        return newsletters
+
+    async def _gather_http(self, urls: List[str], indices: List[int], fetch: Callable[[int], Optional[Dict]],
+                           on_done: Callable[[int, Optional[Dict], Optional[BaseException]], None] = None
+                           ) -> List[Optional[Dict]]:
+        """Run a blocking HTTP call for each index concurrently under per-host limits.
+
+        Like the browser path (see AsyncScrapeEngine), each host gets at most
+        ``per_host_concurrency`` requests in flight, paced by a token bucket at
+        ``http_requests_per_second``.
+        Transient errors are retried with backoff (the per-host slot is released while
+        sleeping) behind the host's circuit breaker. ``on_done(index, data, error)`` is
+        called on the event loop as each call finishes; ``error`` is the final exception
+        when every attempt failed.
+        """
+        host_limits = {}
+
+        async def run(i: int) -> Optional[Dict]:
+            host = urlparse(urls[i]).netloc
+            if host not in host_limits:
+                host_limits[host] = (asyncio.Semaphore(self.per_host_concurrency),
+                                     TokenBucket(self.http_requests_per_second))
+            semaphore, bucket = host_limits[host]
+
+            @contextlib.asynccontextmanager
+            async def slot():
+                # Ended however the wait ends, including cancellation (as in AsyncScrapeEngine.scrape)
+                wait = tracer.start_span('scrape.wait', url=urls[i])
+                try:
+                    await semaphore.acquire()
+                    try:
+                        await bucket.acquire()
+                    except BaseException:
+                        semaphore.release()
+                        raise
+                finally:
+                    wait.end()
+                try:
+                    yield
+                finally:
+                    semaphore.release()
+
+            data, error = None, None
+            try:
+                data = await aretry_call(lambda: asyncio.to_thread(fetch, i), self.retry_policy,
+                                         self.breakers.for_url(urls[i]), slot=slot)
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(i, data, error)
+            return data
+
+        return await asyncio.gather(*(run(i) for i in indices))
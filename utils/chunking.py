@@ -0,0 +1,92 @@
+# utils/chunking.py
+from typing import List
+
+# Rough average for English prose with llama-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens in ``text``."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split one document on paragraph boundaries, hard-splitting giant paragraphs."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces, current = [], ''
+    for paragraph in text.split('\n'):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            pieces.append(current)
+            current = ''
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+class ChunkPacker:
+    """Incremental form of ``chunk_texts`` for documents that arrive one at a time.
+
+    Example:
+        >>> packer = ChunkPacker(max_tokens=3000)
+        >>> for text in stream:
+        ...     for chunk in packer.add(text):
+        ...         submit(chunk)
+        >>> remaining = packer.flush()
+    """
+    def __init__(self, max_tokens: int = 3000):
+        self.max_tokens = max_tokens
+        self._current: List[str] = []
+        self._current_tokens = 0
+
+    def _take(self) -> List[str]:
+        chunk = '\n'.join(self._current)
+        self._current, self._current_tokens = [], 0
+        return [chunk]
+
+    def add(self, text: str) -> List[str]:
+        """Add one document; returns the chunks it completed (often none)."""
+        tokens = estimate_tokens(text)
+        if tokens > self.max_tokens:
+            done = self._take() if self._current else []
+            return done + _split_oversized(text, self.max_tokens)
+        done = []
+        if self._current and self._current_tokens + tokens > self.max_tokens:
+            done = self._take()
+        self._current.append(text)
+        self._current_tokens += tokens
+        return done
+
+    def flush(self) -> List[str]:
+        """Return the last, partially filled chunk, if any."""
+        return self._take() if self._current else []
+
+
+def chunk_texts(texts: List[str], max_tokens: int = 3000) -> List[str]:
+    """Pack documents into chunks that each fit a token budget.
+
+    Whole documents are packed together greedily while they fit; a document larger
+    than the budget is split on paragraph boundaries into several chunks.
+
+    Args:
+        texts (List[str]): Formatted documents, e.g. from format_newsletter.
+        max_tokens (int): Estimated token budget per chunk.
+
+    Returns:
+        List[str]: Chunks in document order.
+
+    Example:
+        >>> chunk_texts(["a" * 10, "b" * 10], max_tokens=5)
+        ['aaaaaaaaaa', 'bbbbbbbbbb']
+    """
+    packer = ChunkPacker(max_tokens)
+    chunks = []
+    for text in texts:
+        chunks.extend(packer.add(text))
+    return chunks + packer.flush()
@@ -0,0 +1,205 @@
+# utils/content_cleaner.py
+from utils.chunking import estimate_tokens
+from utils.newsletter_cache import content_hash
+from utils.tracing import tracer
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import hashlib
+import re
+
+# Bump when the cleaning rules change so cached cleaned text is rebuilt
+CLEANER_VERSION = 1
+
+_INVISIBLE = re.compile(r'[\u200b\u200c\u200d\u2060\ufeff\u00ad]')
+_HORIZONTAL_SPACE = re.compile(r'[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+')
+_BLANK_LINES = re.compile(r'\n{3,}')
+_DIGITS = re.compile(r'\d+')
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces, strip every line and keep at most one blank line in a row."""
+    text = _INVISIBLE.sub('', text.replace('\r\n', '\n').replace('\r', '\n'))
+    lines = (_HORIZONTAL_SPACE.sub(' ', line).strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def line_key(line: str) -> bytes:
+    """Hash a line for boilerplate counting.
+
+    Case and numbers are ignored, so '© 2024 Lootbag' and '© 2025 Lootbag' or
+    '3 min read' and '7 min read' count as the same line.
+    """
+    normalized = _DIGITS.sub('#', line.lower())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+
+
+@dataclass
+class CleaningStats:
+    """What the cleaning stage removed in one pass over a publication.
+
+    Attributes:
+        posts (int): Posts yielded.
+        recleaned (int): Posts cleaned in this run rather than read from the store.
+        boilerplate_lines (int): Distinct lines classified as boilerplate.
+        bytes_before (int): UTF-8 bytes of raw content.
+        bytes_after (int): UTF-8 bytes of cleaned content.
+        tokens_before (int): Estimated tokens of raw content.
+        tokens_after (int): Estimated tokens of cleaned content.
+    """
+    posts: int = 0
+    recleaned: int = 0
+    boilerplate_lines: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), 'bytes_saved': self.bytes_saved, 'tokens_saved': self.tokens_saved}
+
+
+class ContentCleaner:
+    """Strips publication boilerplate from scraped ``main`` text before analysis.
+
+    ``innerText`` of a post's ``main`` element carries the subscribe box, share
+    buttons, navigation and footer of the publication along with the article.
+    Those lines recur verbatim across posts, so every distinct line is hashed
+    (see ``line_key``) and counted once per post; a line found in at least
+    ``min_share`` of the publication's posts (and in at least ``min_posts`` of
+    them) is boilerplate and removed everywhere. Whitespace is normalized too.
+
+    Cleaned text is cached in the CorpusStore next to the raw content, keyed by
+    the raw content hash and a signature of the boilerplate set. When no post of
+    the publication changed since the last run the counting pass is skipped and
+    cached text is streamed as-is; otherwise only posts whose content or
+    boilerplate signature changed are cleaned again.
+
+    Attributes:
+        min_share (float): Fraction of posts a line must appear in to be boilerplate.
+        min_posts (int): Minimum posts a line must appear in; smaller corpora are only normalized.
+        stats (CleaningStats): Savings of the last ``iter_clean`` pass.
+    Example:
+        >>> cleaner = ContentCleaner()
+        >>> newsletters = list(cleaner.iter_clean(scraper.store, 'lootbag.beehiiv.com'))
+        >>> cleaner.stats.tokens_saved
+    """
+    def __init__(self, min_share: float = 0.5, min_posts: int = 3, verbose: bool = False):
+        self.min_share = min_share
+        self.min_posts = min_posts
+        self.verbose = verbose
+        self.stats = CleaningStats()
+
+    def find_boilerplate(self, texts) -> Set[bytes]:
+        """Return the keys of lines that recur in enough of ``texts`` to be boilerplate."""
+        document_frequency = Counter()
+        posts = 0
+        for text in texts:
+            posts += 1
+            document_frequency.update({line_key(line) for line in normalize_whitespace(text).split('\n') if line})
+        threshold = max(self.min_posts, self.min_share * posts)
+        return {key for key, count in document_frequency.items() if count >= threshold}
+
+    @staticmethod
+    def signature(boilerplate: Set[bytes]) -> str:
+        """Stable digest of a boilerplate set and the cleaner version."""
+        digest = hashlib.sha256(f"v{CLEANER_VERSION}".encode('utf-8'))
+        for key in sorted(boilerplate):
+            digest.update(key)
+        return digest.hexdigest()
+
+    @staticmethod
+    def clean(text: str, boilerplate: Set[bytes]) -> str:
+        """Normalize ``text`` and drop its boilerplate lines.
+
+        A post made only of boilerplate lines (e.g. a repeated announcement) is kept
+        normalized rather than emptied.
+        """
+        normalized = normalize_whitespace(text)
+        lines = [line for line in normalized.split('\n') if not line or line_key(line) not in boilerplate]
+        return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip() or normalized
+
+    def clean_stream(self, records: Iterable[Dict], warmup: int = 20) -> Iterator[Dict]:
+        """Clean records on the fly, before the whole corpus is known.
+
+        Boilerplate is learned from the first ``warmup`` records, which are held back
+        until then; every later record is cleaned and yielded as soon as it arrives.
+        Nothing is written to the store, so ``iter_clean`` still produces the
+        corpus-wide result afterwards.
+        """
+        held: List[Dict] = []
+        boilerplate: Optional[Set[bytes]] = None
+        for record in records:
+            if boilerplate is None:
+                held.append(record)
+                if len(held) < warmup:
+                    continue
+                boilerplate = self.find_boilerplate(r.get('content') or '' for r in held)
+                records_ready, held = held, []
+            else:
+                records_ready = [record]
+            for ready in records_ready:
+                yield {**ready, 'content': self.clean(ready.get('content') or '', boilerplate)}
+        if held:
+            boilerplate = self.find_boilerplate(r.get('content') or '' for r in held)
+            for ready in held:
+                yield {**ready, 'content': self.clean(ready.get('content') or '', boilerplate)}
+
+    def iter_clean(self, store, publication: str, batch_size: int = 200) -> Iterator[Dict]:
+        """Stream a publication's records from ``store`` with boilerplate removed.
+
+        Each yielded record has the cleaned text in ``content`` and its hash in
+        ``content_hash``, so artifacts built downstream follow the cleaned text;
+        the raw content's hash is kept in ``raw_content_hash``. Cleaned text is
+        written back to the store in batches of ``batch_size``.
+        """
+        self.stats = CleaningStats()
+        signature: Optional[str] = None
+        boilerplate: Set[bytes] = set()
+        if store.count_uncleaned(publication):
+            with tracer.span('clean.find_boilerplate', publication=publication):
+                boilerplate = self.find_boilerplate(
+                    record.get('content') or '' for record in store.iter_newsletters(publication=publication))
+            signature = self.signature(boilerplate)
+            self.stats.boilerplate_lines = len(boilerplate)
+
+        pending: List[tuple] = []
+        for record in store.iter_newsletters(publication=publication):
+            raw = record.get('content') or ''
+            source_hash = record.get('content_hash')
+            cached = (record.get('clean_content') is not None and source_hash is not None
+                      and record.get('clean_source_hash') == source_hash
+                      and (signature is None or record.get('clean_signature') == signature))
+            if cached:
+                cleaned = record['clean_content']
+            else:
+                cleaned = self.clean(raw, boilerplate)
+                pending.append((record['url'], cleaned, source_hash, signature))
+                self.stats.recleaned += 1
+                if len(pending) >= batch_size:
+                    store.save_cleaned(pending)
+                    pending = []
+
+            self.stats.posts += 1
+            self.stats.bytes_before += len(raw.encode('utf-8'))
+            self.stats.bytes_after += len(cleaned.encode('utf-8'))
+            self.stats.tokens_before += estimate_tokens(raw)
+            self.stats.tokens_after += estimate_tokens(cleaned)
+
+            newsletter = {key: value for key, value in record.items() if not key.startswith('clean_')}
+            newsletter.update(content=cleaned, content_hash=content_hash(cleaned), raw_content_hash=source_hash)
+            yield newsletter
+
+        store.save_cleaned(pending)
+        if self.verbose:
+            print(f"Cleaned {self.stats.posts} posts ({self.stats.recleaned} re-cleaned, "
+                  f"{self.stats.boilerplate_lines} boilerplate lines): saved {self.stats.bytes_saved} bytes, "
+                  f"~{self.stats.tokens_saved} tokens")
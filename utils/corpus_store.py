@@ -0,0 +1,289 @@
+# utils/corpus_store.py
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+from datetime import datetime
+import threading
+import sqlite3
+import json
+import glob
+import os
+
+COLUMNS = (
+    'url', 'publication', 'title', 'date', 'author', 'content', 'scraped_at',
+    'validated_at', 'etag', 'last_modified', 'content_hash'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS newsletters (
+    url TEXT PRIMARY KEY,
+    publication TEXT NOT NULL,
+    title TEXT,
+    date TEXT,
+    author TEXT,
+    content TEXT,
+    scraped_at TEXT,
+    validated_at TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    clean_content TEXT,
+    clean_source_hash TEXT,
+    clean_signature TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_newsletters_publication ON newsletters (publication);
+CREATE INDEX IF NOT EXISTS idx_newsletters_date ON newsletters (date);
+CREATE INDEX IF NOT EXISTS idx_newsletters_scraped_at ON newsletters (scraped_at);
+CREATE TABLE IF NOT EXISTS scrape_manifest (
+    url TEXT PRIMARY KEY,
+    publication TEXT NOT NULL,
+    status TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scrape_manifest_status ON scrape_manifest (publication, status);
+"""
+
+# Manifest statuses: queued by a scrape that has not finished it yet, stored in the corpus,
+# failed after all retries (resumed by the next run), or permanently gone (404/410)
+MANIFEST_STATUSES = ('pending', 'done', 'failed', 'gone')
+UNFINISHED_STATUSES = ('pending', 'failed')
+
+# Derived by ContentCleaner; written separately so a re-scrape leaves them stale
+# (clean_source_hash no longer matches content_hash) rather than erasing them
+CLEAN_COLUMNS = ('clean_content', 'clean_source_hash', 'clean_signature')
+
+
+def publication_for(url: str) -> str:
+    """Return the publication key for a post URL (its host, e.g. 'lootbag.beehiiv.com')."""
+    return urlparse(url).netloc
+
+
+class CorpusStore:
+    """Single-file SQLite store for the scraped newsletter corpus.
+
+    Records are keyed by full URL, so posts with the same slug in different
+    publications no longer collide. The database runs in WAL mode so readers
+    are not blocked while the scraper writes, and has indexes on publication,
+    date and scraped_at for listing and incremental queries.
+
+    Next to the posts it keeps the scrape manifest: one row per URL a scrape was
+    asked for, with its status (MANIFEST_STATUSES), consecutive failed runs and
+    last error. URLs are marked pending before any request goes out, and a
+    stored record flips its row to done in the same transaction that writes it,
+    so after a crash the manifest names exactly the URLs still to do.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+    Example:
+        >>> store = CorpusStore('newsletter_cache/corpus.db')
+        >>> store.upsert_many(newsletters)
+        >>> for newsletter in store.iter_newsletters(publication='lootbag.beehiiv.com'):
+        ...     print(newsletter['title'])
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a database was first created."""
+        existing = {row['name'] for row in self._conn.execute('PRAGMA table_info(newsletters)')}
+        with self._conn:
+            for column in CLEAN_COLUMNS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE newsletters ADD COLUMN {column} TEXT")
+
+    @staticmethod
+    def _row(record: Dict) -> tuple:
+        values = dict(record)
+        values.setdefault('publication', publication_for(values['url']))
+        return tuple(values.get(column) for column in COLUMNS)
+
+    def upsert(self, record: Dict):
+        self.upsert_many([record])
+
+    def upsert_many(self, records: Iterable[Dict]) -> int:
+        """Insert or replace many records in one transaction. Returns the number written."""
+        rows = [self._row(record) for record in records]
+        if not rows:
+            return 0
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in COLUMNS if column != 'url')
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO newsletters ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(url) DO UPDATE SET {updates}",
+                rows
+            )
+            # Checkpoint: a stored post is done, atomically with writing it
+            self._conn.executemany(
+                "UPDATE scrape_manifest SET status = 'done', failures = 0, error = NULL, updated_at = ? "
+                "WHERE url = ? AND status != 'done'",
+                [(now, row[0]) for row in rows]
+            )
+        return len(rows)
+
+    def mark_pending(self, urls: Iterable[str]) -> int:
+        """Queue URLs in the scrape manifest, keeping the failure count of earlier runs."""
+        now = datetime.now().isoformat()
+        rows = [(url, publication_for(url), now) for url in urls]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO scrape_manifest (url, publication, status, updated_at) VALUES (?, ?, 'pending', ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = 'pending', updated_at = excluded.updated_at",
+                rows
+            )
+        return len(rows)
+
+    def mark_failed(self, url: str, error: str, gone: bool = False):
+        """Record a URL that could not be scraped; ``gone`` ones are not resumed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO scrape_manifest (url, publication, status, failures, error, updated_at) "
+                "VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = excluded.status, failures = failures + 1, "
+                "error = excluded.error, updated_at = excluded.updated_at",
+                (url, publication_for(url), 'gone' if gone else 'failed', error, datetime.now().isoformat())
+            )
+
+    def manifest(self, publication: Optional[str] = None, statuses: Iterable[str] = MANIFEST_STATUSES) -> List[Dict]:
+        """Manifest rows, optionally for one publication, with the given statuses."""
+        statuses = list(statuses)
+        clauses, params = [f"status IN ({', '.join('?' for _ in statuses)})"], statuses
+        if publication:
+            clauses.append('publication = ?')
+            params.append(publication)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM scrape_manifest WHERE {' AND '.join(clauses)} ORDER BY updated_at, url", params)
+            return [dict(row) for row in rows]
+
+    def unfinished_urls(self, publication: Optional[str] = None) -> List[str]:
+        """URLs an earlier scrape left pending (interrupted) or failed, to resume."""
+        return [row['url'] for row in self.manifest(publication, UNFINISHED_STATUSES)]
+
+    def save_cleaned(self, rows: Iterable[tuple]) -> int:
+        """Store cleaned text as ``(url, clean_content, clean_source_hash, clean_signature)`` rows."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE newsletters SET clean_content = ?, clean_source_hash = ?, clean_signature = ? WHERE url = ?',
+                [(content, source_hash, signature, url) for url, content, source_hash, signature in rows]
+            )
+        return len(rows)
+
+    def count_uncleaned(self, publication: str) -> int:
+        """Number of posts whose cleaned text is missing or older than their content."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM newsletters WHERE publication = ? '
+                'AND (clean_source_hash IS NULL OR clean_source_hash IS NOT content_hash)',
+                (publication,)
+            ).fetchone()[0]
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM newsletters WHERE url = ?', (url,)).fetchone()
+        return dict(row) if row else None
+
+    def get_many(self, urls: List[str]) -> Dict[str, Dict]:
+        """Fetch many records by URL; missing URLs are simply absent from the result."""
+        found = {}
+        # Stay under SQLite's default bound-parameter limit
+        for start in range(0, len(urls), 500):
+            batch = urls[start:start + 500]
+            placeholders = ', '.join('?' for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM newsletters WHERE url IN ({placeholders})", batch).fetchall()
+            found.update((row['url'], dict(row)) for row in rows)
+        return found
+
+    def iter_newsletters(self, publication: Optional[str] = None, since: Optional[str] = None,
+                         batch_size: int = 500) -> Iterator[Dict]:
+        """Stream records ordered by publication date without loading the whole corpus.
+
+        The rows come from a snapshot taken when iteration starts; posts written while
+        iterating are not included.
+
+        Args:
+            publication (str, optional): Only yield posts from this publication.
+            since (str, optional): Only yield posts scraped at or after this ISO timestamp.
+            batch_size (int): Rows fetched per round trip.
+        """
+        clauses, params = [], []
+        if publication:
+            clauses.append('publication = ?')
+            params.append(publication)
+        if since:
+            clauses.append('scraped_at >= ?')
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # A cursor on the shared connection is not isolated from the upserts other threads
+        # (e.g. a ScrapeStream) make on it meanwhile. A separate read connection streams
+        # from its own WAL snapshot and never blocks those writers.
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(f"SELECT * FROM newsletters {where} ORDER BY date, url", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+
+    def urls(self, publication: Optional[str] = None) -> List[str]:
+        """URLs of every stored post, without loading their content."""
+        with self._lock:
+            if publication:
+                rows = self._conn.execute('SELECT url FROM newsletters WHERE publication = ?', (publication,))
+            else:
+                rows = self._conn.execute('SELECT url FROM newsletters')
+            return [row['url'] for row in rows]
+
+    def count(self, publication: Optional[str] = None) -> int:
+        with self._lock:
+            if publication:
+                return self._conn.execute(
+                    'SELECT COUNT(*) FROM newsletters WHERE publication = ?', (publication,)).fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM newsletters').fetchone()[0]
+
+    def import_json_dir(self, directory: str) -> int:
+        """Import legacy one-JSON-per-URL cache files. Returns the number imported."""
+        records = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except Exception as e:
+                print(f"Skipping unreadable cache file {path}: {str(e)}")
+                continue
+            if record.get('url'):
+                records.append(record)
+        return self.upsert_many(records)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'CorpusStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,41 @@
+# utils/crew_llm.py
+from langchain_core.outputs import Generation
+from crewai import LLM
+from typing import Any, Dict, List
+import json
+
+
+class CachedCrewLLM(LLM):
+    """crewai.LLM that answers repeated calls from a PersistentLLMCache.
+
+    CrewAI calls models through LiteLLM, not LangChain, so a LangChain cache set on
+    a client never sees the agents' calls. This subclass looks every call up in
+    ``cache`` first, keyed by the chat messages and the model, temperature and stop
+    words, and stores what LiteLLM returns.
+
+    Attributes:
+        cache (PersistentLLMCache, optional): Shared response cache; None disables caching.
+    Example:
+        >>> llm = CachedCrewLLM(model='ollama/llama3.2', cache=get_llm_cache('newsletter_cache/llm_cache.db'))
+    """
+    def __init__(self, *args: Any, cache=None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def _llm_string(self) -> str:
+        return json.dumps({'provider': 'crewai', 'model': self.model, 'base_url': self.base_url,
+                           'temperature': self.temperature, 'stop': self.stop}, sort_keys=True)
+
+    def _complete(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        return super().call(messages, callbacks)
+
+    def call(self, messages: List[Dict[str, str]], callbacks: List[Any] = []) -> str:
+        if self.cache is None:
+            return self._complete(messages, callbacks)
+        prompt, llm_string = json.dumps(messages, ensure_ascii=False), self._llm_string()
+        cached = self.cache.lookup(prompt, llm_string)
+        if cached:
+            return cached[0].text
+        text = self._complete(messages, callbacks)
+        self.cache.update(prompt, llm_string, [Generation(text=text)])
+        return text
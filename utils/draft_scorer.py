@@ -0,0 +1,239 @@
+# utils/draft_scorer.py
+from dataclasses import dataclass, asdict
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.stylometry import STOPWORDS, STYLE_FEATURES, style_features
+from utils.style_guide_store import corpus_fingerprint
+from utils.tracing import tracer
+import numpy as np
+import hashlib
+import json
+import os
+import re
+
+MODEL_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Weights of the three similarity signals in DraftScore.score
+DEFAULT_WEIGHTS = {'tfidf': 0.4, 'phrases': 0.2, 'style': 0.4}
+
+
+def fingerprint_digest(newsletters: Iterable[Dict]) -> str:
+    """One digest for the ``{url: content_hash}`` corpus fingerprint."""
+    return hashlib.sha256(json.dumps(sorted(corpus_fingerprint(newsletters).items())).encode('utf-8')).hexdigest()
+
+
+class CorpusModel:
+    """Precomputed statistics of the author's corpus used to score drafts on the CPU.
+
+    Holds the unigram + bigram vocabulary with smoothed IDF weights, the L2
+    normalized TF-IDF centroid of all posts, the set of bigrams the author used
+    at least twice, and the mean and standard deviation of every per-post
+    stylometric feature (STYLE_FEATURES). Building it tokenizes the corpus once;
+    afterwards it is saved as a compressed ``.npz`` keyed by the corpus
+    fingerprint, so later runs load it instead of rebuilding and scoring a draft
+    only touches the draft's own terms.
+
+    Attributes:
+        vocabulary (np.ndarray): Corpus words; a word's id is its position.
+        keys (np.ndarray): Sorted term keys: ``w`` for unigrams, ``V + a * V + b`` for bigrams.
+        idf (np.ndarray): IDF weight per key.
+        centroid (np.ndarray): Normalized mean TF-IDF vector per key.
+        phrases (np.ndarray): Sorted keys of informative bigrams used at least twice.
+        feature_mean (np.ndarray): Mean of each style feature over posts.
+        feature_std (np.ndarray): Standard deviation of each style feature.
+        documents (int): Number of posts.
+        fingerprint (str): Digest of the corpus the model was built from.
+    Example:
+        >>> model = CorpusModel.load_or_build(newsletters, 'newsletter_cache/draft_scorer.npz')
+        >>> DraftScorer(model).rank(drafts)[0].score
+    """
+    def __init__(self, vocabulary: np.ndarray, keys: np.ndarray, idf: np.ndarray, centroid: np.ndarray,
+                 phrases: np.ndarray, feature_mean: np.ndarray, feature_std: np.ndarray,
+                 documents: int, fingerprint: str = ''):
+        self.vocabulary = vocabulary
+        self.keys = keys
+        self.idf = idf
+        self.centroid = centroid
+        self.phrases = phrases
+        self.feature_mean = feature_mean
+        self.feature_std = feature_std
+        self.documents = documents
+        self.fingerprint = fingerprint
+        self.word_index = {word: i for i, word in enumerate(vocabulary.tolist())}
+        # Terms a draft uses that the corpus never did weigh like the rarest corpus term
+        self.unseen_idf = float(np.log((1 + documents) / 1) + 1)
+        self.is_stop = np.fromiter((word in STOPWORDS for word in vocabulary), dtype=bool, count=len(vocabulary))
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self.vocabulary)
+
+    @classmethod
+    def build(cls, texts: List[str], fingerprint: str = '') -> 'CorpusModel':
+        texts = [text for text in texts if text and text.strip()]
+        with tracer.span('draft_scorer.build', documents=len(texts)):
+            # Assigns the next free id to unseen words at C speed via map(), as in compute_style_profile
+            index: Dict[str, int] = defaultdict()
+            index.default_factory = index.__len__
+            word_ids, doc_ids = [], []
+            for doc_id, text in enumerate(texts):
+                words = _WORD.findall(text.lower())
+                word_ids.extend(map(index.__getitem__, words))
+                doc_ids.extend([doc_id] * len(words))
+            vocabulary = np.array(list(index), dtype=str)
+            word_ids = np.asarray(word_ids, dtype=np.int64)
+            doc_ids = np.asarray(doc_ids, dtype=np.int64)
+            vocab_size = max(len(vocabulary), 1)
+
+            # Bigrams only within one post (posts are contiguous in word_ids)
+            same_doc = doc_ids[:-1] == doc_ids[1:]
+            bigram_keys = (vocab_size + word_ids[:-1] * vocab_size + word_ids[1:])[same_doc]
+            term_keys = np.concatenate((word_ids, bigram_keys))
+            term_docs = np.concatenate((doc_ids, doc_ids[:-1][same_doc]))
+
+            # Term frequency per (post, term) and document frequency per term
+            pairs, tf = np.unique(term_docs * (vocab_size + vocab_size ** 2) + term_keys, return_counts=True)
+            pair_docs, pair_keys = np.divmod(pairs, vocab_size + vocab_size ** 2)
+            keys, key_index, df = np.unique(pair_keys, return_inverse=True, return_counts=True)
+            idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+            # L2-normalize every post's TF-IDF vector, then average them into the centroid
+            weights = tf * idf[key_index]
+            norms = np.sqrt(np.bincount(pair_docs, weights=weights ** 2, minlength=len(texts)))
+            centroid = np.bincount(key_index, weights=weights / norms[pair_docs], minlength=len(keys))
+            centroid /= max(np.linalg.norm(centroid), 1e-12)
+
+            # Bigrams the author uses repeatedly and that are not made of stopwords only
+            bigram_total = np.unique(bigram_keys, return_counts=True)
+            is_stop = np.fromiter((word in STOPWORDS for word in vocabulary), dtype=bool, count=len(vocabulary))
+            first, second = np.divmod(bigram_total[0] - vocab_size, vocab_size)
+            repeated = (bigram_total[1] >= 2) & ~(is_stop[first] & is_stop[second])
+            phrases = bigram_total[0][repeated]
+
+            features = np.array([style_features(text) for text in texts]) if texts else np.zeros((1, len(STYLE_FEATURES)))
+            return cls(vocabulary, keys, idf.astype(np.float32), centroid.astype(np.float32), phrases,
+                       features.mean(axis=0), features.std(axis=0), len(texts), fingerprint)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, vocabulary=self.vocabulary, keys=self.keys, idf=self.idf,
+                            centroid=self.centroid, phrases=self.phrases, feature_mean=self.feature_mean,
+                            feature_std=self.feature_std,
+                            meta=np.array(json.dumps({'version': MODEL_VERSION, 'documents': self.documents,
+                                                      'fingerprint': self.fingerprint})))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['CorpusModel']:
+        """Load a saved model; None when missing, unreadable or from another model version."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('version') != MODEL_VERSION:
+                    return None
+                return cls(data['vocabulary'], data['keys'], data['idf'], data['centroid'], data['phrases'],
+                           data['feature_mean'], data['feature_std'], meta['documents'], meta['fingerprint'])
+        except (OSError, KeyError, ValueError) as e:
+            if os.path.exists(path):
+                print(f"Rebuilding draft scorer model, could not load {path}: {str(e)}")
+            return None
+
+    @classmethod
+    def load_or_build(cls, newsletters: List[Dict], path: str) -> 'CorpusModel':
+        """Reuse the saved model while the corpus is unchanged, otherwise rebuild and save it."""
+        fingerprint = fingerprint_digest(newsletters)
+        model = cls.load(path)
+        if model is not None and model.fingerprint == fingerprint:
+            return model
+        model = cls.build([newsletter['content'] for newsletter in newsletters], fingerprint)
+        model.save(path)
+        return model
+
+
+@dataclass
+class DraftScore:
+    """How closely one draft matches the author's corpus (all signals in 0..1, higher is closer).
+
+    Attributes:
+        index (int): Position of the draft in the input list.
+        score (float): Weighted combination of the three signals.
+        tfidf (float): Cosine similarity of the draft's TF-IDF vector to the corpus centroid.
+        phrases (float): Share of the draft's informative bigrams the author used repeatedly.
+        style (float): ``1 / (1 + d)`` for the RMS z-score distance ``d`` of its style features.
+        features (Dict[str, float]): The draft's style features.
+    """
+    index: int
+    score: float
+    tfidf: float
+    phrases: float
+    style: float
+    features: Dict[str, float]
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class DraftScorer:
+    """Scores generated drafts against a CorpusModel without any LLM calls.
+
+    Example:
+        >>> scorer = DraftScorer(CorpusModel.load_or_build(newsletters, 'newsletter_cache/draft_scorer.npz'))
+        >>> best = scorer.rank(drafts)[0]
+        >>> drafts[best.index], best.score
+    """
+    def __init__(self, model: CorpusModel, weights: Optional[Dict[str, float]] = None):
+        self.model = model
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def _terms(self, text: str) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """Term keys of ``text`` known to the corpus, its known bigram keys, and its
+        counts of unseen words and of bigrams containing one."""
+        model = self.model
+        ids = np.fromiter((model.word_index.get(word, -1) for word in _WORD.findall(text.lower())), dtype=np.int64)
+        known = ids >= 0
+        both = known[:-1] & known[1:]
+        bigrams = model.vocab_size + ids[:-1][both] * model.vocab_size + ids[1:][both]
+        return np.concatenate((ids[known], bigrams)), bigrams, int((~known).sum()), int((~both).sum())
+
+    def score(self, text: str, index: int = 0) -> DraftScore:
+        model = self.model
+        keys, bigrams, unseen_words, unseen_bigrams = self._terms(text)
+
+        terms, tf = np.unique(keys, return_counts=True)
+        position = np.searchsorted(model.keys, terms)
+        position = np.minimum(position, max(len(model.keys) - 1, 0))
+        in_corpus = model.keys[position] == terms if len(model.keys) else np.zeros(len(terms), dtype=bool)
+        weights = tf[in_corpus] * model.idf[position[in_corpus]]
+        # Terms with unseen words are not distinct here, so each occurrence counts as its own term
+        unseen_weight = np.concatenate((tf[~in_corpus] * model.unseen_idf,
+                                        np.full(unseen_words + unseen_bigrams, model.unseen_idf)))
+        norm = np.sqrt((weights ** 2).sum() + (unseen_weight ** 2).sum())
+        tfidf = float(weights @ model.centroid[position[in_corpus]] / norm) if norm else 0.0
+
+        if bigrams.size:
+            first, second = np.divmod(bigrams - model.vocab_size, model.vocab_size)
+            informative = bigrams[~(model.is_stop[first] & model.is_stop[second])]
+        else:
+            informative = bigrams
+        total_informative = informative.size + unseen_bigrams
+        phrases = float(np.isin(informative, model.phrases).sum() / total_informative) if total_informative else 0.0
+
+        features = style_features(text)
+        z = (features - model.feature_mean) / np.maximum(model.feature_std, 1e-6)
+        style = float(1 / (1 + np.sqrt(np.mean(np.clip(z, -10, 10) ** 2))))
+
+        combined = (self.weights['tfidf'] * tfidf + self.weights['phrases'] * phrases
+                    + self.weights['style'] * style) / sum(self.weights.values())
+        return DraftScore(index=index, score=round(combined, 4), tfidf=round(tfidf, 4), phrases=round(phrases, 4),
+                          style=round(style, 4),
+                          features={name: round(float(value), 3) for name, value in zip(STYLE_FEATURES, features)})
+
+    def rank(self, drafts: List[str]) -> List[DraftScore]:
+        """Score every draft; best first."""
+        with tracer.span('draft_scorer.rank', drafts=len(drafts)):
+            return sorted((self.score(draft, i) for i, draft in enumerate(drafts)), key=lambda s: -s.score)
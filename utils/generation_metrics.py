@@ -0,0 +1,56 @@
+# utils/generation_metrics.py
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+import time
+
+
+@dataclass
+class GenerationMetrics:
+    """Latency and throughput of one streamed generation.
+
+    Attributes:
+        time_to_first_token (Optional[float]): Seconds until the first chunk arrived.
+        total_latency (float): Seconds from request to the last chunk.
+        tokens (int): Streamed chunks; Ollama emits roughly one token per chunk.
+        characters (int): Total characters generated.
+        stopped_early (bool): True when the stream was cut off by a token limit.
+    """
+    time_to_first_token: Optional[float] = None
+    total_latency: float = 0.0
+    tokens: int = 0
+    characters: int = 0
+    stopped_early: bool = False
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Decode throughput: the tokens after the first one over the time since it arrived."""
+        decode_time = self.total_latency - (self.time_to_first_token or 0.0)
+        return max(self.tokens - 1, 0) / decode_time if decode_time > 0 else 0.0
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), 'tokens_per_second': round(self.tokens_per_second, 2)}
+
+
+class StreamTimer:
+    """Collects GenerationMetrics while a stream is consumed.
+
+    Example:
+        >>> timer = StreamTimer()
+        >>> for chunk in llm.stream(prompt):
+        ...     timer.record(chunk)
+        >>> timer.finish().time_to_first_token
+    """
+    def __init__(self):
+        self.metrics = GenerationMetrics()
+        self._start = time.perf_counter()
+
+    def record(self, chunk: str):
+        if self.metrics.time_to_first_token is None:
+            self.metrics.time_to_first_token = time.perf_counter() - self._start
+        self.metrics.tokens += 1
+        self.metrics.characters += len(chunk)
+
+    def finish(self, stopped_early: bool = False) -> GenerationMetrics:
+        self.metrics.total_latency = time.perf_counter() - self._start
+        self.metrics.stopped_early = stopped_early
+        return self.metrics
@@ -0,0 +1,126 @@
+# utils/http_fetcher.py
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+from utils.scrape_engine import USER_AGENT
+from utils.tracing import tracer
+import requests
+
+
+def parse_newsletter_html(html: str, url: str) -> Optional[Dict]:
+    """Extract newsletter fields from server-rendered Beehiiv HTML.
+
+    Uses the same selectors as the Playwright path (``h1``, ``time[datetime]``,
+    ``main`` and ``.post-author, .author``) so both paths produce identical records.
+
+    Args:
+        html (str): Raw page HTML.
+        url (str): The page URL, stored on the returned record.
+
+    Returns:
+        Optional[Dict]: The newsletter record, or None when ``main`` is missing or
+            empty (i.e. the page needs client-side rendering).
+
+    Example:
+        >>> parse_newsletter_html("<h1>Hi</h1><main><p>Body</p></main>", "https://x/p/hi")["title"]
+        'Hi'
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    main = soup.select_one('main')
+    content = main.get_text('\n', strip=True) if main else ''
+    if not content:
+        return None
+
+    title = soup.select_one('h1')
+    time_tag = soup.select_one('time[datetime]')
+    author = soup.select_one('.post-author, .author')
+    return {
+        'url': url,
+        'title': title.get_text(strip=True) if title else '',
+        'date': time_tag.get('datetime', '') if time_tag else '',
+        'content': content,
+        'author': author.get_text(strip=True) if author else '',
+        'scraped_at': datetime.now().isoformat()
+    }
+
+
+class HttpNewsletterFetcher:
+    """Fetches newsletters over plain HTTP with pooled keep-alive connections.
+
+    Beehiiv post pages are server-rendered, so a single GET plus an HTML parse is
+    usually enough. Callers should fall back to the browser when ``fetch`` returns
+    None.
+
+    Attributes:
+        timeout (float): Per-request timeout in seconds.
+        verbose (bool): Print per-URL diagnostics.
+        session (requests.Session): Shared session whose adapters keep connections alive.
+    Example:
+        >>> fetcher = HttpNewsletterFetcher()
+        >>> data = fetcher.fetch("https://lootbag.beehiiv.com/p/orange-coin")
+    """
+    def __init__(self, pool_size: int = 10, timeout: float = 15.0, verbose: bool = False):
+        self.timeout = timeout
+        self.verbose = verbose
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, url: str) -> Optional[Dict]:
+        """Fetch and parse one newsletter.
+
+        Returns:
+            Optional[Dict]: The newsletter record, or None when the page has no
+                server-rendered ``main`` content and needs the browser.
+
+        Raises:
+            requests.RequestException: On connection errors or non-2xx responses.
+        """
+        with tracer.span('http.get', url=url) as span:
+            response = self.session.get(url, timeout=self.timeout)
+            span.set(status=response.status_code, bytes=len(response.content))
+        response.raise_for_status()
+        return self._parse_response(response, url)
+
+    def revalidate(self, url: str, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None) -> Tuple[bool, Optional[Dict]]:
+        """Issue a conditional GET using stored validators.
+
+        Returns:
+            Tuple[bool, Optional[Dict]]: ``(True, None)`` when the server answered
+                304 Not Modified, otherwise ``(False, record)`` exactly like ``fetch``.
+
+        Raises:
+            requests.RequestException: On connection errors or non-2xx/304 responses.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        with tracer.span('http.get', url=url, conditional=True) as span:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            span.set(status=response.status_code, bytes=len(response.content))
+        if response.status_code == 304:
+            return True, None
+        response.raise_for_status()
+        return False, self._parse_response(response, url)
+
+    def _parse_response(self, response: requests.Response, url: str) -> Optional[Dict]:
+        with tracer.span('html.parse', url=url):
+            data = parse_newsletter_html(response.text, url)
+        if data is None:
+            if self.verbose:
+                print(f"No server-rendered content, needs browser: {url}")
+            return None
+        if response.headers.get('ETag'):
+            data['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            data['last_modified'] = response.headers['Last-Modified']
+        return data
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,265 @@
+# utils/job_queue.py
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import threading
+import sqlite3
+import json
+import time
+import os
+import re
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL,
+    publication_url TEXT NOT NULL,
+    topic TEXT,
+    topics_file TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant_status ON jobs (tenant, status);
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant TEXT PRIMARY KEY,
+    last_served INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+TENANT_ID = re.compile(r'^[a-z0-9][a-z0-9_-]{0,62}$')
+
+
+def validate_tenant(tenant: str) -> str:
+    """Tenant ids become directory names, so only lowercase slugs are accepted."""
+    if not TENANT_ID.match(tenant or ''):
+        raise ValueError(f"Invalid tenant id {tenant!r}: use lowercase letters, digits, '-' and '_'")
+    return tenant
+
+
+@dataclass
+class Job:
+    """One pipeline run for a tenant's publication.
+
+    Attributes:
+        id (int): Queue-assigned id.
+        tenant (str): Owner; selects the isolated workspace.
+        publication_url (str): Beehiiv publication to analyze.
+        topic (Optional[str]): Topic of a single newsletter.
+        topics_file (Optional[str]): Topics file for batch mode.
+        status (str): 'queued', 'running', 'done' or 'failed'.
+        stage (Optional[str]): Last pipeline stage started.
+        attempts (int): Times the job was claimed.
+        max_attempts (int): Claims allowed before the job fails for good.
+        result (Optional[Dict]): Output paths of a finished job.
+        error (Optional[str]): Last error.
+    """
+    id: int
+    tenant: str
+    publication_url: str
+    topic: Optional[str] = None
+    topics_file: Optional[str] = None
+    status: str = 'queued'
+    stage: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 3
+    worker: Optional[str] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'Job':
+        values = {key: row[key] for key in row.keys() if key in cls.__dataclass_fields__}
+        values['result'] = json.loads(row['result']) if row['result'] else None
+        return cls(**values)
+
+
+class JobQueue:
+    """Persistent SQLite job queue shared by every tenant.
+
+    Jobs survive restarts: ``claim`` hands a job to a worker under a lease that
+    the worker keeps extending with ``heartbeat``. If the runner dies, the lease
+    runs out and ``recover`` puts the job back in the queue, so it resumes on the
+    next start (the pipeline itself skips whatever its caches already hold).
+    Claims are fair across tenants: among tenants below ``max_per_tenant``
+    running jobs, the one served least recently goes first, so a tenant with a
+    hundred queued jobs cannot starve one with a single job. Like CorpusStore,
+    the database runs in WAL mode and a claim only succeeds if the job is still
+    queued, so several runner processes can share one queue file.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+    Example:
+        >>> queue = JobQueue('tenants/jobs.db')
+        >>> queue.submit('alice', 'https://alice.beehiiv.com', topic='Rate cuts')
+        >>> job = queue.claim('worker-1', max_per_tenant=1, lease_seconds=120)
+        >>> queue.complete(job.id, {'output_path': '...'})
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def submit(self, tenant: str, publication_url: str, topic: Optional[str] = None,
+               topics_file: Optional[str] = None, max_attempts: int = 3) -> int:
+        """Queue a job and return its id."""
+        validate_tenant(tenant)
+        if topics_file:
+            topics_file = os.path.abspath(topics_file)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO jobs (tenant, publication_url, topic, topics_file, max_attempts, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (tenant, publication_url, topic, topics_file, max_attempts, datetime.now().isoformat())
+            )
+            self._conn.execute('INSERT OR IGNORE INTO tenants (tenant) VALUES (?)', (tenant,))
+        return cursor.lastrowid
+
+    def claim(self, worker: str, max_per_tenant: int = 1, lease_seconds: float = 120.0) -> Optional[Job]:
+        """Lease the next job to ``worker``, or return None when nothing is claimable."""
+        while True:
+            now = time.time()
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    """
+                    SELECT j.id FROM jobs j JOIN tenants t ON t.tenant = j.tenant
+                    WHERE j.status = 'queued' AND j.available_at <= ?
+                      AND (SELECT COUNT(*) FROM jobs r WHERE r.tenant = j.tenant AND r.status = 'running') < ?
+                    ORDER BY t.last_served, j.id
+                    LIMIT 1
+                    """,
+                    (now, max_per_tenant)
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "started_at = ?, error = NULL WHERE id = ? AND status = 'queued'",
+                    (worker, now + lease_seconds, datetime.now().isoformat(), row['id'])
+                ).rowcount
+                if claimed:
+                    self._conn.execute(
+                        'UPDATE tenants SET last_served = (SELECT MAX(last_served) + 1 FROM tenants) '
+                        'WHERE tenant = (SELECT tenant FROM jobs WHERE id = ?)',
+                        (row['id'],)
+                    )
+                    return Job.from_row(self._conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone())
+            # Another runner process claimed it first; look again
+
+    def heartbeat(self, job_ids: Iterable[int], lease_seconds: float = 120.0):
+        """Extend the leases of jobs that are still being worked on."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running'",
+                [(time.time() + lease_seconds, job_id) for job_id in job_ids]
+            )
+
+    def set_stage(self, job_id: int, stage: str):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE jobs SET stage = ? WHERE id = ?', (stage, job_id))
+
+    def complete(self, job_id: int, result: Optional[Dict] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_expires = NULL, finished_at = ? WHERE id = ?",
+                (json.dumps(result) if result is not None else None, datetime.now().isoformat(), job_id)
+            )
+
+    def fail(self, job_id: int, error: str, retry_delay: float = 30.0) -> str:
+        """Record a failed attempt; re-queue with exponential backoff while attempts remain.
+
+        Returns:
+            str: The job's new status, 'queued' or 'failed'.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT attempts, max_attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row['attempts'] < row['max_attempts']:
+                delay = retry_delay * 2 ** (row['attempts'] - 1)
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, error = ?, "
+                    "available_at = ? WHERE id = ?",
+                    (error, time.time() + delay, job_id)
+                )
+                return 'queued'
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_expires = NULL, error = ?, finished_at = ? WHERE id = ?",
+                (error, datetime.now().isoformat(), job_id)
+            )
+            return 'failed'
+
+    def recover(self, all_running: bool = False) -> int:
+        """Re-queue running jobs whose lease has expired, e.g. after a crash.
+
+        Args:
+            all_running (bool): Re-queue every running job regardless of its lease; only
+                safe when no other runner is using this queue.
+        Returns:
+            int: Number of jobs re-queued (jobs out of attempts are failed instead).
+        """
+        now = time.time()
+        expired = '' if all_running else 'AND lease_expires < ?'
+        params = () if all_running else (now,)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted too many times', finished_at = ? "
+                f"WHERE status = 'running' AND attempts >= max_attempts {expired}",
+                (datetime.now().isoformat(), *params)
+            )
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, "
+                f"error = 'Interrupted; resumed' WHERE status = 'running' {expired}",
+                params
+            ).rowcount
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def jobs(self, tenant: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        clauses, params = [], []
+        if tenant:
+            clauses.append('tenant = ?')
+            params.append(tenant)
+        if status:
+            clauses.append('status = ?')
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM jobs {where} ORDER BY id", params).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {**{status: 0 for status in STATUSES}, **{row['status']: row['n'] for row in rows}}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,138 @@
+# utils/llm_cache.py
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.outputs import Generation
+from utils.tracing import tracer
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used);
+"""
+
+
+@dataclass
+class LLMCacheStats:
+    """Lookup counters for a PersistentLLMCache.
+
+    Attributes:
+        hits (int): Lookups answered from disk.
+        misses (int): Lookups that went to the model.
+        evictions (int): Entries dropped by the LRU policy.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4)}
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash the rendered prompt with the serialized model name and sampling parameters."""
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode('utf-8')).hexdigest()
+
+
+def llm_string_for(llm: Any, stop: Optional[list] = None) -> str:
+    """The ``llm_string`` LangChain keys ``llm``'s cache entries by, for lookups made outside ``generate``."""
+    params = llm.dict()
+    params['stop'] = stop
+    return str(sorted(params.items()))
+
+
+class PersistentLLMCache(BaseCache):
+    """Disk-backed LangChain cache for LLM responses with LRU eviction.
+
+    LangChain calls ``lookup``/``update`` with the rendered prompt and an
+    ``llm_string`` that serializes the model name and every sampling parameter
+    (temperature, base_url, stop, ...; see KeyedOllamaLLM), so a change to any of
+    them is a miss.
+    Entries live in a SQLite file and the least recently used ones are evicted
+    once ``max_entries`` or ``max_bytes`` is exceeded.
+
+    Attributes:
+        path (str): SQLite database file.
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of cached responses.
+        stats (LLMCacheStats): Hit/miss/eviction counters for this process.
+    Example:
+        >>> cache = PersistentLLMCache('newsletter_cache/llm_cache.db')
+        >>> llm = get_llm(cache=cache)
+    """
+    def __init__(self, path: str, max_entries: int = 2000, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = LLMCacheStats()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT response FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                tracer.count('llm_cache.lookup', result='miss')
+                return None
+            self._conn.execute('UPDATE llm_responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.stats.hits += 1
+        tracer.count('llm_cache.lookup', result='hit')
+        return [Generation(**generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        response = json.dumps(
+            [{'text': generation.text, 'generation_info': generation.generation_info} for generation in return_val],
+            ensure_ascii=False
+        )
+        now = time.time()
+        with tracer.span('llm_cache.write', bytes=len(response)), self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (cache_key(prompt, llm_string), response, len(response.encode('utf-8')), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute('SELECT key, size FROM llm_responses ORDER BY last_used').fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+            count -= 1
+            total -= size
+            self.stats.evictions += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM llm_responses')
+
+    def count(self) -> int:
+        """Number of cached responses."""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0]
@@ -0,0 +1,71 @@
+# utils/llm_gate.py
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM, BaseLLM
+from langchain_core.outputs import GenerationChunk
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from utils.tracing import tracer
+import functools
+
+
+class GatedLLM(LLM):
+    """Wraps a LangChain LLM so every request first takes a slot from a shared gate.
+
+    The gate is anything with ``acquire``/``release``, typically one ``threading.BoundedSemaphore``
+    shared by all jobs that talk to the same Ollama endpoint, so however many
+    tenants run at once the endpoint never sees more than its slot count of
+    concurrent requests. Model name and parameters are those of the wrapped LLM,
+    so cache keys are unchanged; give the cache to the wrapper rather than to
+    the wrapped model and cache hits never wait for a slot.
+
+    Attributes:
+        llm (BaseLLM): The model that actually serves requests (without a cache).
+        gate (Any): Semaphore held for the duration of each request.
+    Example:
+        >>> gate = threading.BoundedSemaphore(2)
+        >>> llm = GatedLLM(llm=OllamaLLM(model='llama3.2'), gate=gate, cache=llm_cache)
+    """
+    llm: BaseLLM
+    gate: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return self.llm._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.llm._identifying_params
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        with tracer.span('llm.gate_wait'):
+            self.gate.acquire()
+        try:
+            return self.llm.invoke(prompt, stop=stop, **kwargs)
+        finally:
+            self.gate.release()
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        with tracer.span('llm.gate_wait'):
+            self.gate.acquire()
+        try:
+            for token in self.llm.stream(prompt, stop=stop, **kwargs):
+                chunk = GenerationChunk(text=token)
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+        finally:
+            self.gate.release()
+
+
+def gated(fn: Callable, gate: Any) -> Callable:
+    """Wrap any endpoint call, e.g. an embedding function, so it holds a slot of ``gate``."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with tracer.span('llm.gate_wait'):
+            gate.acquire()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            gate.release()
+    return wrapper
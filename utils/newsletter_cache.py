@@ -0,0 +1,186 @@
+# utils/newsletter_cache.py
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from utils.corpus_store import CorpusStore
+from utils.tracing import tracer
+import hashlib
+import glob
+import os
+
+
+def content_hash(content: str) -> str:
+    """Return a stable SHA-256 hex digest of newsletter content."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def parse_datetime(value: str) -> Optional[datetime]:
+    """Parse an ISO timestamp (including a trailing 'Z') into a naive datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how much re-scraping the cache avoided.
+
+    Attributes:
+        hits (int): Entries served while still inside their TTL.
+        revalidated (int): Stale entries confirmed unchanged by a conditional request.
+        misses (int): URLs that had to be (re)scraped.
+    """
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4)}
+
+
+class TTLPolicy:
+    """Decides how long a cached newsletter stays fresh before it is revalidated.
+
+    Posts published more than ``pin_after`` ago rarely change, so they get the
+    longer ``pinned_ttl`` (None pins them forever). Everything else uses
+    ``fresh_ttl``. Stale entries are not discarded; they are revalidated.
+
+    Example:
+        >>> policy = TTLPolicy(fresh_ttl=timedelta(hours=6), pin_after=timedelta(days=14))
+        >>> policy.ttl_for({'date': '2023-01-01T00:00:00Z'}) is None
+        True
+    """
+    def __init__(self, fresh_ttl: timedelta = timedelta(days=1),
+                 pin_after: Optional[timedelta] = timedelta(days=30),
+                 pinned_ttl: Optional[timedelta] = None):
+        self.fresh_ttl = fresh_ttl
+        self.pin_after = pin_after
+        self.pinned_ttl = pinned_ttl
+
+    def ttl_for(self, entry: Dict) -> Optional[timedelta]:
+        published = parse_datetime(entry.get('date', ''))
+        if self.pin_after is not None and published and datetime.now() - published >= self.pin_after:
+            return self.pinned_ttl
+        return self.fresh_ttl
+
+    def is_fresh(self, entry: Dict) -> bool:
+        ttl = self.ttl_for(entry)
+        if ttl is None:
+            return True
+        validated = parse_datetime(entry.get('validated_at') or entry.get('scraped_at', ''))
+        return validated is not None and datetime.now() - validated < ttl
+
+
+class NewsletterCache:
+    """Newsletter cache with HTTP validators and content hashes, backed by a CorpusStore.
+
+    Each entry is the scraped record plus ``etag``, ``last_modified``,
+    ``content_hash`` and ``validated_at``. Entries are kept for as long as they
+    keep validating; the TTLPolicy only decides when to ask the server again.
+    Legacy one-JSON-per-URL cache files found in ``cache_dir`` are imported the
+    first time the store is opened.
+
+    Attributes:
+        cache_dir (str): Directory holding ``corpus.db``.
+        store (CorpusStore): The underlying SQLite corpus store.
+        policy (TTLPolicy): Freshness policy.
+        stats (CacheStats): Hit/miss/revalidated counters for this run.
+    """
+    def __init__(self, cache_dir: str, policy: Optional[TTLPolicy] = None, verbose: bool = False):
+        self.cache_dir = cache_dir
+        self.policy = policy or TTLPolicy()
+        self.verbose = verbose
+        self.stats = CacheStats()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.store = CorpusStore(os.path.join(cache_dir, 'corpus.db'))
+        if self.store.count() == 0 and glob.glob(os.path.join(cache_dir, '*.json')):
+            imported = self.store.import_json_dir(cache_dir)
+            print(f"Imported {imported} legacy cache files into {self.store.path}")
+
+    @staticmethod
+    def _with_hash(entry: Dict) -> Dict:
+        if not entry.get('content_hash'):
+            # Entries written before validators were tracked
+            entry['content_hash'] = content_hash(entry.get('content') or '')
+        return entry
+
+    def get(self, url: str) -> Optional[Dict]:
+        with tracer.span('cache.read', urls=1):
+            entry = self.store.get(url)
+        return self._with_hash(entry) if entry else None
+
+    def _classify(self, url: str, entry: Optional[Dict], revalidate: bool = False) -> Tuple[Optional[Dict], bool]:
+        if entry is None:
+            self.stats.misses += 1
+            tracer.count('cache.lookup', result='miss')
+            return None, False
+        if not revalidate and self.policy.is_fresh(entry):
+            self.stats.hits += 1
+            tracer.count('cache.lookup', result='hit')
+            if self.verbose:
+                print(f"Loading from cache: {url}")
+            return entry, True
+        tracer.count('cache.lookup', result='stale')
+        return entry, False
+
+    def lookup(self, url: str) -> Tuple[Optional[Dict], bool]:
+        """Return ``(entry, fresh)``; counts a hit for fresh entries and a miss for absent ones.
+
+        Stale entries are returned with ``fresh=False`` so the caller can revalidate
+        them and then call ``mark_revalidated`` or ``record_miss``.
+        """
+        return self._classify(url, self.get(url))
+
+    def lookup_many(self, urls: List[str], revalidate: bool = False) -> List[Tuple[Optional[Dict], bool]]:
+        """Batch version of ``lookup`` that reads all entries in a few queries.
+
+        With ``revalidate=True`` every existing entry is reported stale regardless of
+        its TTL, e.g. when discovery says the post changed upstream.
+        """
+        with tracer.span('cache.read', urls=len(urls)):
+            entries = self.store.get_many(urls)
+        return [self._classify(url, self._with_hash(entries[url]) if url in entries else None, revalidate)
+                for url in urls]
+
+    def put(self, url: str, data: Dict):
+        entry = dict(data)
+        entry['url'] = url
+        entry['content_hash'] = content_hash(entry.get('content') or '')
+        entry.setdefault('validated_at', entry.get('scraped_at', datetime.now().isoformat()))
+        try:
+            with tracer.span('cache.write', url=url):
+                self.store.upsert(entry)
+            if self.verbose:
+                print(f"Saved to cache: {url}")
+        except Exception as e:
+            print(f"Cache write error: {str(e)}")
+
+    def mark_revalidated(self, url: str, entry: Dict, etag: Optional[str] = None,
+                         last_modified: Optional[str] = None) -> Dict:
+        """Record that a stale entry is still current and bump its validation time."""
+        self.stats.revalidated += 1
+        entry = dict(entry)
+        if etag:
+            entry['etag'] = etag
+        if last_modified:
+            entry['last_modified'] = last_modified
+        entry['validated_at'] = datetime.now().isoformat()
+        self.put(url, entry)
+        if self.verbose:
+            print(f"Revalidated cache entry: {url}")
+        return entry
+
+    def record_miss(self):
+        """Count a stale entry that changed (or could not be revalidated)."""
+        self.stats.misses += 1
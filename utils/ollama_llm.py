@@ -0,0 +1,23 @@
+# utils/ollama_llm.py
+from langchain_ollama import OllamaLLM
+from typing import Any, Dict
+
+# Fields that change what the model answers; client settings (keep_alive, num_gpu, ...) do not
+KEY_FIELDS = ('model', 'base_url', 'format', 'mirostat', 'mirostat_eta', 'mirostat_tau', 'num_ctx', 'num_predict',
+              'repeat_last_n', 'repeat_penalty', 'temperature', 'stop', 'tfs_z', 'top_k', 'top_p')
+
+
+class KeyedOllamaLLM(OllamaLLM):
+    """OllamaLLM whose response cache entries are keyed by model and sampling parameters.
+
+    LangChain builds a cache entry's ``llm_string`` from ``_identifying_params``,
+    which OllamaLLM leaves empty, so every model and temperature shared one key
+    per prompt: a greedy run could be answered with a sampled response, or
+    another model's. This subclass reports the fields that shape the output.
+
+    Example:
+        >>> llm = KeyedOllamaLLM(model='llama3.2', temperature=0, top_k=1, cache=llm_cache)
+    """
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in KEY_FIELDS}
@@ -0,0 +1,158 @@
+# utils/pipeline.py
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.chunking import ChunkPacker
+from utils.tracing import tracer
+import contextvars
+import threading
+import queue
+
+_DONE = object()
+
+
+class ScrapeStream:
+    """Runs BeehiivScraper in a background thread and yields records as they complete.
+
+    Records pass through a bounded queue: when the consumer falls behind, the
+    scraper blocks on the full queue instead of piling up pages in memory, and
+    resumes as soon as the consumer catches up. Scraping starts when the stream
+    is created, so the caller can do other work first. ``close`` (also called
+    when iteration ends) waits for the scrape thread, so nothing is written to the
+    store behind the caller's back afterwards.
+
+    Attributes:
+        max_buffered (int): Records held between scraper and consumer.
+    Example:
+        >>> stream = ScrapeStream(scraper, [(new_urls, False), (changed_urls, True)])
+        >>> for newsletter in stream:
+        ...     analyzer.add(format_newsletter(newsletter))
+    """
+    def __init__(self, scraper, jobs: List[Tuple[List[str], bool]], max_buffered: int = 32):
+        self.scraper = scraper
+        self.jobs = jobs
+        self.max_buffered = max_buffered
+        self._queue: queue.Queue = queue.Queue(maxsize=max_buffered)
+        self._stopped = threading.Event()
+        self._error: Optional[BaseException] = None
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._run,), name='scrape-stream', daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> None:
+        # Blocking here is the backpressure; wake up periodically to notice close()
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            for urls, revalidate in self.jobs:
+                if urls and not self._stopped.is_set():
+                    self.scraper.process_multiple_urls(
+                        urls, revalidate=revalidate,
+                        on_result=lambda url, data: data and self._put(data))
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(_DONE)
+
+    def __iter__(self) -> Iterator[Dict]:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self.close()
+        if self._error:
+            raise self._error
+
+    def close(self, timeout: Optional[float] = 60.0) -> bool:
+        """Stop scraping and wait up to ``timeout`` seconds for the scrape thread to exit.
+
+        Remaining jobs are skipped, but the batch the scraper is on runs to completion
+        (process_multiple_urls cannot be interrupted), so records may still be stored
+        until the thread exits.
+
+        Returns:
+            bool: Whether the thread has exited.
+        """
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+class StreamingStyleAnalyzer:
+    """The map-reduce style analysis of NewsletterAI, fed one newsletter at a time.
+
+    Newsletters are packed into token-bounded chunks as they arrive (see
+    ChunkPacker) and every full chunk goes straight to ``style_notes`` on a
+    thread pool, so inference runs while documents are still being scraped. At
+    most ``max_pending`` chunks are queued or running; ``add`` blocks beyond that,
+    which in turn pauses an upstream ScrapeStream. ``finish`` analyzes the last
+    partial chunk and merges all notes once the stream is closed.
+
+    Attributes:
+        newsletter_ai (NewsletterAI): Provides ``style_notes``, ``merge_style_notes`` and ``analyze_style``.
+        max_chunk_tokens (int): Estimated token budget per map chunk.
+        max_workers (int): Concurrent LLM calls.
+        max_pending (int): Chunks allowed in flight before ``add`` blocks.
+        merge_fan_in (int): Notes merged per reduce call.
+    Example:
+        >>> analyzer = StreamingStyleAnalyzer(newsletter_ai)
+        >>> for newsletter in ScrapeStream(scraper, [(urls, False)]):
+        ...     analyzer.add(format_newsletter(newsletter))
+        >>> style_guide = analyzer.finish()
+    """
+    def __init__(self, newsletter_ai, max_chunk_tokens: int = 3000, max_workers: int = 4,
+                 max_pending: Optional[int] = None, merge_fan_in: int = 4):
+        self.newsletter_ai = newsletter_ai
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 2
+        self.merge_fan_in = merge_fan_in
+        self.documents = 0
+        self._packer = ChunkPacker(max_chunk_tokens)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='style-notes')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._futures: List[Future] = []
+
+    def _submit(self, chunk: str):
+        with tracer.span('pipeline.backpressure_wait'):
+            self._slots.acquire()
+        future = self._executor.submit(contextvars.copy_context().run, self.newsletter_ai.style_notes, chunk)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def add(self, newsletter: str):
+        """Add one formatted newsletter; may block while ``max_pending`` chunks are in flight."""
+        self.documents += 1
+        for chunk in self._packer.add(newsletter):
+            self._submit(chunk)
+
+    def finish(self, style_stats: Optional[str] = None) -> str:
+        """Wait for the map calls and merge their notes into the style guide."""
+        remaining = self._packer.flush()
+        try:
+            if not self._futures:
+                if not remaining:
+                    raise ValueError("No newsletters to analyze")
+                if len(remaining) == 1:
+                    # Everything fit one chunk: analyze it directly, as analyze_style_map_reduce does
+                    return self.newsletter_ai.analyze_style(remaining[0], style_stats=style_stats)
+            for chunk in remaining:
+                self._submit(chunk)
+            notes = [future.result() for future in self._futures]
+            return self.newsletter_ai.merge_style_notes(notes, max_workers=self.max_workers,
+                                                        merge_fan_in=self.merge_fan_in, style_stats=style_stats)
+        finally:
+            self.close()
+
+    def close(self):
+        """Drop queued map calls (e.g. when the final plan turns out not to need a rebuild)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,282 @@
+# utils/resilience.py
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from utils.tracing import tracer
+import contextlib
+import threading
+import requests
+import asyncio
+import random
+import time
+
+T = TypeVar('T')
+
+# Statuses worth retrying: the server or something in front of it is overloaded or briefly down
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Statuses that mean the post is not coming back; retrying or resuming them is pointless
+GONE_STATUS = frozenset({404, 410})
+
+
+class HTTPStatusError(Exception):
+    """A page that loaded with an error status (the browser path does not raise on those)."""
+    def __init__(self, status: int, url: str = '', retry_after: Optional[str] = None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+        self.retry_after = retry_after
+
+
+class NoContentError(Exception):
+    """A page that loaded fine but had no newsletter content to extract."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open."""
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host} for another {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by ``error``, if any."""
+    if isinstance(error, HTTPStatusError):
+        return error.status
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` is transient: a timeout, a dropped connection or a retryable status.
+
+    An open circuit is not: requests to that host fail fast until the breaker lets a probe through.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, TimeoutError, asyncio.TimeoutError,
+                          ConnectionError)):
+        return True
+    # Playwright navigation errors (timeouts, net::ERR_*) without importing Playwright
+    return type(error).__module__.startswith('playwright')
+
+
+def is_gone(error: BaseException) -> bool:
+    return error_status(error) in GONE_STATUS
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the host is failing (transient errors or an open circuit), not the page."""
+    return isinstance(error, CircuitOpenError) or is_retryable(error)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay requested by a ``Retry-After`` header (seconds or HTTP date)."""
+    if isinstance(error, HTTPStatusError):
+        value = error.retry_after
+    else:
+        response = getattr(error, 'response', None)
+        value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def describe_error(error: BaseException) -> str:
+    """Short failure category for summaries, e.g. 'HTTP 503', 'timeout', 'circuit open'."""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit open'
+    if isinstance(error, NoContentError):
+        return 'no content'
+    status = error_status(error)
+    if status is not None:
+        return f"HTTP {status}"
+    if isinstance(error, (requests.Timeout, TimeoutError, asyncio.TimeoutError)) or 'Timeout' in type(error).__name__:
+        return 'timeout'
+    if isinstance(error, (requests.ConnectionError, ConnectionError)):
+        return 'connection error'
+    return type(error).__name__
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attempt ``n`` (1-based) that failed is followed by a sleep drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]``, so concurrent requests that
+    failed together do not retry in lockstep. A ``Retry-After`` from the server is
+    honored as a lower bound, capped at ``max_delay``.
+
+    Attributes:
+        max_attempts (int): Attempts per request, including the first.
+        base_delay (float): Backoff ceiling after the first failure, in seconds.
+        max_delay (float): Upper bound of any single sleep.
+        jitter (bool): Randomize sleeps; without it every sleep is the full ceiling.
+    Example:
+        >>> policy = RetryPolicy(max_attempts=4, base_delay=0.5)
+        >>> retry_call(lambda: session.get(url), policy)
+    """
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 jitter: bool = True, seed: Optional[int] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Seconds to sleep after failed attempt ``attempt``."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = self._random.uniform(0, ceiling) if self.jitter else ceiling
+        requested = retry_after_seconds(error) if error is not None else None
+        if requested is not None:
+            delay = max(delay, min(requested, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Stops calling a host after repeated transient failures.
+
+    Closed, it lets every call through and counts consecutive failures. After
+    ``failure_threshold`` of them it opens: calls fail immediately with
+    CircuitOpenError for ``reset_timeout`` seconds. Then it is half-open and lets
+    a single probe through; success closes it again, failure re-opens it.
+    Thread-safe, since the HTTP path calls it from worker threads. Openings are
+    counted (``opened`` and the ``circuit.opened`` counter), not printed; see
+    BeehiivScraper.failure_summary.
+
+    Attributes:
+        host (str): Host the breaker guards.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a probe.
+        opened (int): How often the circuit opened.
+    """
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.host = host
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.opened = 0
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half_open' if time.monotonic() - self._opened_at >= self.reset_timeout else 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(self.host, remaining)
+            now = time.monotonic()
+            # Another call is probing; check back shortly (a probe that never reported back
+            # is given up on after reset_timeout)
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                raise CircuitOpenError(self.host, min(1.0, self.reset_timeout))
+            self._probe_started = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_started is not None or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._opened_at is None:
+                    self.opened += 1
+                    tracer.count('circuit.opened', host=self.host)
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per host, created on first use."""
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def opened(self) -> Dict[str, int]:
+        """``{host: times opened}`` for every host whose circuit opened at least once."""
+        with self._lock:
+            return {host: breaker.opened for host, breaker in self._breakers.items() if breaker.opened}
+
+
+def _settle(breaker: Optional[CircuitBreaker], error: Optional[BaseException]):
+    """Feed an attempt's outcome to the breaker; only transient failures count against a host."""
+    if breaker is None or isinstance(error, CircuitOpenError):
+        return
+    if error is not None and is_retryable(error):
+        breaker.record_failure()
+    else:
+        # A response, even a 404, means the host is up
+        breaker.record_success()
+
+
+def retry_call(call: Callable[[], T], policy: RetryPolicy, breaker: Optional[CircuitBreaker] = None,
+               path: str = 'http') -> T:
+    """Run ``call`` with retries; raises the last error once attempts are exhausted or it is permanent."""
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            if breaker:
+                breaker.before_call()
+            result = call()
+        except Exception as e:
+            _settle(breaker, e)
+            if not is_retryable(e) or attempt == policy.max_attempts:
+                raise
+            tracer.count('scrape.retries', path=path, reason=describe_error(e))
+            time.sleep(policy.delay(attempt, e))
+        else:
+            _settle(breaker, None)
+            return result
+
+
+async def aretry_call(call: Callable[[], Awaitable[T]], policy: RetryPolicy, breaker: Optional[CircuitBreaker] = None,
+                      slot: Optional[Callable[[], contextlib.AbstractAsyncContextManager]] = None,
+                      path: str = 'http') -> T:
+    """Async retry_call. ``slot()`` is entered around every attempt (e.g. per-host limits), not around sleeps."""
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            async with (slot() if slot else contextlib.nullcontext()):
+                if breaker:
+                    breaker.before_call()
+                result = await call()
+        except Exception as e:
+            _settle(breaker, e)
+            if not is_retryable(e) or attempt == policy.max_attempts:
+                raise
+            tracer.count('scrape.retries', path=path, reason=describe_error(e))
+            await asyncio.sleep(policy.delay(attempt, e))
+        else:
+            _settle(breaker, None)
+            return result
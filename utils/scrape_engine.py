@@ -0,0 +1,230 @@
+# utils/scrape_engine.py
+from typing import Dict, Optional, Callable, List, Tuple
+from urllib.parse import urlparse
+from datetime import datetime
+from utils.resilience import RetryPolicy, CircuitBreakers, HTTPStatusError, aretry_call
+from utils.tracing import tracer
+import contextlib
+import asyncio
+import time
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+VIEWPORT = {'width': 1920, 'height': 1080}
+
+# Pull every field in a single round trip instead of one evaluate per field
+EXTRACT_JS = """() => ({
+    title: document.querySelector("h1")?.innerText || "",
+    date: document.querySelector("time")?.getAttribute("datetime") || "",
+    content: document.querySelector("main")?.innerText || "",
+    author: document.querySelector(".post-author, .author")?.innerText || ""
+})"""
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``. Each
+    call to ``acquire`` consumes one token, sleeping only as long as needed for
+    the next token to become available. A non-positive rate disables limiting.
+
+    Example:
+        >>> bucket = TokenBucket(rate=2.0, capacity=4)
+        >>> await bucket.acquire()
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                tracer.observe('rate_limit.sleep_ms', delay * 1000)
+                await asyncio.sleep(delay)
+
+
+class AsyncScrapeEngine:
+    """Concurrent newsletter scraper built on one long-lived Chromium instance.
+
+    The engine launches a single headless browser and keeps a pool of reusable
+    browser contexts, each with one open page. Requests borrow a page from the
+    pool, so the cost of starting Chromium is paid once per run instead of once
+    per URL. Concurrency against any single host is capped by a semaphore and
+    paced by a token bucket. Failed navigations are retried with backoff behind a
+    per-host circuit breaker; the final error of a URL that still failed is kept
+    in ``failures``.
+
+    Attributes:
+        pool_size (int): Number of contexts/pages kept open (global concurrency).
+        per_host_concurrency (int): Maximum in-flight requests per host.
+        requests_per_second (float): Token refill rate per host (<= 0 disables).
+        burst (float): Token bucket capacity per host.
+        page_timeout (int): Default Playwright timeout in milliseconds.
+        verbose (bool): Print per-URL diagnostics.
+        retry_policy (RetryPolicy): Backoff between attempts.
+        breakers (CircuitBreakers): Per-host circuit breakers, shareable with the HTTP path.
+        failures (Dict[str, BaseException]): Final error per failed URL.
+    Example:
+        >>> async with AsyncScrapeEngine(pool_size=4) as engine:
+        ...     results = await engine.scrape_many(urls)
+    """
+    def __init__(self, pool_size: int = 4, per_host_concurrency: int = 2,
+                 requests_per_second: float = 2.0, burst: Optional[float] = None,
+                 page_timeout: int = 60000, verbose: bool = False, retry_policy: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakers] = None):
+        self.pool_size = max(1, pool_size)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.page_timeout = page_timeout
+        self.verbose = verbose
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or CircuitBreakers()
+        self.failures: Dict[str, BaseException] = {}
+        self._playwright = None
+        self._browser = None
+        self._pages: Optional[asyncio.Queue] = None
+        self._host_limits: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Launch the shared browser and fill the page pool."""
+        from playwright.async_api import async_playwright
+        with tracer.span('browser.launch', pool_size=self.pool_size):
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._pages = asyncio.Queue()
+            for _ in range(self.pool_size):
+                self._pages.put_nowait(await self._new_page())
+
+    async def close(self):
+        """Close the browser and stop Playwright."""
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _new_page(self):
+        context = await self._browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        page = await context.new_page()
+        page.set_default_timeout(self.page_timeout)
+        return page
+
+    def _limits_for(self, url: str) -> Tuple[asyncio.Semaphore, TokenBucket]:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = (
+                asyncio.Semaphore(self.per_host_concurrency),
+                TokenBucket(self.requests_per_second, self.burst),
+            )
+        return self._host_limits[host]
+
+    async def _extract(self, page, url: str) -> Dict:
+        with tracer.span('page.goto', url=url):
+            response = await page.goto(url, wait_until='networkidle')
+        if response is not None and response.status >= 400:
+            raise HTTPStatusError(response.status, url, response.headers.get('retry-after'))
+        with tracer.span('page.wait_for_selector', url=url):
+            await page.wait_for_selector('main', timeout=30000)
+        with tracer.span('page.evaluate', url=url):
+            data = await page.evaluate(EXTRACT_JS)
+        return {
+            'url': url,
+            'title': data['title'],
+            'date': data['date'],
+            'content': data['content'],
+            'author': data['author'],
+            'scraped_at': datetime.now().isoformat()
+        }
+
+    async def _attempt(self, url: str) -> Dict:
+        """One navigation on a pooled page; raises on failure."""
+        with tracer.span('scrape.page_wait', url=url):
+            page = await self._pages.get()
+        try:
+            if self.verbose:
+                print(f"\nScraping new content: {url}")
+            with tracer.span('scrape.browser', url=url):
+                return await self._extract(page, url)
+        except Exception:
+            if page.is_closed():
+                # A crashed page must not poison the pool
+                await page.context.close()
+                page = await self._new_page()
+            raise
+        finally:
+            self._pages.put_nowait(page)
+
+    async def scrape(self, url: str) -> Optional[Dict]:
+        """Scrape a single URL using a pooled page, with retries. Returns None on failure."""
+        semaphore, bucket = self._limits_for(url)
+
+        @contextlib.asynccontextmanager
+        async def slot():
+            # Time spent queued behind host limits and the rate limiter; the page pool
+            # is timed by scrape.page_wait
+            wait = tracer.start_span('scrape.wait', url=url)
+            try:
+                await semaphore.acquire()
+                try:
+                    await bucket.acquire()
+                except BaseException:
+                    semaphore.release()
+                    raise
+            finally:
+                wait.end()
+            try:
+                yield
+            finally:
+                semaphore.release()
+
+        try:
+            return await aretry_call(lambda: self._attempt(url), self.retry_policy,
+                                     self.breakers.for_url(url), slot=slot, path='browser')
+        except Exception as e:
+            self.failures[url] = e
+            tracer.count('scrape.errors', path='browser')
+            if self.verbose:
+                print(f"Error scraping {url}: {str(e)}")
+            return None
+
+    async def scrape_many(self, urls: List[str],
+                          on_result: Callable[[int, str, Optional[Dict]], None] = None) -> List[Optional[Dict]]:
+        """Scrape many URLs concurrently.
+
+        Args:
+            urls (List[str]): URLs to scrape.
+            on_result (Callable, optional): Called as ``on_result(index, url, data)``
+                as soon as each URL finishes, in completion order.
+        Returns:
+            List[Optional[Dict]]: Results in the same order as ``urls``; failed
+                URLs are None.
+        """
+        results: List[Optional[Dict]] = [None] * len(urls)
+
+        async def run(index: int, url: str):
+            results[index] = await self.scrape(url)
+            if on_result:
+                on_result(index, url, results[index])
+
+        await asyncio.gather(*(run(i, url) for i, url in enumerate(urls)))
+        return results
@@ -0,0 +1,139 @@
+# utils/style_guide_store.py
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+
+ARTIFACT_VERSION = 1
+
+
+def corpus_fingerprint(newsletters: Iterable[Dict]) -> Dict[str, str]:
+    """Map each newsletter URL to its content hash."""
+    return {newsletter['url']: newsletter['content_hash'] for newsletter in newsletters}
+
+
+@dataclass
+class StyleGuideArtifact:
+    """A persisted style guide plus the corpus it was built from.
+
+    Attributes:
+        guide (str): The style guide text.
+        fingerprint (Dict[str, str]): ``{url: content_hash}`` of every post folded in.
+        revision (int): Incremented on every rebuild or update.
+        base_size (int): Number of posts at the last full rebuild.
+        added_since_rebuild (int): Posts folded in incrementally since that rebuild.
+        built_at (str): ISO time of the last full rebuild.
+        updated_at (str): ISO time of the last change.
+        version (int): Artifact format version.
+    """
+    guide: str
+    fingerprint: Dict[str, str]
+    revision: int = 1
+    base_size: int = 0
+    added_since_rebuild: int = 0
+    built_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    version: int = ARTIFACT_VERSION
+
+    @property
+    def digest(self) -> str:
+        """Order-independent digest of the fingerprint."""
+        payload = json.dumps(sorted(self.fingerprint.items()))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({**asdict(self), 'digest': self.digest}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['StyleGuideArtifact']:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Style guide artifact read error: {str(e)}")
+            return None
+        if data.get('version') != ARTIFACT_VERSION:
+            return None
+        data.pop('digest', None)
+        return cls(**data)
+
+
+@dataclass
+class StyleGuidePlan:
+    """What to do with the style guide for the current corpus.
+
+    Attributes:
+        action (str): 'skip', 'update' or 'rebuild'.
+        new_urls (List[str]): Posts that are new or whose content changed.
+        removed_urls (List[str]): Posts folded in earlier that are no longer in the corpus.
+        reason (str): Human-readable explanation.
+    """
+    action: str
+    new_urls: List[str] = field(default_factory=list)
+    removed_urls: List[str] = field(default_factory=list)
+    reason: str = ''
+
+
+class RebuildPolicy:
+    """Decides between skipping, incrementally updating, or fully rebuilding the guide.
+
+    A full rebuild happens when at least ``max_added`` posts have been folded in
+    since the last rebuild (the roadmap's "every 10 newsletters"), or when the
+    share of added, changed and removed posts relative to the current corpus
+    exceeds ``max_drift``. Measuring against the current corpus rather than the
+    one last rebuilt keeps a small archive that grows by a post or two on the
+    incremental path.
+
+    Example:
+        >>> plan = RebuildPolicy(max_added=10).plan(artifact, fingerprint)
+        >>> plan.action
+        'update'
+    """
+    def __init__(self, max_added: int = 10, max_drift: float = 0.5):
+        self.max_added = max_added
+        self.max_drift = max_drift
+
+    def plan(self, artifact: Optional[StyleGuideArtifact], fingerprint: Dict[str, str]) -> StyleGuidePlan:
+        if artifact is None:
+            return StyleGuidePlan('rebuild', list(fingerprint), reason='no existing style guide')
+
+        new_urls = [url for url, digest in fingerprint.items() if artifact.fingerprint.get(url) != digest]
+        removed_urls = [url for url in artifact.fingerprint if url not in fingerprint]
+        if not new_urls and not removed_urls:
+            return StyleGuidePlan('skip', reason='corpus unchanged')
+
+        added = artifact.added_since_rebuild + len(new_urls)
+        drift = (added + len(removed_urls)) / max(len(fingerprint), 1)
+        if added >= self.max_added:
+            return StyleGuidePlan('rebuild', new_urls, removed_urls,
+                                  reason=f"{added} posts added since last rebuild")
+        if drift > self.max_drift:
+            return StyleGuidePlan('rebuild', new_urls, removed_urls,
+                                  reason=f"corpus drift {drift:.0%} exceeds {self.max_drift:.0%}")
+        if removed_urls:
+            return StyleGuidePlan('rebuild', new_urls, removed_urls,
+                                  reason=f"{len(removed_urls)} posts removed")
+        return StyleGuidePlan('update', new_urls, reason=f"{len(new_urls)} new or changed posts")
+
+    def predict(self, artifact: Optional[StyleGuideArtifact], known_urls: Iterable[str],
+                pending_urls: Iterable[str]) -> StyleGuidePlan:
+        """Plan before scraping, assuming stored posts are unchanged and pending ones all change.
+
+        Lets the caller start a full analysis while scraping is still running; the
+        real plan is made once the corpus is final.
+        """
+        pending = set(pending_urls)
+        previous = artifact.fingerprint if artifact else {}
+        fingerprint = {url: previous.get(url, '') for url in known_urls if url not in pending}
+        fingerprint.update((url, '') for url in pending)
+        return self.plan(artifact, fingerprint)
@@ -0,0 +1,320 @@
+# utils/stylometry.py
+from dataclasses import dataclass, asdict, field
+from collections import defaultdict
+from utils.chunking import CHARS_PER_TOKEN, estimate_tokens
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import itertools
+import re
+
+TRANSITIONS = (
+    'however', 'but', 'so', 'meanwhile', 'instead', 'still', 'plus', 'now', 'then',
+    'finally', 'ultimately', 'because', 'that said', 'in other words', 'for example',
+    'for instance', 'on the other hand', 'in short', 'which means', 'the bottom line',
+    'to put it simply', 'as a result', 'in fact', 'first', 'second', 'lastly'
+)
+
+STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with from as is are was were be been being it its
+this that these those i you he she we they me him her us them my your our their his hers not no
+do does did have has had will would can could should may might just so than then there here what
+which who whom when where why how all any both each few more most other some such only own same
+too very s t don now into over under again further once about against between through during
+before after above below up down out off
+""".split())
+
+# Words, sentence terminators and paragraph breaks
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.!?]+(?=\s)|\n")
+_LIST_LINE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+
+
+def _summary(values: np.ndarray) -> Dict[str, float]:
+    if values.size == 0:
+        return {'mean': 0.0, 'median': 0.0, 'p10': 0.0, 'p90': 0.0}
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {'mean': round(float(values.mean()), 1), 'median': round(float(median), 1),
+            'p10': round(float(p10), 1), 'p90': round(float(p90), 1)}
+
+
+def _syllables(vocabulary: np.ndarray) -> np.ndarray:
+    """Heuristic syllable counts, computed once per distinct word."""
+    counts = np.fromiter((len(_VOWEL_GROUPS.findall(word)) for word in vocabulary), dtype=np.int32,
+                         count=len(vocabulary))
+    silent_e = np.fromiter((word.endswith('e') and not word.endswith('le') for word in vocabulary),
+                           dtype=bool, count=len(vocabulary))
+    return np.maximum(counts - (silent_e & (counts > 1)), 1)
+
+
+def _top_ngrams(word_ids: np.ndarray, doc_ids: np.ndarray, vocabulary: np.ndarray,
+                n: int, top_n: int) -> List[Tuple[str, int]]:
+    """Most frequent n-grams that stay within one document and are not all stopwords."""
+    if word_ids.size < n:
+        return []
+    vocab_size = len(vocabulary)
+    length = word_ids.size - n + 1
+    # Documents are contiguous, so a window stays inside one if its ends match
+    keep = doc_ids[:length] == doc_ids[n - 1:]
+    # A window is informative when it holds at least one non-stopword
+    is_stop = np.fromiter((word in STOPWORDS for word in vocabulary), dtype=bool, count=vocab_size)
+    content_before = np.concatenate(([0], np.cumsum(~is_stop[word_ids])))
+    keep &= content_before[n:] > content_before[:length]
+    if not keep.any():
+        return []
+    keys = np.zeros(int(keep.sum()), dtype=np.int64)
+    for offset in range(n):
+        keys = keys * vocab_size + word_ids[offset:offset + length][keep]
+    unique, counts = np.unique(keys, return_counts=True)
+    order = np.argsort(-counts, kind='stable')[:top_n]
+    phrases = []
+    for key, count in zip(unique[order], counts[order]):
+        if count < 2:
+            break
+        ids = []
+        for _ in range(n):
+            key, word_id = divmod(int(key), vocab_size)
+            ids.append(word_id)
+        phrases.append((' '.join(vocabulary[ids[::-1]]), int(count)))
+    return phrases
+
+
+@dataclass
+class StyleProfile:
+    """Deterministic style statistics computed directly from the corpus.
+
+    Attributes:
+        documents (int): Number of newsletters profiled.
+        words (int): Total words.
+        sentence_words (Dict[str, float]): Words per sentence (mean/median/p10/p90).
+        paragraph_words (Dict[str, float]): Words per paragraph.
+        paragraphs_per_post (float): Mean paragraphs per newsletter.
+        list_line_share (float): Share of paragraphs formatted as list items.
+        question_share (float): Share of sentences that are questions.
+        exclamation_share (float): Share of sentences ending with '!'.
+        flesch_reading_ease (float): Flesch reading ease over the whole corpus.
+        flesch_kincaid_grade (float): Flesch-Kincaid grade level.
+        transitions (Dict[str, float]): Transition phrases per 1,000 words.
+        bigrams (List[Tuple[str, int]]): Most frequent two-word phrases.
+        trigrams (List[Tuple[str, int]]): Most frequent three-word phrases.
+    """
+    documents: int = 0
+    words: int = 0
+    sentence_words: Dict[str, float] = field(default_factory=dict)
+    paragraph_words: Dict[str, float] = field(default_factory=dict)
+    paragraphs_per_post: float = 0.0
+    list_line_share: float = 0.0
+    question_share: float = 0.0
+    exclamation_share: float = 0.0
+    flesch_reading_ease: float = 0.0
+    flesch_kincaid_grade: float = 0.0
+    transitions: Dict[str, float] = field(default_factory=dict)
+    bigrams: List[Tuple[str, int]] = field(default_factory=list)
+    trigrams: List[Tuple[str, int]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+    def to_prompt(self) -> str:
+        """Render the profile as a compact block for an LLM prompt."""
+        def dist(stats):
+            return f"mean {stats.get('mean', 0)}, median {stats.get('median', 0)}, 10-90% {stats.get('p10', 0)}-{stats.get('p90', 0)}"
+        transitions = ', '.join(f"{phrase} ({rate})" for phrase, rate in self.transitions.items()) or 'none'
+        return '\n'.join([
+            f"Corpus: {self.documents} newsletters, {self.words} words",
+            f"Words per sentence: {dist(self.sentence_words)}",
+            f"Words per paragraph: {dist(self.paragraph_words)}; {self.paragraphs_per_post} paragraphs per post",
+            f"List-item paragraphs: {self.list_line_share:.0%}; questions: {self.question_share:.0%} of sentences; "
+            f"exclamations: {self.exclamation_share:.0%}",
+            f"Readability: Flesch reading ease {self.flesch_reading_ease}, grade level {self.flesch_kincaid_grade}",
+            f"Transitions per 1,000 words: {transitions}",
+            f"Common phrases: {', '.join(f'{p} ({c})' for p, c in self.bigrams + self.trigrams) or 'none'}",
+        ])
+
+
+def stats_block(style_stats: Optional[str]) -> str:
+    """Wrap measured style statistics for a prompt; empty when there are none."""
+    if not style_stats:
+        return ""
+    return f"""
+            Measured style statistics for the whole corpus (computed directly from the
+            text; treat them as ground truth for lengths, formatting, phrases and transitions):
+            {style_stats}
+            """
+
+
+def representative_excerpts(texts: List[str], max_tokens: int = 1500, count: int = 4) -> List[str]:
+    """Opening paragraphs of the ``count`` texts closest to the median length.
+
+    Gives a style prompt a few typical posts to quote from next to the measured
+    statistics, within a fixed budget however large the corpus is. Excerpts keep
+    the corpus order and are cut on paragraph boundaries.
+
+    Args:
+        texts (List[str]): Documents, e.g. formatted newsletters.
+        max_tokens (int): Estimated token budget shared by all excerpts.
+        count (int): Maximum number of excerpts.
+    Returns:
+        List[str]: The excerpts.
+    """
+    texts = [text for text in texts if text and text.strip()]
+    if not texts:
+        return []
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    chosen = np.sort(np.argsort(np.abs(lengths - np.median(lengths)), kind='stable')[:max(1, count)])
+    budget = max(1, max_tokens // len(chosen))
+    excerpts = []
+    for i in chosen:
+        excerpt = ''
+        for paragraph in texts[i].split('\n'):
+            candidate = f"{excerpt}\n{paragraph}" if excerpt else paragraph
+            if estimate_tokens(candidate) > budget:
+                break
+            excerpt = candidate
+        # A single oversized opening paragraph is cut instead of dropped
+        excerpts.append(excerpt or texts[i][:budget * CHARS_PER_TOKEN])
+    return excerpts
+
+
+def _phrase_counts(word_ids: np.ndarray, index: Dict[str, int], phrases: Tuple[str, ...]) -> Dict[str, int]:
+    """Count occurrences of multi-word phrases by comparing shifted id arrays."""
+    counts = {}
+    for phrase in phrases:
+        parts = phrase.split()
+        if any(part not in index for part in parts) or word_ids.size < len(parts):
+            counts[phrase] = 0
+            continue
+        length = word_ids.size - len(parts) + 1
+        match = np.ones(length, dtype=bool)
+        for offset, part in enumerate(parts):
+            match &= word_ids[offset:offset + length] == index[part]
+        counts[phrase] = int(match.sum())
+    return counts
+
+
+def compute_style_profile(texts: List[str], top_n: int = 12, top_transitions: int = 10) -> StyleProfile:
+    """Compute a StyleProfile for a list of newsletter texts.
+
+    Each document is tokenized once into words, sentence terminators and
+    paragraph breaks, and every token is mapped to an integer id. Sentence and
+    paragraph lengths, n-gram and transition counts and readability scores are
+    then computed with NumPy over the whole corpus at once. Tokenizing is the
+    bulk of the cost: about 1 s for 3,000 posts (8.5 MB of text) on one core.
+
+    Example:
+        >>> profile = compute_style_profile([newsletter['content'] for newsletter in newsletters])
+        >>> print(profile.to_prompt())
+    """
+    texts = [text for text in texts if text and text.strip()]
+    if not texts:
+        return StyleProfile()
+
+    # Assigns the next free id to unseen tokens at C speed via map()
+    vocabulary_index: Dict[str, int] = defaultdict()
+    vocabulary_index.default_factory = vocabulary_index.__len__
+    documents, paragraph_counts = [], []
+    list_paragraphs = questions = exclamations = 0
+    for text in texts:
+        paragraphs = [p for p in text.split('\n') if p.strip()]
+        paragraph_counts.append(len(paragraphs))
+        list_paragraphs += sum(1 for p in paragraphs if _LIST_LINE.match(p))
+        questions += text.count('?')
+        exclamations += text.count('!')
+        documents.append(_TOKEN.findall(text.lower() + '\n'))
+
+    token_counts = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+    token_ids = np.fromiter(map(vocabulary_index.__getitem__, itertools.chain.from_iterable(documents)),
+                            dtype=np.int64, count=int(token_counts.sum()))
+    token_docs = np.repeat(np.arange(len(documents)), token_counts)
+    del documents
+    tokens_vocab = np.array(list(vocabulary_index), dtype=str)
+    is_break = np.char.equal(tokens_vocab, '\n')[token_ids]
+    is_end = (np.char.startswith(tokens_vocab, '.') | np.char.startswith(tokens_vocab, '!')
+              | np.char.startswith(tokens_vocab, '?'))[token_ids] | is_break
+    word_flags = ~(np.char.equal(tokens_vocab, '\n') | np.char.startswith(tokens_vocab, '.')
+                   | np.char.startswith(tokens_vocab, '!') | np.char.startswith(tokens_vocab, '?'))
+    is_word = word_flags[token_ids]
+
+    # Words seen before each boundary; differences give per-unit lengths
+    words_before = np.cumsum(is_word)
+    sentence_lengths = np.diff(np.concatenate(([0], words_before[is_end])))
+    sentence_lengths = sentence_lengths[sentence_lengths > 0].astype(np.float64)
+    paragraph_lengths = np.diff(np.concatenate(([0], words_before[is_break])))
+    paragraph_lengths = paragraph_lengths[paragraph_lengths > 0].astype(np.float64)
+
+    # Compact word-only vocabulary for n-grams, syllables and transitions
+    vocabulary = tokens_vocab[word_flags]
+    remap = np.cumsum(word_flags) - 1
+    word_ids = remap[token_ids[is_word]]
+    doc_ids = token_docs[is_word]
+    word_index = {word: i for i, word in enumerate(vocabulary)}
+
+    total_words = int(word_ids.size)
+    total_sentences = max(int(sentence_lengths.size), 1)
+    syllables = int(_syllables(vocabulary)[word_ids].sum()) if total_words else 0
+    words_per_sentence = total_words / total_sentences
+    syllables_per_word = syllables / max(total_words, 1)
+
+    rates = {
+        phrase: round(count * 1000 / max(total_words, 1), 2)
+        for phrase, count in _phrase_counts(word_ids, word_index, TRANSITIONS).items()
+    }
+    transitions = dict(sorted(((p, r) for p, r in rates.items() if r > 0), key=lambda item: -item[1])[:top_transitions])
+
+    return StyleProfile(
+        documents=len(texts),
+        words=total_words,
+        sentence_words=_summary(sentence_lengths),
+        paragraph_words=_summary(paragraph_lengths),
+        paragraphs_per_post=round(float(np.mean(paragraph_counts)), 1),
+        list_line_share=round(list_paragraphs / max(sum(paragraph_counts), 1), 3),
+        question_share=round(min(questions / total_sentences, 1.0), 3),
+        exclamation_share=round(min(exclamations / total_sentences, 1.0), 3),
+        flesch_reading_ease=round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1),
+        flesch_kincaid_grade=round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 1),
+        transitions=transitions,
+        bigrams=_top_ngrams(word_ids, doc_ids, vocabulary, 2, top_n),
+        trigrams=_top_ngrams(word_ids, doc_ids, vocabulary, 3, top_n),
+    )
+
+
+STYLE_FEATURES = (
+    'words_per_sentence', 'words_per_paragraph', 'question_share', 'exclamation_share',
+    'list_line_share', 'syllables_per_word', 'transitions_per_1000', 'stopword_share'
+)
+
+_SINGLE_TRANSITIONS = frozenset(phrase for phrase in TRANSITIONS if ' ' not in phrase)
+_MULTI_TRANSITIONS = tuple(phrase for phrase in TRANSITIONS if ' ' in phrase)
+
+
+def style_features(text: str) -> np.ndarray:
+    """Per-document style measurements, in the order of STYLE_FEATURES.
+
+    The corpus-level counterpart of compute_style_profile, cheap enough to run on
+    every generated draft (see DraftScorer).
+    """
+    paragraphs = [p for p in (text or '').split('\n') if p.strip()]
+    tokens = _TOKEN.findall((text or '').lower() + '\n')
+    words = [token for token in tokens if token[0].isalnum()]
+    sentences, in_sentence = 0, False
+    for token in tokens:
+        if token[0].isalnum():
+            in_sentence = True
+        elif in_sentence:
+            sentences += 1
+            in_sentence = False
+    n_words, sentences = max(len(words), 1), max(sentences, 1)
+    distinct = np.array(sorted(set(words)), dtype=str)
+    syllables = dict(zip(distinct, _syllables(distinct).tolist())) if distinct.size else {}
+    joined = f" {' '.join(words)} "
+    transitions = (sum(word in _SINGLE_TRANSITIONS for word in words)
+                   + sum(joined.count(f" {phrase} ") for phrase in _MULTI_TRANSITIONS))
+    return np.array([
+        len(words) / sentences,
+        len(words) / max(len(paragraphs), 1),
+        min(text.count('?') / sentences, 1.0) if text else 0.0,
+        min(text.count('!') / sentences, 1.0) if text else 0.0,
+        sum(1 for p in paragraphs if _LIST_LINE.match(p)) / max(len(paragraphs), 1),
+        sum(syllables[word] for word in words) / n_words,
+        transitions * 1000 / n_words,
+        sum(word in STOPWORDS for word in words) / n_words,
+    ], dtype=np.float64)
@@ -0,0 +1,214 @@
+# utils/task_graph.py
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from utils.tracing import tracer
+import contextvars
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_outputs (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    output TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+def task_key(task: Any, name: str = '') -> str:
+    """Hash what determines a task's output: its graph name, prompt, expected output, agent role and model.
+
+    The model is read from the agent's ``crewai.LLM`` (``model`` and ``temperature``),
+    which is what CrewAI actually calls, whatever object the agent was built with.
+
+    Dependency outputs are part of the prompt of the tasks built from them, so a
+    changed upstream output changes every downstream key as well. The name keeps
+    tasks with identical prompts apart, e.g. several drafts of one topic.
+    """
+    agent = getattr(task, 'agent', None)
+    llm = getattr(agent, 'llm', None)
+    parts = [
+        name,
+        getattr(task, 'description', ''),
+        getattr(task, 'expected_output', ''),
+        getattr(agent, 'role', None),
+        getattr(llm, 'model', None) or type(llm).__name__,
+        getattr(llm, 'temperature', None),
+    ]
+    return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+
+class TaskOutputCache:
+    """SQLite cache of finished task outputs, keyed by ``task_key``.
+
+    A run that fails half-way re-uses every task that already completed, so a
+    failed writing step does not repeat the analysis that fed it.
+
+    Example:
+        >>> cache = TaskOutputCache('newsletter_cache/crew_cache.db')
+        >>> TaskGraph(cache=cache).run()
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT output FROM task_outputs WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, name: str, output: str, seconds: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO task_outputs (key, name, output, seconds, created_at) VALUES (?, ?, ?, ?, ?)',
+                (key, name, output, seconds, datetime.now().isoformat())
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM task_outputs')
+
+
+@dataclass
+class TaskResult:
+    """Outcome of one task in a TaskGraph run.
+
+    Attributes:
+        name (str): Task name in the graph.
+        status (str): 'ok', 'cached', 'failed' or 'skipped' (a dependency failed).
+        output (Optional[str]): Raw task output.
+        seconds (float): Time spent building and executing the task.
+        started (float): Offset in seconds from the start of the run.
+        error (Optional[str]): Error of a failed task.
+    """
+    name: str
+    status: str
+    output: Optional[str] = None
+    seconds: float = 0.0
+    started: float = 0.0
+    error: Optional[str] = None
+
+
+class TaskGraph:
+    """Runs CrewAI tasks as a dependency graph, executing independent tasks concurrently.
+
+    Each node is a factory that receives the outputs of its dependencies and
+    returns the Task to run, so prompts can embed upstream results (a writing task
+    is only built once the style guide exists). A task starts as soon as all of
+    its dependencies have finished, up to ``max_workers`` at a time, and runs via
+    ``task.execute_sync()``. With a TaskOutputCache, tasks whose key is cached are
+    not executed again. When a task fails, its dependents are skipped while the
+    rest of the graph keeps going.
+
+    Attributes:
+        cache (TaskOutputCache, optional): Cache of finished outputs.
+        max_workers (int): Concurrent tasks.
+    Example:
+        >>> graph = TaskGraph(cache=TaskOutputCache('crew_cache.db'), max_workers=4)
+        >>> graph.add('style_guide', lambda outputs: tasks.analyze_style(researcher, corpus))
+        >>> graph.add('draft', lambda outputs: tasks.write_newsletter(writer, outputs['style_guide'], topic),
+        ...           depends_on=['style_guide'])
+        >>> results = graph.run()
+    """
+    def __init__(self, cache: Optional[TaskOutputCache] = None, max_workers: int = 4):
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self._factories: Dict[str, Callable[[Dict[str, str]], Any]] = {}
+        self._depends_on: Dict[str, List[str]] = {}
+
+    def add(self, name: str, factory: Callable[[Dict[str, str]], Any], depends_on: Optional[List[str]] = None):
+        """Add a task; ``factory(outputs)`` gets ``{dependency: output}`` and returns the Task."""
+        if name in self._factories:
+            raise ValueError(f"Duplicate task name: {name}")
+        missing = [dependency for dependency in depends_on or [] if dependency not in self._factories]
+        if missing:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Task {name} depends on unknown tasks: {', '.join(missing)}")
+        self._factories[name] = factory
+        self._depends_on[name] = list(depends_on or [])
+
+    def _execute(self, name: str, outputs: Dict[str, str], run_start: float) -> TaskResult:
+        start = time.perf_counter()
+        with tracer.span('crew.task', task=name) as span:
+            task = self._factories[name](outputs)
+            key = task_key(task, name)
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                output, status = cached, 'cached'
+            else:
+                result = task.execute_sync()
+                output, status = str(getattr(result, 'raw', result)), 'ok'
+            span.set(status=status, output_chars=len(output))
+        seconds = time.perf_counter() - start
+        if self.cache and status == 'ok':
+            self.cache.put(key, name, output, seconds)
+        return TaskResult(name=name, status=status, output=output, seconds=seconds, started=start - run_start)
+
+    def run(self) -> Dict[str, TaskResult]:
+        """Execute the graph. Returns one TaskResult per task, in insertion order."""
+        results: Dict[str, TaskResult] = {}
+        running: Dict[Future, str] = {}
+        run_start = time.perf_counter()
+
+        def ready() -> List[str]:
+            return [name for name in self._factories
+                    if name not in results and name not in running.values()
+                    and all(dependency in results for dependency in self._depends_on[name])]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crew-task') as pool:
+            while len(results) < len(self._factories):
+                for name in ready():
+                    failed = [d for d in self._depends_on[name] if results[d].status in ('failed', 'skipped')]
+                    if failed:
+                        results[name] = TaskResult(name=name, status='skipped',
+                                                   error=f"Dependency failed: {', '.join(failed)}")
+                        continue
+                    outputs = {dependency: results[dependency].output for dependency in self._depends_on[name]}
+                    # Copy the context so each task's span nests under the caller's span
+                    future = pool.submit(contextvars.copy_context().run, self._execute, name, outputs, run_start)
+                    running[future] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"Task {name} failed: {str(e)}")
+                        results[name] = TaskResult(name=name, status='failed', error=str(e))
+                    result = results[name]
+                    print(f"[{len(results)}/{len(self._factories)}] {result.status:<7} {name} ({result.seconds:.1f}s)")
+        return {name: results[name] for name in self._factories}
+
+    @staticmethod
+    def report(results: Dict[str, TaskResult], wall_time: float) -> Dict:
+        """Per-task timing plus how much the concurrency saved over running tasks one by one."""
+        task_time = sum(result.seconds for result in results.values())
+        return {
+            'tasks': len(results),
+            'succeeded': sum(result.status in ('ok', 'cached') for result in results.values()),
+            'cached': sum(result.status == 'cached' for result in results.values()),
+            'failed': sum(result.status == 'failed' for result in results.values()),
+            'skipped': sum(result.status == 'skipped' for result in results.values()),
+            'wall_time': round(wall_time, 3),
+            'task_time': round(task_time, 3),
+            'parallel_speedup': round(task_time / wall_time, 2) if wall_time > 0 else None,
+            'results': [{**{key: value for key, value in asdict(result).items() if key != 'output'},
+                         'seconds': round(result.seconds, 3), 'started': round(result.started, 3)}
+                        for result in results.values()],
+        }
@@ -0,0 +1,293 @@
+# utils/tracing.py
+from langchain_core.callbacks import BaseCallbackHandler
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+import contextlib
+import threading
+import cProfile
+import pstats
+import atexit
+import bisect
+import json
+import time
+import os
+import io
+
+# Explicit bucket bounds in milliseconds, the OpenTelemetry SDK defaults
+DEFAULT_BOUNDS_MS = (0, 5, 10, 25, 50, 75, 100, 250, 500, 750, 1000, 2500, 5000, 7500, 10000)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max, as in OpenTelemetry."""
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (max for the overflow bucket)."""
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count, 'sum': round(self.sum, 3),
+            'min': round(self.min, 3) if self.count else None, 'max': round(self.max, 3) if self.count else None,
+            'p50': round(self.quantile(0.5), 3) if self.count else None,
+            'p95': round(self.quantile(0.95), 3) if self.count else None,
+            'explicitBounds': list(self.bounds), 'bucketCounts': self.buckets,
+        }
+
+
+class Span:
+    """One timed operation. Use ``Tracer.span`` rather than creating spans directly."""
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes: Any):
+        """Add attributes known only once the operation has run (status codes, sizes, ...)."""
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        duration = time.perf_counter() - self._start
+        self.tracer._finish(self, duration, error)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(exc)
+        return False
+
+
+class _NoopSpan:
+    def set(self, **attributes: Any):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Spans, counters and histograms for one run, written as JSON lines.
+
+    Disabled by default, in which case ``span`` returns a shared no-op and
+    ``count``/``observe`` return immediately, so instrumented code costs next to
+    nothing. Once enabled, each finished span is written as one JSON line using
+    OpenTelemetry's span field names (``traceId``, ``spanId``, ``parentSpanId``,
+    ``startTimeUnixNano``, ``endTimeUnixNano``, ``attributes``, ``status``) and its
+    duration is added to a per-name histogram. Parent spans propagate through
+    threads started with ``asyncio.to_thread`` and asyncio tasks via contextvars.
+    ``close`` appends one ``metrics`` line with all counters and histograms.
+
+    Example:
+        >>> tracer.configure('trace.jsonl')
+        >>> with tracer.span('scrape.goto', url=url):
+        ...     await page.goto(url)
+        >>> tracer.count('scrape.pages', status='ok')
+        >>> tracer.close()
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        self.counters: Dict[Tuple, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def configure(self, path: Optional[str] = None, enabled: bool = True):
+        """Start a new trace, writing spans to ``path`` (in-memory metrics only when None)."""
+        self.close()
+        self.enabled = enabled
+        self.path = path
+        self.trace_id = os.urandom(16).hex()
+        self.counters, self.histograms = {}, {}
+        if enabled and path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager timing ``name``; nested spans record it as their parent."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def start_span(self, name: str, **attributes: Any):
+        """Begin a span that is ended explicitly with ``span.end()``, e.g. from callbacks."""
+        return self.span(name, **attributes)
+
+    def count(self, name: str, value: float = 1, **attributes: Any):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(attributes.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Record ``value`` (milliseconds for durations) in the histogram ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(value)
+
+    def _write(self, record: Dict):
+        if self._file:
+            self._file.write(json.dumps(record, default=str) + '\n')
+
+    def _finish(self, span: Span, duration: float, error: Optional[BaseException]):
+        duration_ms = duration * 1000
+        record = {
+            'type': 'span',
+            'name': span.name,
+            'traceId': self.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id,
+            'startTimeUnixNano': span.start_ns,
+            'endTimeUnixNano': span.start_ns + int(duration * 1e9),
+            'durationMs': round(duration_ms, 3),
+            'attributes': span.attributes,
+            'status': {'code': 'ERROR', 'message': str(error)} if error else {'code': 'OK'},
+            'thread': threading.current_thread().name,
+        }
+        with self._lock:
+            self.histograms.setdefault(f"span.{span.name}", Histogram()).observe(duration_ms)
+            self._write(record)
+
+    def summary(self) -> Dict:
+        """Counters and histograms; span histograms are ``span.<name>`` in milliseconds."""
+        with self._lock:
+            counters = [
+                {'name': name, 'attributes': dict(attributes), 'value': value}
+                for (name, attributes), value in sorted(self.counters.items())
+            ]
+            histograms = {name: histogram.as_dict() for name, histogram in self.histograms.items()}
+        return {'counters': counters, 'histograms': histograms}
+
+    def report(self, top: int = 15) -> str:
+        """Spans ranked by total time, to see at a glance where wall time went."""
+        rows = sorted(
+            ((name[len('span.'):], h) for name, h in self.histograms.items() if name.startswith('span.')),
+            key=lambda item: -item[1].sum
+        )[:top]
+        lines = [f"{'span':<32} {'count':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+        lines += [f"{name:<32} {h.count:>7} {h.sum / 1000:>9.2f} {h.sum / h.count:>9.1f} {h.max:>9.1f}"
+                  for name, h in rows]
+        return '\n'.join(lines)
+
+    def close(self):
+        """Write the metrics line and close the output file."""
+        if self.enabled and self._file:
+            self._write({'type': 'metrics', 'traceId': self.trace_id, **self.summary()})
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+tracer = Tracer()
+atexit.register(tracer.close)
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """LangChain callback recording an ``llm.call`` span per model request.
+
+    Cached responses never reach the model, so they produce no span; see the
+    ``llm_cache.lookup`` counter instead. Streaming calls also record time to
+    first token in the ``llm.time_to_first_token`` histogram.
+    """
+    def __init__(self):
+        self._spans: Dict[UUID, Tuple[Any, float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        if not tracer.enabled:
+            return
+        span = tracer.start_span('llm.call', prompt_chars=sum(len(prompt) for prompt in prompts),
+                                 model=(serialized or {}).get('kwargs', {}).get('model'))
+        with self._lock:
+            self._spans[run_id] = (span, time.perf_counter(), False)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        with self._lock:
+            entry = self._spans.get(run_id)
+            if not entry or entry[2]:
+                return
+            self._spans[run_id] = (entry[0], entry[1], True)
+        tracer.observe('llm.time_to_first_token', (time.perf_counter() - entry[1]) * 1000)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any):
+        with self._lock:
+            entry = self._spans.pop(run_id, None)
+        if entry:
+            entry[0].set(**attributes)
+            entry[0].end(error)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        text = ''.join(g.text for generations in response.generations for g in generations)
+        self._end(run_id, output_chars=len(text))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error)
+
+
+@contextlib.contextmanager
+def profiling(path: Optional[str] = None, top: int = 25):
+    """Run the enclosed block under cProfile.
+
+    Stats are dumped to ``path`` (open with ``python -m pstats`` or snakeviz) and
+    the ``top`` functions by cumulative time are printed. cProfile only sees the
+    calling thread; asyncio code runs there, but for worker threads and native
+    frames attach py-spy to the printed PID instead
+    (``py-spy record -o profile.svg --pid <pid>``), which needs no code changes.
+    """
+    print(f"Profiling enabled (pid {os.getpid()})")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+            print(f"Profile saved to {path}")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+        print(out.getvalue())
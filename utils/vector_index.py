@@ -0,0 +1,199 @@
+# utils/vector_index.py
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+import hashlib
+import json
+import os
+import re
+
+EmbedFunction = Callable[[List[str]], List[List[float]]]
+
+
+def split_paragraphs(text: str, min_chars: int = 80, max_chars: int = 1200) -> List[str]:
+    """Split newsletter content into paragraph-level passages.
+
+    Very short lines (headings, bylines) are merged into the following paragraph,
+    and long paragraphs are cut at sentence boundaries near ``max_chars``.
+    """
+    passages, pending = [], ''
+    for paragraph in (p.strip() for p in text.split('\n')):
+        if not paragraph:
+            continue
+        paragraph = f"{pending} {paragraph}".strip() if pending else paragraph
+        pending = ''
+        if len(paragraph) < min_chars:
+            pending = paragraph
+            continue
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind('. ', 0, max_chars)
+            cut = cut + 1 if cut > min_chars else max_chars
+            passages.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        passages.append(paragraph)
+    if pending:
+        passages.append(pending)
+    return passages
+
+
+class HashingEmbedder:
+    """Deterministic, dependency-free embedding via hashed word uni- and bigrams.
+
+    Useful offline and in tests; quality is well below a real embedding model
+    but overlap in vocabulary still ranks related passages first.
+
+    Example:
+        >>> embed = HashingEmbedder(dim=256)
+        >>> vectors = embed(["margin expansion", "earnings per share"])
+    """
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _bucket(self, token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little') % self.dim
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"[a-z0-9']+", text.lower())
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                vectors[row, self._bucket(token)] += 1.0
+        return vectors.tolist()
+
+
+def ollama_embedder(model: str = 'nomic-embed-text', base_url: str = 'http://localhost:11434') -> EmbedFunction:
+    """Embedding function backed by a local Ollama embedding model (memoized, see config.get_embeddings)."""
+    from config import get_embeddings
+    return get_embeddings(model, base_url).embed_documents
+
+
+class VectorIndex:
+    """On-disk passage index for retrieval-augmented writing.
+
+    Passages are paragraph-level chunks of scraped newsletters. Their embeddings
+    are stored as a float32 ``embeddings.npy`` (loaded memory-mapped, so opening a
+    large index is cheap) with passage text and provenance in ``passages.jsonl``
+    and a ``manifest.json`` of ``{url: content_hash}``. ``update`` only embeds
+    posts that are new or whose content hash changed.
+
+    Attributes:
+        index_dir (str): Directory holding the index files.
+        embed (EmbedFunction): Maps a batch of texts to vectors.
+        batch_size (int): Passages embedded per call.
+    Example:
+        >>> index = VectorIndex('newsletter_cache/vector_index', embed=ollama_embedder())
+        >>> index.update(scraper.store.iter_newsletters(publication='lootbag.beehiiv.com'))
+        >>> passages = index.search("Margin expansion", k=5)
+    """
+    def __init__(self, index_dir: str, embed: Optional[EmbedFunction] = None, batch_size: int = 64):
+        self.index_dir = index_dir
+        self.embed = embed or HashingEmbedder()
+        self.batch_size = batch_size
+        os.makedirs(index_dir, exist_ok=True)
+        self._embeddings: Optional[np.ndarray] = None
+        self._passages: List[Dict] = []
+        self._manifest: Dict[str, str] = {}
+        self._load()
+
+    @property
+    def _paths(self):
+        return (os.path.join(self.index_dir, 'embeddings.npy'),
+                os.path.join(self.index_dir, 'passages.jsonl'),
+                os.path.join(self.index_dir, 'manifest.json'))
+
+    def _load(self):
+        embeddings_path, passages_path, manifest_path = self._paths
+        if not all(os.path.exists(path) for path in self._paths):
+            return
+        self._embeddings = np.load(embeddings_path, mmap_mode='r')
+        with open(passages_path, 'r', encoding='utf-8') as f:
+            self._passages = [json.loads(line) for line in f]
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self._manifest = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    def _embed_batched(self, texts: List[str]) -> np.ndarray:
+        batches = [
+            np.asarray(self.embed(texts[start:start + self.batch_size]), dtype=np.float32)
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        vectors = np.vstack(batches)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def update(self, newsletters: Iterable[Dict]) -> int:
+        """Bring the index in line with the given corpus.
+
+        Passages of unchanged posts are kept as-is; changed posts are re-chunked and
+        re-embedded, new posts are added and posts missing from ``newsletters`` are
+        dropped.
+
+        Returns:
+            int: Number of passages embedded in this call.
+        """
+        corpus = {newsletter['url']: newsletter for newsletter in newsletters}
+        fingerprint = {url: newsletter['content_hash'] for url, newsletter in corpus.items()}
+        stale = {url for url, digest in self._manifest.items() if fingerprint.get(url) != digest}
+        fresh = [url for url, digest in fingerprint.items() if self._manifest.get(url) != digest]
+        if not stale and not fresh:
+            return 0
+
+        keep = [i for i, passage in enumerate(self._passages) if passage['url'] not in stale]
+        passages = [self._passages[i] for i in keep]
+        kept_vectors = np.asarray(self._embeddings[keep]) if self._embeddings is not None and keep else None
+
+        new_passages = [
+            {'url': url, 'title': corpus[url].get('title', ''), 'date': corpus[url].get('date', ''), 'text': text}
+            for url in fresh for text in split_paragraphs(corpus[url].get('content') or '')
+        ]
+        parts = [part for part in (kept_vectors,) if part is not None]
+        if new_passages:
+            parts.append(self._embed_batched([passage['text'] for passage in new_passages]))
+        embeddings = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+        self._save(embeddings, passages + new_passages, fingerprint)
+        return len(new_passages)
+
+    def _save(self, embeddings: np.ndarray, passages: List[Dict], manifest: Dict[str, str]):
+        embeddings_path, passages_path, manifest_path = self._paths
+        # Release the memory map before replacing the file underneath it
+        self._embeddings = None
+        with open(f"{embeddings_path}.tmp", 'wb') as f:
+            np.save(f, embeddings)
+        with open(f"{passages_path}.tmp", 'w', encoding='utf-8') as f:
+            for passage in passages:
+                f.write(json.dumps(passage, ensure_ascii=False) + '\n')
+        with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        for path in self._paths:
+            os.replace(f"{path}.tmp", path)
+        self._load()
+
+    def search(self, query: str, k: int = 5, max_per_post: int = 2) -> List[Dict]:
+        """Return the ``k`` passages most similar to ``query`` (cosine similarity).
+
+        At most ``max_per_post`` passages are taken from any single newsletter so the
+        results cover several posts.
+        """
+        if self._embeddings is None or not len(self._passages):
+            return []
+        query_vector = self._embed_batched([query])[0]
+        scores = self._embeddings @ query_vector
+        candidates = min(len(scores), k * max(max_per_post, 1) * 4)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        results, per_post = [], {}
+        for i in top[np.argsort(-scores[top])]:
+            passage = self._passages[i]
+            if per_post.get(passage['url'], 0) >= max_per_post:
+                continue
+            per_post[passage['url']] = per_post.get(passage['url'], 0) + 1
+            results.append({**passage, 'score': float(scores[i])})
+            if len(results) == k:
+                break
+        return results
+
+
+def format_passages(passages: List[Dict]) -> str:
+    """Render retrieved passages for inclusion in the writing prompt."""
+    return "\n\n".join(f"From \"{passage['title']}\":\n{passage['text']}" for passage in passages)